@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'SelvaCoreWeb.settings')
 
 application = get_asgi_application()
+
+if os.environ.get('SELVA_WARMUP') == '1':
+    from games.warmup import run_warmup
+
+    run_warmup()
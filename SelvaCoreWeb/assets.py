@@ -0,0 +1,171 @@
+import gzip
+import io
+import re
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - .br é opcional, .gz sempre é gerado
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (".css", ".js", ".svg", ".json", ".txt", ".html", ".map")
+# Abaixo disso o ganho não paga o cabeçalho extra.
+MIN_COMPRESS_SIZE = 512
+
+_CSS_COMMENT_RE = re.compile(r"/\*.*?\*/", re.DOTALL)
+_CSS_SPACE_RE = re.compile(r"\s+")
+_CSS_PUNCTUATION_RE = re.compile(r"\s*([{};,])\s*")
+_CSS_COLON_RE = re.compile(r":\s+")
+_JS_LINE_COMMENT_RE = re.compile(r"^\s*//.*$", re.MULTILINE)
+_CLASS_ATTR_RE = re.compile(r"""class=(["'])(.*?)\1""", re.DOTALL)
+_ID_ATTR_RE = re.compile(r"""id=(["'])(.*?)\1""", re.DOTALL)
+_TOKEN_RE = re.compile(r"[A-Za-z_][\w-]*")
+_SELECTOR_CLASS_RE = re.compile(r"\.([A-Za-z_][\w-]*)")
+_SELECTOR_ID_RE = re.compile(r"#([A-Za-z_][\w-]*)")
+_TAG_RE = re.compile(r"<([A-Za-z][\w-]*)")
+_SELECTOR_NOISE_RE = re.compile(r"\[[^\]]*\]|::?[\w-]+|[.#][\w-]+")
+_SELECTOR_TAG_RE = re.compile(r"(?:^|[\s>+~(])([A-Za-z][\w-]*)")
+# Estados de interação não aparecem no primeiro paint: chegam com a folha completa.
+_INTERACTION_RE = re.compile(r":(?:hover|focus|focus-visible|focus-within|active|visited)(?![\w-])")
+
+
+def minify_css(source: str) -> str:
+    """Remove comentários e espaços redundantes sem tocar em expressões como calc()."""
+    css = _CSS_COMMENT_RE.sub("", source)
+    css = _CSS_SPACE_RE.sub(" ", css)
+    css = _CSS_PUNCTUATION_RE.sub(r"\1", css)
+    css = _CSS_COLON_RE.sub(":", css)
+    return css.replace(";}", "}").strip()
+
+
+def minify_js(source: str) -> str:
+    """Minificação conservadora: só descarta indentação, linhas vazias e comentários de linha inteira."""
+    js = _JS_LINE_COMMENT_RE.sub("", source)
+    return "\n".join(line.strip() for line in js.splitlines() if line.strip())
+
+
+def _css_blocks(css):
+    """Divide CSS (sem comentários) em pares (prelúdio, corpo) de nível superior."""
+    blocks = []
+    depth = start = prelude_end = 0
+    for index, char in enumerate(css):
+        if char == "{":
+            if depth == 0:
+                prelude_end = index
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                blocks.append((css[start:prelude_end].strip(), css[prelude_end + 1:index]))
+                start = index + 1
+    return blocks
+
+
+def markup_selectors(markup: str) -> tuple[set[str], set[str], set[str]]:
+    """Classes, ids e tags presentes no HTML/template informado (``html`` conta sempre)."""
+    classes = {token for _, value in _CLASS_ATTR_RE.findall(markup) for token in _TOKEN_RE.findall(value)}
+    ids = {token for _, value in _ID_ATTR_RE.findall(markup) for token in _TOKEN_RE.findall(value)}
+    tags = {tag.lower() for tag in _TAG_RE.findall(markup)} | {"html"}
+    return classes, ids, tags
+
+
+def _selector_matches(selector, classes, ids, tags):
+    if _INTERACTION_RE.search(selector):
+        return False
+    selector_tags = {tag.lower() for tag in _SELECTOR_TAG_RE.findall(_SELECTOR_NOISE_RE.sub(" ", selector))}
+    return (
+        set(_SELECTOR_CLASS_RE.findall(selector)) <= classes
+        and set(_SELECTOR_ID_RE.findall(selector)) <= ids
+        and selector_tags <= tags
+    )
+
+
+def _critical_rules(blocks, classes, ids, tags):
+    rules = []
+    for prelude, body in blocks:
+        if prelude.startswith("@keyframes"):
+            continue
+        if prelude.startswith("@"):
+            nested = _critical_rules(_css_blocks(body), classes, ids, tags)
+            if nested:
+                rules.append(f"{prelude}{{{''.join(nested)}}}")
+            continue
+        selectors = [sel.strip() for sel in prelude.split(",") if _selector_matches(sel, classes, ids, tags)]
+        if selectors:
+            rules.append(f"{','.join(selectors)}{{{body}}}")
+    return rules
+
+
+def extract_critical_css(css: str, markup: str) -> str:
+    """Regras de ``css`` cujos seletores só usam classes, ids e tags do ``markup``.
+
+    Ficam de fora estados de interação e @keyframes: as animações começam quando a folha completa carrega.
+    """
+    blocks = _css_blocks(_CSS_COMMENT_RE.sub("", css))
+    return minify_css("".join(_critical_rules(blocks, *markup_selectors(markup))))
+
+
+def optimize_image(content: bytes, extension: str) -> bytes:
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(content))
+    buffer = io.BytesIO()
+    if extension == ".png":
+        image.save(buffer, format="PNG", optimize=True)
+    else:
+        image.save(buffer, format="JPEG", optimize=True, progressive=True, quality=85)
+    optimized = buffer.getvalue()
+    return optimized if len(optimized) < len(content) else content
+
+
+class PrecompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Manifest com hash de conteúdo, CSS/JS minificados, imagens otimizadas e irmãos .gz/.br."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            # O hash é calculado lendo do storage de origem; arquivos reescritos passam a ser lidos daqui.
+            paths = {name: (self, name) if self._minify(name, *source) else source for name, source in paths.items()}
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if not dry_run and isinstance(hashed_name, str):
+                self._precompress(hashed_name)
+            yield name, hashed_name, processed
+
+    def _minify(self, name, source_storage, source_path):
+        extension = name[name.rfind("."):].lower()
+        if extension not in (".css", ".js", ".png", ".jpg", ".jpeg") or ".min." in name:
+            return False
+        # Sempre a partir do fonte: a cópia em STATIC_ROOT pode já ser a minificada de um collectstatic anterior
+        # (que pula arquivos não modificados), e o resultado e o hash precisam ser os mesmos a cada execução.
+        with source_storage.open(source_path) as handle:
+            original = handle.read()
+        if extension == ".css":
+            content = minify_css(original.decode("utf-8")).encode("utf-8")
+        elif extension == ".js":
+            content = minify_js(original.decode("utf-8")).encode("utf-8")
+        else:
+            content = optimize_image(original, extension)
+        if content == original:
+            return False
+        if self.exists(name):
+            self.delete(name)
+        self._save(name, ContentFile(content))
+        return True
+
+    def _precompress(self, name):
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+            return
+        with self.open(name) as handle:
+            content = handle.read()
+        if len(content) < MIN_COMPRESS_SIZE:
+            return
+        variants = {".gz": gzip.compress(content, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants[".br"] = brotli.compress(content, quality=11)
+        for suffix, compressed in variants.items():
+            if len(compressed) >= len(content):
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
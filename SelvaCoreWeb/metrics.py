@@ -0,0 +1,223 @@
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+# Segundos entre gravações do arquivo deste processo; a gravação acontece no fim de uma requisição.
+FLUSH_INTERVAL = 1.0
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+QUERY_SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+HISTOGRAMS = {
+    "selva_http_request_duration_seconds": LATENCY_BUCKETS,
+    "selva_db_queries_per_request": QUERY_COUNT_BUCKETS,
+    "selva_db_query_seconds_per_request": QUERY_SECONDS_BUCKETS,
+}
+
+HELP = {
+    "selva_http_request_duration_seconds": "Latência das requisições por nome de URL.",
+    "selva_http_requests_total": "Requisições por nome de URL e classe de status.",
+    "selva_db_queries_per_request": "Consultas SQL por requisição.",
+    "selva_db_query_seconds_per_request": "Tempo somado de SQL por requisição.",
+    "selva_cache_lookups_total": "Buscas no cache em camadas por namespace e resultado.",
+    "selva_cache_hit_ratio": "Fração de buscas atendidas pelo cache (memória ou compartilhado).",
+    "selva_pledge_status_transitions_total": "Mudanças de status Pix das promessas.",
+    "selva_queue_depth": "Itens aguardando processamento por fila.",
+    "selva_rollup_lag_seconds": "Segundos desde a última consolidação diária.",
+}
+
+# Um dicionário por thread: quem grava nunca disputa lock; o flush só lê cópias.
+_thread = threading.local()
+_shards = []
+_snapshots = []
+_gauges = []
+_last_flush = 0.0
+
+
+def _shard():
+    shard = getattr(_thread, "values", None)
+    if shard is None:
+        shard = _thread.values = {}
+        _shards.append(shard)
+    return shard
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items())) if isinstance(labels, dict) else tuple(labels)
+
+
+def inc(name, labels=(), amount=1):
+    shard = _shard()
+    key = (name, _labels(labels))
+    shard[key] = shard.get(key, 0) + amount
+
+
+def observe(name, value, labels=()):
+    """Soma ``value`` ao histograma ``name`` (baldes não cumulativos + soma; acumulados só na exposição)."""
+    buckets = HISTOGRAMS[name]
+    shard = _shard()
+    key = (name, _labels(labels))
+    histogram = shard.get(key)
+    if histogram is None:
+        histogram = shard[key] = [0] * (len(buckets) + 1) + [0.0]
+    histogram[bisect.bisect_left(buckets, value)] += 1
+    histogram[-1] += value
+
+
+def register_snapshot(function):
+    """``function()`` devolve contadores acumulados do processo ({(nome, labels): valor}) gravados a cada flush."""
+    if function not in _snapshots:
+        _snapshots.append(function)
+
+
+def register_gauges(function):
+    """``function(samples)`` devolve gauges calculados na hora da coleta ({(nome, labels): valor})."""
+    if function not in _gauges:
+        _gauges.append(function)
+
+
+def _encode(name, labels):
+    return f"{name}|{json.dumps(labels)}"
+
+
+def _decode(key):
+    name, _, labels = key.partition("|")
+    return name, tuple(tuple(pair) for pair in json.loads(labels))
+
+
+def _merge(total, key, value):
+    current = total.get(key)
+    if current is None:
+        total[key] = list(value) if isinstance(value, list) else value
+    elif isinstance(value, list):
+        total[key] = [a + b for a, b in zip(current, value)]
+    else:
+        total[key] = current + value
+
+
+def process_values():
+    values = {}
+    for shard in list(_shards):
+        for (name, labels), value in list(shard.items()):
+            _merge(values, _encode(name, labels), value)
+    for function in _snapshots:
+        for (name, labels), value in function().items():
+            _merge(values, _encode(name, labels), value)
+    return values
+
+
+def metrics_dir():
+    return Path(getattr(settings, "METRICS_DIR", Path(settings.BASE_DIR) / "var" / "metrics"))
+
+
+def flush():
+    """Grava os valores deste processo em <METRICS_DIR>/<pid>.json (rename atômico: leitores nunca veem meio arquivo)."""
+    global _last_flush
+    _last_flush = time.monotonic()
+    directory = metrics_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    target = directory / f"{os.getpid()}.json"
+    temporary = directory / f".{os.getpid()}.tmp"
+    temporary.write_text(json.dumps(process_values()))
+    os.replace(temporary, target)
+
+
+def maybe_flush():
+    if time.monotonic() - _last_flush >= FLUSH_INTERVAL:
+        flush()
+
+
+def archive_process(pid):
+    """Incorpora o arquivo de um worker encerrado ao archive.json: os contadores continuam monotônicos."""
+    directory = metrics_dir()
+    source = directory / f"{pid}.json"
+    if not source.exists():
+        return
+    archive = directory / "archive.json"
+    merged = json.loads(archive.read_text()) if archive.exists() else {}
+    for key, value in json.loads(source.read_text()).items():
+        _merge(merged, key, value)
+    temporary = directory / ".archive.tmp"
+    temporary.write_text(json.dumps(merged))
+    os.replace(temporary, archive)
+    source.unlink()
+
+
+def collect():
+    """Soma os arquivos de todos os processos e acrescenta os gauges calculados agora."""
+    flush()
+    totals = {}
+    for path in sorted(metrics_dir().glob("*.json")):
+        try:
+            values = json.loads(path.read_text())
+        except (OSError, ValueError):
+            # Arquivo removido ou reescrito entre o glob e a leitura.
+            continue
+        for key, value in values.items():
+            _merge(totals, key, value)
+    samples = {_decode(key): value for key, value in totals.items()}
+    for function in _gauges:
+        samples.update(function(samples))
+    return samples
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _metric_type(name):
+    if name in HISTOGRAMS:
+        return "histogram"
+    return "counter" if name.endswith("_total") else "gauge"
+
+
+def render(samples):
+    """Formato de exposição de texto do Prometheus (0.0.4)."""
+    lines = []
+    current = None
+    for (name, labels), value in sorted(samples.items()):
+        if name != current:
+            current = name
+            lines.append(f"# HELP {name} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} {_metric_type(name)}")
+        if name in HISTOGRAMS:
+            cumulative = 0
+            for bound, count in zip((*HISTOGRAMS[name], "+Inf"), value[:-1]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {value[-1]}")
+            lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+        else:
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def reset_process():
+    """Descarta os valores herdados do processo pai: um filho de fork começa do zero e grava só no próprio arquivo."""
+    global _last_flush
+    for shard in _shards:
+        shard.clear()
+    _last_flush = 0.0
+
+
+os.register_at_fork(after_in_child=reset_process)
+
+
+@atexit.register
+def _flush_at_exit():
+    if _shards:
+        flush()
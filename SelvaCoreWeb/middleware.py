@@ -0,0 +1,141 @@
+import ipaddress
+import time
+from functools import lru_cache
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+from . import metrics, timing
+from .routers import read_only_traffic
+
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class ReadOnlyRequestMiddleware:
+    """Requisições de métodos seguros leem pela réplica configurada em DATABASE_READ_REPLICA."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if request.method not in SAFE_METHODS:
+            return self.get_response(request)
+        with read_only_traffic():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        if request.method not in SAFE_METHODS:
+            return await self.get_response(request)
+        with read_only_traffic():
+            return await self.get_response(request)
+
+
+@lru_cache(maxsize=8)
+def _internal_networks(networks):
+    return tuple(ipaddress.ip_network(network, strict=False) for network in networks)
+
+
+def client_in_networks(request, networks):
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(address in network for network in _internal_networks(tuple(networks)))
+
+
+def _from_internal_network(request):
+    return client_in_networks(request, getattr(settings, "SERVER_TIMING_INTERNAL_NETWORKS", ()))
+
+
+def may_be_staff(request):
+    # Sem cookie de sessão não há equipe logada: nem consulta o banco.
+    return settings.SESSION_COOKIE_NAME in request.COOKIES and hasattr(request, "auser")
+
+
+class ServerTimingMiddleware:
+    """Cabeçalho Server-Timing (db, tpl, cache, pix, qr, email, total) para a equipe ou a rede interna."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        # Conexões abertas antes do middleware carregar não passaram pelo connection_created.
+        for connection in connections.all(initialized_only=True):
+            timing.instrument_connection(connection=connection)
+
+    def _finish(self, response, timings, started):
+        timings.add("total", time.perf_counter() - started)
+        response.headers["Server-Timing"] = timings.header()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        with timing.collect() as timings:
+            request.server_timing = timings
+            response = self.get_response(request)
+        if _from_internal_network(request) or (may_be_staff(request) and request.user.is_staff):
+            self._finish(response, timings, started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        with timing.collect() as timings:
+            request.server_timing = timings
+            response = await self.get_response(request)
+        if _from_internal_network(request) or (may_be_staff(request) and (await request.auser()).is_staff):
+            self._finish(response, timings, started)
+        return response
+
+
+class MetricsMiddleware:
+    """Latência por nome de URL e SQL por requisição nos contadores do processo (ver SelvaCoreWeb.metrics)."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def _record(self, request, response, started):
+        match = getattr(request, "resolver_match", None)
+        labels = {"view": (match.url_name or "unnamed") if match else "unmatched"}
+        metrics.observe("selva_http_request_duration_seconds", time.perf_counter() - started, labels)
+        metrics.inc("selva_http_requests_total", {**labels, "status": f"{response.status_code // 100}xx"})
+        # Tempo e contagem de SQL vêm do coletor do ServerTimingMiddleware (logo abaixo na pilha).
+        timings = getattr(request, "server_timing", None)
+        if timings is not None:
+            seconds, queries = timings.segments.get("db", (0.0, 0))
+            metrics.observe("selva_db_queries_per_request", queries, labels)
+            metrics.observe("selva_db_query_seconds_per_request", seconds, labels)
+        metrics.maybe_flush()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self._record(request, response, started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self._record(request, response, started)
+        return response
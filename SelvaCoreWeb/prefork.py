@@ -0,0 +1,260 @@
+import gc
+import logging
+import os
+import random
+import selectors
+import signal
+import socket
+import time
+from dataclasses import dataclass
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+from django.db import connections
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+# Intervalo em que master e workers conferem sinais, filhos encerrados e memória.
+TICK_SECONDS = 1.0
+EXIT_RECYCLE = 0
+EXIT_SIGNAL = 3
+# Worker que morre antes disso conta como falha de inicialização e a reposição espera cada vez mais.
+STARTUP_GRACE_SECONDS = 5.0
+MAX_RESPAWN_DELAY = 30.0
+
+
+def default_workers():
+    """Um worker por núcleo disponível a este processo (respeita taskset/cgroups quando o SO informa)."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def memory_usage(pid="self", with_pss=True):
+    """(RSS, PSS) em bytes; PSS divide as páginas copy-on-write entre os processos que ainda as compartilham."""
+    rss = pss = None
+    try:
+        with open(f"/proc/{pid}/statm") as statm:
+            rss = int(statm.read().split()[1]) * PAGE_SIZE
+        if with_pss:
+            with open(f"/proc/{pid}/smaps_rollup") as smaps:
+                for line in smaps:
+                    if line.startswith("Pss:"):
+                        pss = int(line.split()[1]) * 1024
+                        break
+    except (OSError, ValueError, IndexError):
+        pass
+    if rss is None and pid == "self":
+        import resource
+
+        # Fora do Linux só há o pico (em KiB no Linux/BSD, bytes no macOS): melhor que nada.
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return rss, pss
+
+
+def _mb(value):
+    return "?" if value is None else f"{value / 1024 / 1024:.1f} MB"
+
+
+@dataclass
+class ServeConfig:
+    host: str = "127.0.0.1"
+    port: int = 8000
+    workers: int = 1
+    max_requests: int = 1000
+    max_requests_jitter: int = 100
+    max_memory_growth: int = 256 * 1024 * 1024
+    graceful_timeout: float = 30.0
+    backlog: int = 128
+    report_interval: float = 60.0
+    timeout: float = 30.0
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+class Worker:
+    """Processo filho: atende conexões do socket herdado até o limite de requisições ou de crescimento de memória."""
+
+    def __init__(self, listener, application, config, stdout):
+        self.listener = listener
+        self.application = application
+        self.config = config
+        self.stdout = stdout
+        self.alive = True
+
+    def _stop(self, signum, frame):
+        self.alive = False
+
+    def _server(self):
+        server = WSGIServer(self.listener.getsockname()[:2], QuietRequestHandler, bind_and_activate=False)
+        server.socket = self.listener
+        server.server_name, server.server_port = self.config.host, self.listener.getsockname()[1]
+        server.setup_environ()
+        server.set_app(self.application)
+        return server
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        # Sem isso todos os filhos herdam o mesmo estado do gerador (recálculo antecipado do cache sincronizado).
+        random.seed()
+        server = self._server()
+        limit = 0
+        if self.config.max_requests:
+            limit = self.config.max_requests + random.randint(0, self.config.max_requests_jitter)
+        baseline, _ = memory_usage(with_pss=False)
+        handled = 0
+        reason = "sinal"
+        with selectors.DefaultSelector() as selector:
+            selector.register(self.listener, selectors.EVENT_READ)
+            while self.alive:
+                if not selector.select(TICK_SECONDS):
+                    continue
+                try:
+                    connection, address = self.listener.accept()
+                except (BlockingIOError, InterruptedError):
+                    # Vários workers acordam pela mesma conexão; quem perde o accept volta a esperar.
+                    continue
+                # Cada worker atende uma conexão por vez: sem timeout, um cliente que não envia nada o prende para sempre.
+                connection.settimeout(self.config.timeout)
+                try:
+                    server.finish_request(connection, address)
+                except TimeoutError:
+                    logger.info("conexão de %s encerrada por inatividade", address[0])
+                except Exception:
+                    server.handle_error(connection, address)
+                finally:
+                    server.shutdown_request(connection)
+                handled += 1
+                if limit and handled >= limit:
+                    reason = f"{handled} requisições"
+                    break
+                rss, _ = memory_usage(with_pss=False)
+                if self.config.max_memory_growth and rss and baseline and rss - baseline > self.config.max_memory_growth:
+                    reason = f"memória +{_mb(rss - baseline)}"
+                    break
+        connections.close_all()
+        metrics.flush()
+        rss, _ = memory_usage(with_pss=False)
+        self.stdout.write(f"worker {os.getpid()} encerrado ({reason}, RSS {_mb(rss)})\n")
+        self.stdout.flush()
+        return EXIT_SIGNAL if reason == "sinal" else EXIT_RECYCLE
+
+
+class Arbiter:
+    """Master: abre o socket, cria os workers via fork e os repõe quando são reciclados."""
+
+    def __init__(self, application, config, stdout):
+        self.application = application
+        self.config = config
+        self.stdout = stdout
+        self.workers = {}
+        self.stopping = False
+        self.listener = None
+        self.failures = 0
+        self.next_spawn = 0.0
+
+    def _write(self, message):
+        self.stdout.write(message + "\n")
+        self.stdout.flush()
+
+    def _handle_stop(self, signum, frame):
+        self.stopping = True
+
+    def _spawn(self):
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = time.monotonic()
+            return pid
+        code = 1
+        try:
+            code = Worker(self.listener, self.application, self.config, self.stdout).run()
+        except Exception:
+            logger.exception("worker %s falhou", os.getpid())
+        finally:
+            os._exit(code)
+
+    def _reap(self):
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.workers.clear()
+                return
+            if not pid:
+                return
+            started = self.workers.pop(pid, None)
+            metrics.archive_process(pid)
+            code = os.waitstatus_to_exitcode(status)
+            if self.stopping:
+                continue
+            if code == EXIT_RECYCLE:
+                self.failures = 0
+                continue
+            if started is not None and time.monotonic() - started < STARTUP_GRACE_SECONDS:
+                self.failures += 1
+            else:
+                self.failures = 0
+            delay = min(TICK_SECONDS / 4 * 2 ** self.failures, MAX_RESPAWN_DELAY) if self.failures else 0.0
+            self.next_spawn = time.monotonic() + delay
+            self._write(f"worker {pid} saiu com status {code}; repondo em {delay:.1f}s")
+
+    def report_memory(self):
+        master_rss, master_pss = memory_usage()
+        self._write(f"master {os.getpid()}: RSS {_mb(master_rss)}, PSS {_mb(master_pss)}")
+        for pid in sorted(self.workers):
+            rss, pss = memory_usage(pid)
+            self._write(f"worker {pid}: RSS {_mb(rss)}, PSS {_mb(pss)}")
+
+    def _shutdown(self):
+        self._write(f"encerrando {len(self.workers)} worker(s)")
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + self.config.graceful_timeout
+        while self.workers and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.05)
+        for pid in list(self.workers):
+            self._write(f"worker {pid} não terminou em {self.config.graceful_timeout:.0f}s; SIGKILL")
+            os.kill(pid, signal.SIGKILL)
+        while self.workers:
+            self._reap()
+            time.sleep(0.05)
+        self.listener.close()
+
+    def run(self, started=None):
+        started = started if started is not None else time.perf_counter()
+        self.listener = socket.create_server((self.config.host, self.config.port), backlog=self.config.backlog)
+        self.listener.setblocking(False)
+        # Conexões abertas no preload não podem ser herdadas; gc.freeze evita que a coleta toque (e copie) as páginas herdadas.
+        connections.close_all()
+        gc.collect()
+        gc.freeze()
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        for _ in range(self.config.workers):
+            self._spawn()
+        host, port = self.listener.getsockname()[:2]
+        self._write(
+            f"escutando em http://{host}:{port} com {self.config.workers} worker(s); "
+            f"pronto em {(time.perf_counter() - started) * 1000:.0f} ms"
+        )
+        next_report = time.monotonic() + min(self.config.report_interval, 5.0)
+        while not self.stopping:
+            self._reap()
+            while not self.stopping and len(self.workers) < self.config.workers and time.monotonic() >= self.next_spawn:
+                self._spawn()
+            if self.config.report_interval and time.monotonic() >= next_report:
+                self.report_memory()
+                next_report = time.monotonic() + self.config.report_interval
+            time.sleep(TICK_SECONDS / 4)
+        self._shutdown()
@@ -0,0 +1,40 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_read_only_traffic = ContextVar("selva_read_only_traffic", default=False)
+
+
+@contextmanager
+def read_only_traffic():
+    """Marca o trecho atual como somente leitura para o ReadReplicaRouter."""
+    token = _read_only_traffic.set(True)
+    try:
+        yield
+    finally:
+        _read_only_traffic.reset(token)
+
+
+class ReadReplicaRouter:
+    """Envia leituras de tráfego somente leitura para a conexão réplica; o resto fica no default."""
+
+    def db_for_read(self, model, **hints):
+        replica = getattr(settings, "DATABASE_READ_REPLICA", None)
+        if not replica or not _read_only_traffic.get():
+            return None
+        # Dentro de uma transação no default, a leitura precisa enxergar o que ainda não foi commitado.
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return replica
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Réplica e default apontam para o mesmo arquivo SQLite.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -28,6 +28,15 @@ DEBUG = True
 
 ALLOWED_HOSTS = ["localhost", "127.0.0.1"]
 
+# Orçamento (ms) de tempo de import conferido pelos testes com `python -X importtime`.
+IMPORT_TIME_BUDGETS_MS = {
+    'wsgi': int(os.environ.get('SELVA_IMPORT_BUDGET_WSGI_MS', '1500')),
+    'check': int(os.environ.get('SELVA_IMPORT_BUDGET_CHECK_MS', '2500')),
+}
+
+# Identificador do deploy; entra nos ETags das páginas para invalidá-los a cada release.
+RELEASE_ID = os.environ.get('SELVA_RELEASE', '')
+
 
 # Application definition
 
@@ -43,6 +52,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'SelvaCoreWeb.middleware.MetricsMiddleware',
+    'SelvaCoreWeb.middleware.ServerTimingMiddleware',
+    'SelvaCoreWeb.middleware.ReadOnlyRequestMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -51,11 +63,28 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Server-Timing sai para usuários staff e para IPs destas redes (CIDR separados por vírgula).
+SERVER_TIMING_INTERNAL_NETWORKS = [
+    network.strip() for network in os.environ.get('SELVA_SERVER_TIMING_NETWORKS', '').split(',') if network.strip()
+]
+
+# /metrics (formato Prometheus): cada processo grava seus contadores em METRICS_DIR e a coleta soma todos.
+METRICS_DIR = Path(os.environ.get('SELVA_METRICS_DIR', BASE_DIR / 'var' / 'metrics'))
+# Além da equipe logada, /metrics aceita "Authorization: Bearer <token>" (bearer_token do Prometheus).
+METRICS_TOKEN = os.environ.get('SELVA_METRICS_TOKEN', '')
+# Redes liberadas sem token, conferidas pelo REMOTE_ADDR: atrás do nginx todo acesso vem de 127.0.0.1,
+# então só preencha quando o coletor fala direto com o app.
+METRICS_ALLOWED_NETWORKS = [
+    network.strip() for network in os.environ.get('SELVA_METRICS_NETWORKS', '').split(',') if network.strip()
+]
+
 ROOT_URLCONF = 'SelvaCoreWeb.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates com o tempo de render no Server-Timing; NAME mantém o alias "django".
+        'BACKEND': 'SelvaCoreWeb.timing.TimedDjangoTemplates',
+        'NAME': 'django',
     'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -69,18 +98,79 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'SelvaCoreWeb.wsgi.application'
+ASGI_APPLICATION = 'SelvaCoreWeb.asgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SELVA_DB_PROFILE=production liga conexões persistentes e a réplica somente leitura.
+DB_PROFILE = os.environ.get('SELVA_DB_PROFILE', 'development')
+
+SQLITE_PATH = BASE_DIR / 'db.sqlite3'
+
+# Aplicados a cada conexão aberta.
+SQLITE_PRAGMAS = [
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA mmap_size=134217728',
+    'PRAGMA cache_size=-20000',
+    'PRAGMA busy_timeout=5000',
+    'PRAGMA temp_store=MEMORY',
+]
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': SQLITE_PATH,
+        'OPTIONS': {
+            'init_command': ';'.join(SQLITE_PRAGMAS),
+            # Pega o lock de escrita no BEGIN: evita "database is locked" ao promover leitura para escrita.
+            'transaction_mode': 'IMMEDIATE',
+        },
+    }
+}
+
+DATABASE_ROUTERS = ['SelvaCoreWeb.routers.ReadReplicaRouter']
+
+# Alias usado pelo roteador para leituras de requisições GET/HEAD (None desliga).
+DATABASE_READ_REPLICA = None
+
+# journal_mode=WAL fica gravado no cabeçalho do arquivo e cria -wal/-shm ao lado dele: só em produção,
+# para que comandos de desenvolvimento não reescrevam o db.sqlite3 versionado.
+SQLITE_WAL_PRAGMA = 'PRAGMA journal_mode=WAL'
+
+if DB_PROFILE == 'production':
+    DATABASES['default']['OPTIONS']['init_command'] = ';'.join([SQLITE_WAL_PRAGMA, *SQLITE_PRAGMAS])
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE', '600'))
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'OPTIONS': {'init_command': ';'.join([*SQLITE_PRAGMAS, 'PRAGMA query_only=ON'])},
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_READ_REPLICA = 'replica'
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# Nível compartilhado do games.caching (o LRU em memória de cada processo fica na frente dele).
+# Em produção vai para disco, visível a todos os workers; em desenvolvimento basta a memória.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'selvacore',
     }
 }
 
+if DB_PROFILE == 'production':
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('SELVA_CACHE_DIR', str(BASE_DIR / 'var' / 'cache')),
+        'TIMEOUT': 60 * 60 * 24,
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -122,10 +212,44 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# O manifesto com hash só existe depois do collectstatic; em DEBUG os finders servem os fontes.
+STATIC_PIPELINE = os.environ.get('SELVA_STATIC_PIPELINE', '0' if DEBUG else '1') == '1'
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'SelvaCoreWeb.assets.PrecompressedManifestStaticFilesStorage'
+            if STATIC_PIPELINE
+            else 'django.contrib.staticfiles.storage.StaticFilesStorage'
+        ),
+    },
+}
+
 MEDIA_URL = '/media/'
 
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Uploads pequenos ficam em memória (até FILE_UPLOAD_MAX_MEMORY_SIZE); os demais vão para disco
+# e deixam de ser gravados além de MAX_UPLOAD_SIZE.
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'SelvaCoreWeb.uploads.CappedTemporaryFileUploadHandler',
+]
+MAX_UPLOAD_SIZE = int(os.environ.get('SELVA_MAX_UPLOAD_MB', '15')) * 1024 * 1024
+# Imagens de jogos: acima disso é rejeitada só pelo cabeçalho (a decodificação usaria ~4 bytes por pixel).
+IMAGE_MAX_PIXELS = int(os.environ.get('SELVA_IMAGE_MAX_PIXELS', '40000000'))
+# Lado maior aceito sem reprocessar; maiores são reduzidas no upload. 0 guarda o original.
+IMAGE_MAX_DIMENSION = int(os.environ.get('SELVA_IMAGE_MAX_DIMENSION', '3840'))
+IMAGE_UPLOAD_FORMATS = ('JPEG', 'PNG', 'WEBP', 'GIF')
+
+# Entrega de /media/: '' usa FileResponse, 'nginx' responde X-Accel-Redirect e 'sendfile' responde X-Sendfile.
+MEDIA_ACCEL = os.environ.get('SELVA_MEDIA_ACCEL', '')
+# Location "internal" do nginx apontando para MEDIA_ROOT.
+MEDIA_ACCEL_PREFIX = os.environ.get('SELVA_MEDIA_ACCEL_PREFIX', '/_protected-media/')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -147,3 +271,5 @@ PIX_STATIC_PAYLOAD = os.environ.get(
 )
 PIX_STATIC_TXID = os.environ.get('PIX_STATIC_TXID', 'Selvacore')
 PIX_DESCRIPTION = os.environ.get('PIX_DESCRIPTION', 'SelvaCore Apoio')
+# Payload e QR (SVG) são gravados na promessa; após mudar os dados acima rode `manage.py refresh_pix_payloads`.
+PIX_STORE_QR_SVG = os.environ.get('PIX_STORE_QR_SVG', '1') == '1'
@@ -0,0 +1,87 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.backends.signals import connection_created
+from django.template.backends.django import DjangoTemplates, Template
+
+_current = ContextVar("selva_server_timing", default=None)
+
+
+class Timings:
+    """Tempo acumulado e número de chamadas por segmento de uma requisição (segmentos podem se sobrepor)."""
+
+    def __init__(self):
+        self.segments = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds, calls=1):
+        with self._lock:
+            total, count = self.segments.get(name, (0.0, 0))
+            self.segments[name] = (total + seconds, count + calls)
+
+    def header(self):
+        return ", ".join(
+            f'{name};dur={total * 1000:.1f};desc="{count}x"' for name, (total, count) in self.segments.items()
+        )
+
+
+@contextmanager
+def collect():
+    """Liga a coleta no contexto atual; o sync_to_async copia o contexto, então threads do ORM somam aqui também."""
+    timings = Timings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def timed(name):
+    """Cronometra o bloco (ou a função, como decorador) no segmento ``name``; sem coleta ativa custa um get()."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+
+
+def _time_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add("db", time.perf_counter() - started)
+
+
+def instrument_connection(sender=None, connection=None, **kwargs):
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+connection_created.connect(instrument_connection)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        with timed("tpl"):
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Backend padrão do Django com o render de cada template de topo no segmento "tpl"."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import StopUpload, TemporaryFileUploadHandler
+from django.http.multipartparser import MultiPartParser
+
+
+class CappedTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """Grava o upload em disco em blocos e para de ler o corpo ao passar de MAX_UPLOAD_SIZE.
+
+    Content-Length acima do limite (mais a folga dos campos comuns) recusa o arquivo antes do primeiro bloco;
+    senão a leitura para no bloco que cruza o limite. O restante do corpo não é lido
+    (``StopUpload(connection_reset=True)``) e o campo chega ao formulário vazio, com ``truncated=True``.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.limit = settings.MAX_UPLOAD_SIZE
+        self.received = 0
+        self.body_too_large = False
+        self.rejected = {}
+        self.parsing = False
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        if self.parsing or self.request is None:
+            return None
+        # Assume o parsing para devolver, junto com o que foi lido, o arquivo recusado no meio do corpo.
+        self.body_too_large = content_length > self.limit + (settings.DATA_UPLOAD_MAX_MEMORY_SIZE or 0)
+        self.parsing = True
+        post, files = MultiPartParser(META, input_data, self.request.upload_handlers, encoding).parse()
+        for field_name, placeholder in self.rejected.items():
+            files.appendlist(field_name, placeholder)
+        return post, files
+
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        if self.body_too_large:
+            self._reject(field_name, file_name, self.request.META.get("CONTENT_LENGTH"))
+        super().new_file(field_name, file_name, *args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > self.limit:
+            self._reject(self.field_name, self.file_name, self.received)
+        return super().receive_data_chunk(raw_data, start)
+
+    def _reject(self, field_name, file_name, size):
+        placeholder = SimpleUploadedFile(file_name, b"")
+        placeholder.size = int(size or 0)
+        placeholder.truncated = True
+        self.rejected[field_name] = placeholder
+        raise StopUpload(connection_reset=True)
@@ -1,10 +1,12 @@
-from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import path
+from django.urls import path, re_path
+from games import api as games_api
 from games import views as games_views
 
+from . import views as core_views
+
 urlpatterns = [
+    path('admin/tendencias/', games_views.trends_dashboard, name='trends_dashboard'),
     path('admin/', admin.site.urls),
     path(
         'conta/entrar/',
@@ -16,9 +18,13 @@ urlpatterns = [
     path('conta/verificar/', games_views.verify_email, name='verify_email'),
     path('comunidade/', games_views.community_portal, name='faq'),
     path('comunidade/doar/', games_views.donate, name='donate'),
+    path('comunidade/apoiadores/', games_views.supporter_wall, name='supporter_wall'),
     path('estudio/', games_views.home, name='home'),
+    path('estudio/<slug:slug>/', games_views.game_detail, name='game_detail'),
+    path('api/jogos/', games_api.game_catalog, name='api_games'),
+    path('api/faq/', games_api.faq_catalog, name='api_faq'),
+    path('metrics', core_views.metrics_endpoint, name='metrics'),
     path('', games_views.signup, name='landing'),
-]
-
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    re_path(r'^static/(?P<path>.+)$', core_views.static_asset, name='static_asset'),
+    re_path(r'^media/(?P<path>.+)$', core_views.media_file, name='media_file'),
+]
\ No newline at end of file
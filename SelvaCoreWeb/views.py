@@ -0,0 +1,207 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseForbidden,
+    HttpResponseNotModified,
+    StreamingHttpResponse,
+)
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.crypto import constant_time_compare
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+from . import metrics
+from .middleware import client_in_networks, may_be_staff
+
+# Nomes gerados pelo ManifestStaticFilesStorage: arquivo.<12 hex>.ext
+HASHED_NAME_RE = re.compile(r"\.[0-9a-f]{12}\.[A-Za-z0-9]+$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+DEFAULT_CACHE_CONTROL = "public, max-age=300"
+ENCODING_SUFFIXES = (("br", ".br"), ("gzip", ".gz"))
+MEDIA_CACHE_CONTROL = "public, max-age=86400"
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+RANGE_CHUNK_SIZE = 64 * 1024
+
+
+def _accepted_encodings(request):
+    header = request.headers.get("Accept-Encoding", "")
+    accepted = set()
+    for part in header.split(","):
+        token, _, params = part.partition(";")
+        name, _, quality = params.strip().partition("=")
+        if name.strip() == "q":
+            try:
+                if float(quality) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if token.strip():
+            accepted.add(token.strip().lower())
+    return accepted
+
+
+def static_asset(request, path):
+    """Serve STATIC_ROOT escolhendo a variante pré-comprimida e cache imutável para nomes com hash."""
+    try:
+        fullpath = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("Arquivo estático inválido.")
+    if not os.path.isfile(fullpath):
+        raise Http404("Arquivo estático não encontrado.")
+
+    content_type, _ = mimetypes.guess_type(fullpath)
+    accepted = _accepted_encodings(request)
+    served_path, encoding = fullpath, None
+    for candidate, suffix in ENCODING_SUFFIXES:
+        if candidate in accepted and os.path.isfile(fullpath + suffix):
+            served_path, encoding = fullpath + suffix, candidate
+            break
+
+    stat = os.stat(served_path)
+    if not was_modified_since(request.headers.get("If-Modified-Since"), stat.st_mtime):
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(open(served_path, "rb"), content_type=content_type or "application/octet-stream")
+        response["Last-Modified"] = http_date(stat.st_mtime)
+        if encoding:
+            response["Content-Encoding"] = encoding
+    response["Vary"] = "Accept-Encoding"
+    if HASHED_NAME_RE.search(path):
+        response["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    else:
+        response["Cache-Control"] = DEFAULT_CACHE_CONTROL
+    return response
+
+
+def _resolve_media_path(path):
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("Arquivo de mídia inválido.")
+    # safe_join não segue symlinks: confere o caminho real contra o MEDIA_ROOT real.
+    root = os.path.realpath(settings.MEDIA_ROOT)
+    real = os.path.realpath(fullpath)
+    if os.path.commonpath([root, real]) != root or not os.path.isfile(real):
+        raise Http404("Arquivo de mídia não encontrado.")
+    return real
+
+
+def _parse_range(header, size):
+    """Devolve (início, fim) inclusivos de um Range de intervalo único, None se ausente/ignorado ou False se insatisfazível."""
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        # Múltiplos intervalos ou sintaxe desconhecida: a RFC 9110 permite responder o arquivo inteiro.
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _range_is_current(request, etag, mtime):
+    if_range = request.headers.get("If-Range")
+    if not if_range:
+        return True
+    if if_range.startswith(("\"", "W/")):
+        return if_range == etag
+    since = parse_http_date_safe(if_range)
+    return since is not None and int(mtime) <= since
+
+
+def _iter_file_range(path, start, length):
+    # Abre só na primeira iteração: HEAD ou resposta abortada antes do corpo não deixam descritor aberto.
+    with open(path, "rb") as handle:
+        handle.seek(start)
+        while length > 0:
+            chunk = handle.read(min(RANGE_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def media_file(request, path):
+    """Entrega MEDIA_ROOT com Range e validação condicional, delegando ao proxy via X-Accel-Redirect/X-Sendfile."""
+    fullpath = _resolve_media_path(path)
+    stat = os.stat(fullpath)
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    content_type, _ = mimetypes.guess_type(fullpath)
+    content_type = content_type or "application/octet-stream"
+
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        accel = getattr(settings, "MEDIA_ACCEL", "")
+        if accel:
+            # O proxy lê o arquivo e trata Range sozinho; o worker só devolve os cabeçalhos.
+            response = HttpResponse(content_type=content_type)
+            relative = os.path.relpath(fullpath, os.path.realpath(settings.MEDIA_ROOT)).replace(os.sep, "/")
+            if accel == "nginx":
+                response["X-Accel-Redirect"] = settings.MEDIA_ACCEL_PREFIX.rstrip("/") + "/" + quote(relative)
+            else:
+                response["X-Sendfile"] = fullpath
+        else:
+            byte_range = _parse_range(request.headers.get("Range"), stat.st_size)
+            if byte_range is not None and not _range_is_current(request, etag, stat.st_mtime):
+                byte_range = None
+            if byte_range is False:
+                response = HttpResponse(status=416)
+                response["Content-Range"] = f"bytes */{stat.st_size}"
+            elif byte_range:
+                start, end = byte_range
+                length = end - start + 1
+                response = StreamingHttpResponse(
+                    _iter_file_range(fullpath, start, length),
+                    status=206,
+                    content_type=content_type,
+                )
+                response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+                response["Content-Length"] = str(length)
+            else:
+                # Arquivo inteiro: FileResponse usa o wsgi.file_wrapper (sendfile) quando o servidor oferece.
+                response = FileResponse(open(fullpath, "rb"), content_type=content_type)
+
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    response["Accept-Ranges"] = "bytes"
+    response["Cache-Control"] = MEDIA_CACHE_CONTROL
+    return response
+
+
+def _has_metrics_token(request):
+    token = settings.METRICS_TOKEN
+    scheme, _, credentials = request.headers.get("Authorization", "").partition(" ")
+    return bool(token) and scheme.lower() == "bearer" and constant_time_compare(credentials.strip(), token)
+
+
+@require_safe
+def metrics_endpoint(request):
+    """Métricas de todos os workers no formato de texto do Prometheus."""
+    allowed = (
+        _has_metrics_token(request)
+        or client_in_networks(request, settings.METRICS_ALLOWED_NETWORKS)
+        or (may_be_staff(request) and request.user.is_staff)
+    )
+    if not allowed:
+        return HttpResponseForbidden()
+    response = HttpResponse(metrics.render(metrics.collect()), content_type="text/plain; version=0.0.4; charset=utf-8")
+    response["Cache-Control"] = "no-store"
+    return response
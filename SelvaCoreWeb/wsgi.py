@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'SelvaCoreWeb.settings')
 
 application = get_wsgi_application()
+
+if os.environ.get('SELVA_WARMUP') == '1':
+    from games.warmup import run_warmup
+
+    run_warmup()
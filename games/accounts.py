@@ -0,0 +1,195 @@
+import csv
+import secrets
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice
+
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from .models import EmailVerification
+from .utils import generate_verification_code
+
+User = get_user_model()
+
+IMPORT_BATCH_SIZE = 1000
+# Login é pelo e-mail; o username só precisa ser único e não pode expor o endereço (aparece no mural público).
+GENERATED_USERNAME_PREFIX = "apoiador-"
+
+CSV_COLUMNS = {
+    "email": ("email", "e-mail", "e_mail"),
+    "password": ("senha", "password"),
+    "username": ("usuario", "username", "login"),
+    "first_name": ("nome", "first_name"),
+    "last_name": ("sobrenome", "last_name"),
+}
+
+
+@dataclass(frozen=True)
+class AccountRow:
+    line: int
+    email: str
+    username: str
+    password: str
+    first_name: str = ""
+    last_name: str = ""
+
+
+@dataclass
+class AccountImportReport:
+    created: int = 0
+    duplicates: list = field(default_factory=list)
+    invalid: list = field(default_factory=list)
+
+    def summary(self):
+        return f"{self.created} conta(s) criada(s), {len(self.duplicates)} duplicada(s), {len(self.invalid)} inválida(s)"
+
+
+def _csv_column(fieldnames, key):
+    normalized = {name.strip().lower(): name for name in fieldnames if name}
+    for alias in CSV_COLUMNS[key]:
+        if alias in normalized:
+            return normalized[alias]
+    return None
+
+
+def iter_account_rows(handle):
+    """Lê a planilha linha a linha; sem coluna de usuário, gera um username aleatório (nunca o e-mail)."""
+    sample = handle.read(4096)
+    handle.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.DictReader(handle, dialect=dialect)
+    columns = {key: _csv_column(reader.fieldnames or [], key) for key in CSV_COLUMNS}
+    if not columns["email"] or not columns["password"]:
+        raise ValueError("O CSV precisa das colunas de e-mail e senha.")
+    for row in reader:
+        values = {key: (row.get(column) or "").strip() if column else "" for key, column in columns.items()}
+        email = values["email"].lower()
+        yield AccountRow(
+            line=reader.line_num,
+            email=email,
+            username=values["username"] or generate_username(),
+            password=values["password"],
+            first_name=values["first_name"][:150],
+            last_name=values["last_name"][:150],
+        )
+
+
+def generate_username():
+    return f"{GENERATED_USERNAME_PREFIX}{secrets.token_hex(6)}"
+
+
+def _row_problem(row):
+    try:
+        validate_email(row.email)
+    except ValidationError:
+        return "e-mail inválido"
+    if not row.password:
+        return "senha vazia"
+    try:
+        User._meta.get_field("username").run_validators(row.username)
+    except ValidationError:
+        return "usuário inválido"
+    return None
+
+
+def _init_hasher():
+    # Com spawn (macOS/Windows) o filho começa sem o Django configurado; com fork é um no-op.
+    django.setup()
+
+
+def hash_passwords(passwords, executor=None, workers=1):
+    """PBKDF2 é CPU puro: com um pool, cada núcleo calcula uma fatia do lote."""
+    if executor is None:
+        return [make_password(password) for password in passwords]
+    chunksize = max(1, len(passwords) // (workers * 4))
+    return list(executor.map(make_password, passwords, chunksize=chunksize))
+
+
+def _existing(rows):
+    """Uma consulta por lote: e-mails (sem diferenciar maiúsculas) e logins que já existem no banco."""
+    emails = {row.email for row in rows}
+    usernames = {row.username for row in rows}
+    matches = (
+        User.objects.annotate(email_lower=Lower("email"))
+        .filter(Q(email_lower__in=emails) | Q(username__in=usernames))
+        .values_list("email_lower", "username")
+    )
+    taken_emails, taken_usernames = set(), set()
+    for email, username in matches:
+        taken_emails.add(email)
+        taken_usernames.add(username)
+    return taken_emails, taken_usernames
+
+
+def _create_accounts(rows, hashes):
+    now = timezone.now()
+    users = [
+        User(
+            username=row.username,
+            email=row.email,
+            password=password,
+            first_name=row.first_name,
+            last_name=row.last_name,
+            date_joined=now,
+        )
+        for row, password in zip(rows, hashes)
+    ]
+    with transaction.atomic():
+        User.objects.bulk_create(users)
+        if any(user.pk is None for user in users):
+            # Bancos sem RETURNING no INSERT em lote: busca os ids pelo login.
+            ids = dict(User.objects.filter(username__in=[user.username for user in users]).values_list("username", "pk"))
+            for user in users:
+                user.pk = ids[user.username]
+        EmailVerification.objects.bulk_create(
+            EmailVerification(user=user, code=generate_verification_code(), expires_at=now, verified_at=now)
+            for user in users
+        )
+
+
+def import_accounts(rows, *, batch_size=IMPORT_BATCH_SIZE, workers=1, dry_run=False):
+    """Cria contas já verificadas em lotes; duplicadas (no banco ou na própria planilha) vão para o relatório."""
+    report = AccountImportReport()
+    seen_emails, seen_usernames = set(), set()
+    rows = iter(rows)
+    executor = ProcessPoolExecutor(workers, initializer=_init_hasher) if workers > 1 and not dry_run else None
+    try:
+        while batch := list(islice(rows, batch_size)):
+            valid = []
+            for row in batch:
+                problem = _row_problem(row)
+                if problem:
+                    report.invalid.append((row, problem))
+                else:
+                    valid.append(row)
+            taken_emails, taken_usernames = _existing(valid) if valid else (set(), set())
+            accepted = []
+            for row in valid:
+                if row.email in taken_emails:
+                    report.duplicates.append((row, "e-mail já cadastrado"))
+                elif row.email in seen_emails:
+                    report.duplicates.append((row, "e-mail repetido na planilha"))
+                elif row.username in taken_usernames or row.username in seen_usernames:
+                    report.duplicates.append((row, "usuário já em uso"))
+                else:
+                    accepted.append(row)
+                    seen_emails.add(row.email)
+                    seen_usernames.add(row.username)
+            if accepted and not dry_run:
+                _create_accounts(accepted, hash_passwords([row.password for row in accepted], executor, workers))
+            report.created += len(accepted)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return report
@@ -1,7 +1,127 @@
-from django.contrib import admin
-from django.utils.html import format_html
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.contrib.auth import get_user_model
+from django.db import models
+from django.db.models import Exists, OuterRef, Q
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Lower
+from django.urls import reverse
+from django.utils.html import format_html, format_html_join
 
-from .models import DonationPledge, EmailVerification, FAQCategory, FAQEntry, Feedback, Game
+from .exports import streaming_export_response
+from .forms import BoundedImageField
+from .models import (
+    DonationPledge,
+    EmailVerification,
+    FAQCategory,
+    FAQEntry,
+    Feedback,
+    FeedbackStatus,
+    FeedbackTopic,
+    Game,
+    SupporterTotal,
+)
+from .pagination import EstimatedCountPaginator
+from .similarity import similar_feedback, unpack_signature
+from .triage import bulk_triage
+
+# Prefixo como intervalo (col >= termo AND col < termo + U+10FFFF): usa o índice B-tree em qualquer banco.
+PREFIX_UPPER_BOUND = "\U0010ffff"
+
+
+def full_text_query(term):
+    """Cada palavra vira um prefixo entre aspas no MATCH do FTS5: a sintaxe do FTS (AND, NEAR, *) não vaza da busca."""
+    return " ".join('"{}"*'.format(word.replace('"', '""')) for word in term.split())
+
+
+@admin.action(description="Exportar selecionados (CSV)")
+def export_csv(modeladmin, request, queryset):
+    return streaming_export_response(queryset, "csv", request)
+
+
+@admin.action(description="Exportar selecionados (JSONL)")
+def export_jsonl(modeladmin, request, queryset):
+    return streaming_export_response(queryset, "jsonl", request)
+
+
+class FeedbackTriageActionForm(ActionForm):
+    status = forms.ChoiceField(label="Status", choices=[("", "---------"), *FeedbackStatus.choices], required=False)
+    topic = forms.ChoiceField(label="Tema", choices=[("", "---------"), *FeedbackTopic.choices], required=False)
+
+
+def _triage(modeladmin, request, queryset, **changes):
+    updated = bulk_triage(queryset, **changes)
+    modeladmin.message_user(request, f"{updated} feedback(s) atualizado(s).", messages.SUCCESS)
+
+
+@admin.action(description="Aplicar o status escolhido")
+def apply_status(modeladmin, request, queryset):
+    status = request.POST.get("status")
+    if status not in FeedbackStatus.values:
+        modeladmin.message_user(request, "Escolha um status para aplicar.", messages.WARNING)
+        return
+    _triage(modeladmin, request, queryset, status=status)
+
+
+@admin.action(description="Reatribuir ao tema escolhido")
+def apply_topic(modeladmin, request, queryset):
+    topic = request.POST.get("topic")
+    if topic not in FeedbackTopic.values:
+        modeladmin.message_user(request, "Escolha um tema para aplicar.", messages.WARNING)
+        return
+    _triage(modeladmin, request, queryset, topic=topic)
+
+
+@admin.action(description="Tornar públicos")
+def make_public(modeladmin, request, queryset):
+    _triage(modeladmin, request, queryset, is_public=True)
+
+
+@admin.action(description="Tornar privados")
+def make_private(modeladmin, request, queryset):
+    _triage(modeladmin, request, queryset, is_public=False)
+
+
+class LargeTableAdminMixin:
+    """Changelist para tabelas grandes: usuário no JOIN, contagem estimada, filtro por data e busca indexada."""
+
+    list_select_related = ("user",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    exact_search_fields = ()
+    prefix_search_fields = ()
+    # Tabela FTS5 (rowid = pk) consultada com as palavras da busca; ver migração 0012.
+    full_text_table = None
+
+    def get_list_filter(self, request):
+        # Intervalos fixos em created_at (hoje, 7 dias, mês, ano) usam o índice; date_hierarchy faria um
+        # SELECT DISTINCT de datas truncadas sobre a tabela inteira a cada carregamento.
+        return (*super().get_list_filter(request), ("created_at", admin.DateFieldListFilter))
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        # auth_user é bem menor que estas tabelas: resolve o usuário antes e filtra pela FK indexada.
+        # LOWER(email) tem índice próprio (migração 0011); email__iexact viraria LIKE/UPPER sem índice.
+        users = (
+            get_user_model()
+            .objects.annotate(email_lower=Lower("email"))
+            .filter(Q(username=term) | Q(email_lower=term.lower()))
+            .values("pk")
+        )
+        condition = Q(user_id__in=users)
+        for field in self.exact_search_fields:
+            condition |= Q(**{field: term})
+        for field in self.prefix_search_fields:
+            condition |= Q(**{f"{field}__gte": term, f"{field}__lt": term + PREFIX_UPPER_BOUND})
+        if self.full_text_table:
+            matches = RawSQL(
+                f"SELECT rowid FROM {self.full_text_table} WHERE {self.full_text_table} MATCH %s", (full_text_query(term),)
+            )
+            condition |= Q(pk__in=matches)
+        return queryset.filter(condition), False
 
 
 @admin.register(Game)
@@ -12,6 +132,7 @@ class GameAdmin(admin.ModelAdmin):
     ordering = ("-is_featured", "-release_date", "title")
     prepopulated_fields = {"slug": ("title",)}
     readonly_fields = ("created_at", "updated_at", "preview_cover")
+    formfield_overrides = {models.ImageField: {"form_class": BoundedImageField}}
     fieldsets = (
         (None, {"fields": ("title", "slug", "tagline", "status", "is_featured")}),
         ("Conteúdo", {"fields": ("genre", "platforms", "short_description", "long_description", "trailer_url")}),
@@ -65,33 +186,107 @@ class FAQCategoryAdmin(admin.ModelAdmin):
 class FAQEntryAdmin(admin.ModelAdmin):
     list_display = ("question", "category", "audience", "order", "is_featured", "is_active")
     list_filter = ("category", "audience", "is_featured", "is_active")
+    list_select_related = ("category",)
     search_fields = ("question", "answer")
     ordering = ("category", "order")
 
 
+class SimilarityClusterFilter(admin.SimpleListFilter):
+    title = "quase-duplicatas"
+    parameter_name = "cluster"
+
+    def lookups(self, request, model_admin):
+        options = [("duplicates", "Marcados como semelhantes"), ("roots", "Originais com semelhantes")]
+        cluster = request.GET.get(self.parameter_name, "")
+        if cluster.isdigit():
+            options.append((cluster, f"Cluster do #{cluster}"))
+        return options
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if value == "duplicates":
+            return queryset.filter(duplicate_of__isnull=False)
+        if value == "roots":
+            return queryset.filter(Exists(Feedback.objects.filter(duplicate_of=OuterRef("pk"))))
+        if value and value.isdigit():
+            return queryset.filter(Q(pk=value) | Q(duplicate_of_id=value))
+        return queryset
+
+
 @admin.register(Feedback)
-class FeedbackAdmin(admin.ModelAdmin):
-    list_display = ("title", "user", "topic", "impact_rating", "status", "is_public", "created_at")
-    list_filter = ("status", "topic", "is_public", "created_at")
-    search_fields = ("title", "message", "user__username", "user__email")
+class FeedbackAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ("title", "user", "topic", "impact_rating", "status", "is_public", "similarity_cluster", "created_at")
+    list_filter = ("status", "topic", "is_public", SimilarityClusterFilter)
+    list_select_related = ("user", "duplicate_of")
+    search_fields = ("user__username", "user__email", "title", "message")
+    search_help_text = "Usuário ou e-mail exatos, o início do título ou palavras da mensagem."
+    prefix_search_fields = ("title",)
+    full_text_table = "games_feedback_fts"
     ordering = ("-created_at",)
     autocomplete_fields = ("user",)
-    readonly_fields = ("created_at", "updated_at")
+    action_form = FeedbackTriageActionForm
+    actions = (apply_status, apply_topic, make_public, make_private, export_csv, export_jsonl)
+    readonly_fields = ("created_at", "updated_at", "duplicate_of", "similar_items")
+
+    @admin.display(description="Semelhante a", ordering="duplicate_of")
+    def similarity_cluster(self, obj):
+        if not obj.duplicate_of_id:
+            return "—"
+        url = reverse("admin:games_feedback_changelist")
+        return format_html('<a href="{}?cluster={}">#{} {}</a>', url, obj.duplicate_of_id, obj.duplicate_of_id, obj.duplicate_of.title)
+
+    @admin.display(description="Feedbacks parecidos")
+    def similar_items(self, obj):
+        if not obj.minhash:
+            return "Assinatura ainda não calculada."
+        matches = similar_feedback(unpack_signature(obj.minhash), exclude_id=obj.pk, limit=10)
+        if not matches:
+            return "Nenhum feedback parecido."
+        titles = dict(Feedback.objects.filter(id__in=[feedback_id for _, feedback_id in matches]).values_list("id", "title"))
+        return format_html(
+            "<ul>{}</ul>",
+            format_html_join(
+                "",
+                '<li><a href="{}">#{} {}</a> ({}%)</li>',
+                (
+                    (reverse("admin:games_feedback_change", args=[feedback_id]), feedback_id, titles.get(feedback_id, ""), round(score * 100))
+                    for score, feedback_id in matches
+                ),
+            ),
+        )
 
 
 @admin.register(DonationPledge)
-class DonationPledgeAdmin(admin.ModelAdmin):
+class DonationPledgeAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("user", "amount", "currency", "pix_status", "is_recurring", "created_at")
-    list_filter = ("pix_status", "is_recurring", "visibility", "currency", "created_at")
-    search_fields = ("user__username", "user__email", "message", "pix_txid", "pix_transaction_code")
+    list_filter = ("pix_status", "is_recurring", "visibility", "currency")
+    search_fields = ("user__username", "user__email", "pix_txid", "pix_transaction_code")
+    search_help_text = "Usuário, e-mail, txid ou código da transação Pix (valores exatos)."
+    exact_search_fields = ("pix_txid", "pix_transaction_code")
     ordering = ("-created_at",)
     autocomplete_fields = ("user",)
     readonly_fields = ("pix_txid", "pix_last_checked_at")
+    actions = (export_csv, export_jsonl)
 
 
 @admin.register(EmailVerification)
-class EmailVerificationAdmin(admin.ModelAdmin):
+class EmailVerificationAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("user", "code", "created_at", "expires_at", "verified_at", "attempts")
-    list_filter = ("created_at", "verified_at")
+    list_filter = ("verified_at",)
     search_fields = ("user__username", "user__email", "code")
-    ordering = ("-created_at",)
\ No newline at end of file
+    search_help_text = "Usuário, e-mail ou código exatos."
+    exact_search_fields = ("code",)
+    ordering = ("-created_at",)
+
+
+@admin.register(SupporterTotal)
+class SupporterTotalAdmin(admin.ModelAdmin):
+    list_display = ("user", "currency", "total_amount", "pledge_count", "last_confirmed_at")
+    list_filter = ("currency",)
+    list_select_related = ("user",)
+    ordering = ("currency", "-total_amount")
+    readonly_fields = ("user", "currency", "total_amount", "pledge_count", "last_confirmed_at")
+
+    def has_add_permission(self, request):
+        # Totais são mantidos pelas confirmações de Pix; editar à mão desalinharia o mural.
+        return False
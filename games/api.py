@@ -0,0 +1,172 @@
+import hashlib
+import json
+
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag, urlencode
+from django.views.decorators.http import require_safe
+
+from .models import FAQEntry, Game, GameStatus
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def _media_url(upload, fallback_url):
+    return default_storage.url(upload) if upload else fallback_url
+
+
+# Campo público -> colunas lidas com values_list() (+ função que monta o valor a partir delas).
+GAME_FIELDS = {
+    "id": ("id",),
+    "slug": ("slug",),
+    "title": ("title",),
+    "tagline": ("tagline",),
+    "short_description": ("short_description",),
+    "long_description": ("long_description",),
+    "genre": ("genre",),
+    "platforms": ("platforms",),
+    "status": ("status",),
+    "release_date": ("release_date",),
+    "trailer_url": ("trailer_url",),
+    "is_featured": ("is_featured",),
+    "cover_url": ("cover_image_upload", "cover_image", _media_url),
+    "hero_url": ("hero_image_upload", "cover_image", _media_url),
+    "updated_at": ("updated_at",),
+}
+GAME_DEFAULT_FIELDS = ("id", "slug", "title", "tagline", "status", "genre", "platforms", "release_date", "cover_url", "updated_at")
+
+FAQ_FIELDS = {
+    "id": ("id",),
+    "question": ("question",),
+    "answer": ("answer",),
+    "audience": ("audience",),
+    "category": ("category__slug",),
+    "category_title": ("category__title",),
+    "order": ("order",),
+    "updated_at": ("updated_at",),
+}
+FAQ_DEFAULT_FIELDS = ("id", "category", "question", "answer", "audience", "updated_at")
+
+
+class CatalogQueryError(ValueError):
+    pass
+
+
+def _bad_request(message):
+    return JsonResponse({"error": message}, status=400)
+
+
+def _selected_fields(request, available, default):
+    raw = request.GET.get("fields")
+    if not raw:
+        return list(default)
+    fields = [field.strip() for field in raw.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in available]
+    if unknown:
+        raise CatalogQueryError(f"Campos desconhecidos: {', '.join(unknown)}.")
+    return fields
+
+
+def _page_window(request):
+    try:
+        limit = int(request.GET.get("limit", DEFAULT_PAGE_SIZE))
+        after = int(request.GET.get("after", 0))
+    except ValueError:
+        raise CatalogQueryError("limit e after devem ser inteiros.")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise CatalogQueryError(f"limit deve estar entre 1 e {MAX_PAGE_SIZE}.")
+    return limit, max(after, 0)
+
+
+def _row_builder(fields, available):
+    """Colunas do values_list() e a função que converte cada tupla no dicionário público."""
+    columns = []
+    plan = []
+    for field in fields:
+        spec = available[field]
+        names = [name for name in spec if isinstance(name, str)]
+        transform = spec[-1] if callable(spec[-1]) else None
+        positions = []
+        for name in names:
+            if name not in columns:
+                columns.append(name)
+            positions.append(columns.index(name))
+        plan.append((field, positions, transform))
+
+    def build(row):
+        return {
+            field: transform(*(row[i] for i in positions)) if transform else row[positions[0]]
+            for field, positions, transform in plan
+        }
+
+    return columns, build
+
+
+def _catalog_response(request, queryset, available, default_fields, related=()):
+    """``related``: relações cujos campos entram no payload; MAX(updated_at) e COUNT delas também vão para o ETag."""
+    try:
+        fields = _selected_fields(request, available, default_fields)
+        limit, after = _page_window(request)
+    except CatalogQueryError as exc:
+        return _bad_request(str(exc))
+
+    remaining = queryset.filter(id__gt=after).order_by("id")
+    aggregates = {"last_change": Max("updated_at"), "total": Count("id")}
+    for relation in related:
+        aggregates[f"{relation}_last_change"] = Max(f"{relation}__updated_at")
+        aggregates[f"{relation}_total"] = Count(relation, distinct=True)
+    state = remaining.aggregate(**aggregates)
+    canonical_query = urlencode(sorted(request.GET.items()))
+    fingerprint = "|".join(str(state[key]) for key in aggregates) + f"|{canonical_query}"
+    etag = quote_etag(hashlib.md5(fingerprint.encode("utf-8"), usedforsecurity=False).hexdigest())
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        columns, build = _row_builder(fields, available)
+        rows = list(remaining.values_list("id", *columns)[: limit + 1])
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        results = [build(row[1:]) for row in rows]
+        next_url = None
+        if has_more:
+            params = request.GET.copy()
+            params["after"] = rows[-1][0]
+            next_url = f"{request.path}?{params.urlencode()}"
+        body = json.dumps({"results": results, "next": next_url}, cls=DjangoJSONEncoder, separators=(",", ":"))
+        response = HttpResponse(body, content_type="application/json")
+    response["ETag"] = etag
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+@require_safe
+def game_catalog(request):
+    """Catálogo de jogos: ?fields=, ?status=, ?genre=, ?platforms=, paginação por ?after=<id>&limit=."""
+    games = Game.objects.all()
+    statuses = [value for value in request.GET.get("status", "").split(",") if value]
+    if statuses:
+        if set(statuses) - set(GameStatus.values):
+            return _bad_request("Status desconhecido.")
+        games = games.filter(status__in=statuses)
+    if genre := request.GET.get("genre"):
+        games = games.filter(genre__iexact=genre)
+    if platform := request.GET.get("platforms"):
+        games = games.filter(platforms__icontains=platform)
+    return _catalog_response(request, games, GAME_FIELDS, GAME_DEFAULT_FIELDS)
+
+
+@require_safe
+def faq_catalog(request):
+    """FAQs ativas de categorias ativas; perguntas da equipe interna ficam de fora."""
+    entries = FAQEntry.objects.filter(is_active=True, category__is_active=True).exclude(
+        audience=FAQEntry.Audience.TEAM
+    )
+    if category := request.GET.get("category"):
+        entries = entries.filter(category__slug=category)
+    if audience := request.GET.get("audience"):
+        entries = entries.filter(audience=audience)
+    return _catalog_response(request, entries, FAQ_FIELDS, FAQ_DEFAULT_FIELDS, related=("category",))
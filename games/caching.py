@@ -0,0 +1,237 @@
+import math
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache as shared_cache
+
+from SelvaCoreWeb.timing import timed
+
+# Nível 1: LRU em memória do processo. Nível 2: settings.CACHES["default"], compartilhado entre workers.
+LOCAL_MAX_ENTRIES = 1024
+# Cada processo relê as versões dos namespaces nesse intervalo: é a defasagem máxima entre workers.
+VERSION_CHECK_SECONDS = 2.0
+# Recálculo antecipado probabilístico (XFetch): beta > 1 antecipa mais; 1 é o valor do artigo.
+EARLY_RECOMPUTE_BETA = 1.0
+FLIGHT_LOCKS = 64
+
+_MISSING = object()
+
+
+class LocalLRU:
+    """LRU com validade por entrada; o lock protege workers com várias threads."""
+
+    def __init__(self, max_entries=LOCAL_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            value, expires = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_local = LocalLRU()
+
+
+@dataclass
+class NamespaceStats:
+    local_hits: int = 0
+    shared_hits: int = 0
+    misses: int = 0
+    early_recomputes: int = 0
+    lookup_seconds: float = 0.0
+    compute_seconds: float = 0.0
+
+    @property
+    def hit_ratio(self):
+        lookups = self.local_hits + self.shared_hits + self.misses
+        return (self.local_hits + self.shared_hits) / lookups if lookups else 0.0
+
+
+def _should_recompute(envelope):
+    # Quanto mais caro o cálculo (delta) e mais perto do vencimento, maior a chance de recalcular antes.
+    _, expires, delta = envelope
+    return time.time() - delta * EARLY_RECOMPUTE_BETA * math.log(1.0 - random.random()) >= expires
+
+
+class TieredCache:
+    """Namespace versionado: bump() invalida todas as chaves do grupo sem apagá-las uma a uma."""
+
+    def __init__(self, name, ttl, local_ttl):
+        self.name = name
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self.stats = NamespaceStats()
+        self._stats_lock = threading.Lock()
+        self._version = None
+        self._version_checked = 0.0
+        self._flights = [threading.Lock() for _ in range(FLIGHT_LOCKS)]
+
+    @property
+    def version_key(self):
+        return f"ns:{self.name}:version"
+
+    def version(self):
+        now = time.monotonic()
+        if self._version is None or now - self._version_checked >= VERSION_CHECK_SECONDS:
+            version = shared_cache.get(self.version_key)
+            if version is None:
+                # Versão nova (e não um contador) para nunca reaproveitar chaves de antes de um clear.
+                shared_cache.add(self.version_key, time.time_ns(), None)
+                version = shared_cache.get(self.version_key)
+            self._version, self._version_checked = version, now
+        return self._version
+
+    def bump(self):
+        version = time.time_ns()
+        shared_cache.set(self.version_key, version, None)
+        self._version, self._version_checked = version, time.monotonic()
+
+    def _key(self, key, version):
+        return f"{self.name}:{version}:{key}"
+
+    def _remember(self, full_key, envelope):
+        _local.set(full_key, envelope, max(0.0, min(self.local_ttl, envelope[1] - time.time())))
+
+    @timed("cache")
+    def _lookup(self, keys, count=True):
+        """Envelopes (valor, vencimento, custo) achados: memória local primeiro, o resto num único get_many."""
+        started = time.perf_counter()
+        version = self.version()
+        full_keys = {key: self._key(key, version) for key in keys}
+        found, remote = {}, []
+        for key, full_key in full_keys.items():
+            envelope = _local.get(full_key)
+            if envelope is _MISSING:
+                remote.append(key)
+            else:
+                found[key] = envelope
+        local_hits = len(found)
+        if remote:
+            fetched = shared_cache.get_many([full_keys[key] for key in remote])
+            for key in remote:
+                envelope = fetched.get(full_keys[key])
+                if envelope is not None:
+                    found[key] = envelope
+                    self._remember(full_keys[key], envelope)
+        if count:
+            with self._stats_lock:
+                self.stats.local_hits += local_hits
+                self.stats.shared_hits += len(found) - local_hits
+                self.stats.misses += len(full_keys) - len(found)
+                self.stats.lookup_seconds += time.perf_counter() - started
+        return found
+
+    def get(self, key, default=None):
+        envelope = self._lookup([key]).get(key)
+        return default if envelope is None else envelope[0]
+
+    def get_many(self, keys):
+        return {key: envelope[0] for key, envelope in self._lookup(keys).items()}
+
+    @timed("cache")
+    def set_many(self, mapping, ttl=None, cost=0.0):
+        ttl = ttl or self.ttl
+        expires = time.time() + ttl
+        version = self.version()
+        envelopes = {self._key(key, version): (value, expires, cost) for key, value in mapping.items()}
+        shared_cache.set_many(envelopes, ttl)
+        for full_key, envelope in envelopes.items():
+            self._remember(full_key, envelope)
+
+    def set(self, key, value, ttl=None, cost=0.0):
+        self.set_many({key: value}, ttl, cost)
+
+    def get_or_set(self, key, compute, ttl=None):
+        """Valor em cache ou compute(); uma thread por chave recalcula e as demais esperam o resultado."""
+        envelope = self._lookup([key]).get(key)
+        if envelope is not None and not _should_recompute(envelope):
+            return envelope[0]
+        with self._flights[hash(key) % FLIGHT_LOCKS]:
+            fresh = self._lookup([key], count=False).get(key)
+            if fresh is not None and (envelope is None or fresh[1] > envelope[1]):
+                return fresh[0]
+            started = time.perf_counter()
+            value = compute()
+            cost = time.perf_counter() - started
+            with self._stats_lock:
+                self.stats.compute_seconds += cost
+                self.stats.early_recomputes += envelope is not None
+            self.set(key, value, ttl, cost)
+            return value
+
+    async def aget_or_set(self, key, compute, ttl=None):
+        # compute é síncrono (ORM/render): roda junto com a consulta ao cache na thread do Django.
+        return await sync_to_async(self.get_or_set)(key, compute, ttl)
+
+    async def aget_many(self, keys):
+        return await sync_to_async(self.get_many)(keys)
+
+    async def aset_many(self, mapping, ttl=None):
+        await sync_to_async(self.set_many)(mapping, ttl)
+
+
+catalog = TieredCache("catalog", ttl=60 * 60 * 24, local_ttl=30)
+faq = TieredCache("faq", ttl=60 * 60 * 24, local_ttl=30)
+metrics = TieredCache("metrics", ttl=60 * 5, local_ttl=5)
+# Mural de apoiadores: só muda quando uma contribuição pública entra ou sai (apply_wall_changes).
+wall = TieredCache("wall", ttl=60 * 60 * 24, local_ttl=30)
+qr = TieredCache("qr", ttl=60 * 60 * 24 * 7, local_ttl=60 * 10)
+# HTML de fragmentos com a versão na própria chave (ex.: updated_at do jogo): não precisa de bump.
+fragments = TieredCache("fragments", ttl=60 * 60 * 24 * 7, local_ttl=60 * 10)
+NAMESPACES = {namespace.name: namespace for namespace in (catalog, faq, metrics, wall, qr, fragments)}
+
+
+def stats():
+    """Contadores deste processo por namespace (cada worker tem os seus)."""
+    return {
+        name: {**asdict(namespace.stats), "hit_ratio": namespace.stats.hit_ratio}
+        for name, namespace in NAMESPACES.items()
+    }
+
+
+def reset_stats():
+    """Zera os contadores deste processo (e recria os locks, que podem vir travados de outra thread do pai)."""
+    for namespace in NAMESPACES.values():
+        namespace.stats = NamespaceStats()
+        namespace._stats_lock = threading.Lock()
+
+
+# Workers do prefork herdam as entradas aquecidas pelo master, mas não os contadores: senão cada worker
+# (e cada reciclagem arquivada) voltaria a somar os acessos do aquecimento em /metrics.
+os.register_at_fork(after_in_child=reset_stats)
+
+
+def clear():
+    """Esvazia os dois níveis e esquece as versões lidas (usado pelos testes)."""
+    _local.clear()
+    shared_cache.clear()
+    for namespace in NAMESPACES.values():
+        namespace._version = None
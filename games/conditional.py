@@ -0,0 +1,104 @@
+import hashlib
+from datetime import datetime, timezone as dt_timezone
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.db.models import Count, Max, Value
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from . import caching
+from .models import FAQCategory, FAQEntry, Feedback, Game
+
+
+def home_sources():
+    return {
+        "games": Game.objects.all(),
+        "faq_categories": FAQCategory.objects.all(),
+        "faq_entries": FAQEntry.objects.all(),
+        "public_feedback": Feedback.objects.filter(is_public=True),
+    }
+
+
+def portal_sources():
+    # O portal lê FAQ e métricas (todos os feedbacks e doações) dos namespaces do cache em camadas:
+    # a versão de cada um muda no commit de qualquer alteração, sem varrer as tabelas a cada requisição.
+    return {"faq": caching.faq, "metrics": caching.metrics}
+
+
+def _changes(label, queryset):
+    # Value() fica fora do GROUP BY: uma linha com MAX/COUNT mesmo para tabela vazia.
+    return (
+        queryset.order_by()
+        .annotate(source=Value(label))
+        .values("source")
+        .annotate(last_change=Max("updated_at"), total=Count("pk"))
+        .values_list("source", "last_change", "total")
+    )
+
+
+def _namespace_versions(namespaces):
+    # A versão é o time_ns do último bump: serve também de Last-Modified.
+    return [
+        (label, datetime.fromtimestamp(namespace.version() / 1e9, tz=dt_timezone.utc), None)
+        for label, namespace in namespaces.items()
+    ]
+
+
+async def page_validators(request, sources):
+    """ETag e Last-Modified da página: versões de namespaces do cache e/ou um único SELECT ... UNION ALL."""
+    namespaces = {label: source for label, source in sources.items() if isinstance(source, caching.TieredCache)}
+    querysets = [_changes(label, source) for label, source in sources.items() if label not in namespaces]
+    rows = await sync_to_async(_namespace_versions)(namespaces) if namespaces else []
+    if querysets:
+        first, *rest = querysets
+        rows += [row async for row in first.union(*rest, all=True)]
+    rows.sort(key=repr)
+    last_modified = max((changed for _, changed, _ in rows if changed), default=None)
+    fingerprint = "|".join(
+        [
+            repr(rows),
+            request.get_full_path(),
+            timezone.localdate().isoformat(),
+            getattr(settings, "RELEASE_ID", ""),
+            staticfiles_storage.url("css/main.css"),
+            staticfiles_storage.url("js/main.js"),
+        ]
+    )
+    etag = quote_etag(hashlib.md5(fingerprint.encode("utf-8"), usedforsecurity=False).hexdigest())
+    return etag, last_modified
+
+
+def _is_anonymous_without_state(request):
+    # Sem cookie de sessão o visitante é anônimo sem consultar o banco; mensagens pendentes exigem render.
+    return settings.SESSION_COOKIE_NAME not in request.COOKIES and CookieStorage.cookie_name not in request.COOKIES
+
+
+def conditional_page(sources):
+    """Responde 304 para visitantes anônimos cujo If-None-Match/If-Modified-Since ainda vale."""
+
+    def decorator(view):
+        @wraps(view)
+        async def inner(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD") or not _is_anonymous_without_state(request):
+                return await view(request, *args, **kwargs)
+            etag, last_modified = await page_validators(request, sources())
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                response.headers.setdefault("ETag", etag)
+                if timestamp and not response.has_header("Last-Modified"):
+                    response.headers["Last-Modified"] = http_date(timestamp)
+                patch_cache_control(response, no_cache=True)
+            patch_vary_headers(response, ("Cookie",))
+            return response
+
+        return inner
+
+    return decorator
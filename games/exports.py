@@ -0,0 +1,100 @@
+import csv
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import DonationPledge, Feedback
+
+EXPORT_CHUNK_SIZE = 2000
+# Linhas por ida à thread do ORM quando o export é servido via ASGI.
+ASYNC_LINES_PER_PULL = 500
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson; charset=utf-8",
+}
+
+# Colunas lidas com values_list(): o e-mail vem do JOIN com o usuário, sem instanciar modelos.
+EXPORT_COLUMNS = {
+    Feedback: (
+        "id",
+        "user__username",
+        "user__email",
+        "title",
+        "topic",
+        "impact_rating",
+        "status",
+        "is_public",
+        "message",
+        "created_at",
+        "updated_at",
+    ),
+    DonationPledge: (
+        "id",
+        "user__username",
+        "user__email",
+        "amount",
+        "currency",
+        "is_recurring",
+        "visibility",
+        "pix_txid",
+        "pix_status",
+        "pix_transaction_code",
+        "pix_confirmed_at",
+        "message",
+        "created_at",
+        "updated_at",
+    ),
+}
+
+
+class _Echo:
+    """Buffer de uma linha para o csv.writer: write() devolve o texto em vez de acumulá-lo."""
+
+    def write(self, value):
+        return value
+
+
+def _header(columns):
+    return [column.replace("__", "_") for column in columns]
+
+
+def iter_export(queryset, fmt, chunk_size=EXPORT_CHUNK_SIZE):
+    """Gera as linhas do export em ``fmt`` lendo o banco em lotes de ``chunk_size``."""
+    columns = EXPORT_COLUMNS[queryset.model]
+    rows = queryset.order_by("pk").values_list(*columns).iterator(chunk_size=chunk_size)
+    header = _header(columns)
+    if fmt == "csv":
+        writer = csv.writer(_Echo())
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+    else:
+        encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(",", ":"))
+        for row in rows:
+            yield encoder.encode(dict(zip(header, row))) + "\n"
+
+
+async def aiter_export(queryset, fmt, chunk_size=EXPORT_CHUNK_SIZE):
+    """iter_export para ASGI: com um iterador síncrono o Django juntaria o export inteiro em memória antes de enviar."""
+    lines = iter_export(queryset, fmt, chunk_size)
+    # thread_sensitive: o cursor do iterator() continua sempre na mesma thread e conexão.
+    pull = sync_to_async(lambda: list(islice(lines, ASYNC_LINES_PER_PULL)))
+    while batch := await pull():
+        yield "".join(batch)
+
+
+def export_filename(model, fmt):
+    return f"{model._meta.model_name}-{timezone.localdate():%Y%m%d}.{fmt}"
+
+
+def streaming_export_response(queryset, fmt, request=None):
+    # Requisições ASGI têm ``scope``; sob WSGI o gerador síncrono é consumido direto pelo servidor.
+    content = aiter_export(queryset, fmt) if hasattr(request, "scope") else iter_export(queryset, fmt)
+    response = StreamingHttpResponse(content, content_type=EXPORT_FORMATS[fmt])
+    response["Content-Disposition"] = f'attachment; filename="{export_filename(queryset.model, fmt)}"'
+    return response
@@ -1,9 +1,11 @@
 from decimal import Decimal
 
 from django import forms
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import AuthenticationForm, UserCreationForm
 
+from .imaging import downscale_upload, open_upload
 from .models import DonationPledge, EmailVerification, Feedback
 
 User = get_user_model()
@@ -178,3 +180,29 @@ class ResendVerificationForm(forms.Form):
         if not User.objects.filter(email__iexact=email).exists():
             raise forms.ValidationError("Nenhuma conta encontrada com este e-mail.")
         return email
+
+
+class BoundedImageField(forms.ImageField):
+    """ImageField sem decodificação completa: tamanho do arquivo, formato e pixels são checados pelo cabeçalho."""
+
+    def to_python(self, data):
+        upload = forms.FileField.to_python(self, data)
+        if upload is None:
+            return None
+        if getattr(upload, "truncated", False) or upload.size > settings.MAX_UPLOAD_SIZE:
+            raise forms.ValidationError(
+                f"O arquivo passa do limite de {settings.MAX_UPLOAD_SIZE // (1024 * 1024)} MB.", code="file_too_large"
+            )
+        try:
+            image = open_upload(upload)
+            resized = downscale_upload(image, upload.name, settings.IMAGE_MAX_DIMENSION) if settings.IMAGE_MAX_DIMENSION else None
+        except ValueError as exc:
+            raise forms.ValidationError(str(exc), code="invalid_image") from exc
+        except OSError as exc:
+            raise forms.ValidationError(self.error_messages["invalid_image"], code="invalid_image") from exc
+        if resized is not None:
+            image.close()
+            upload = resized
+        upload.content_type = image.get_format_mimetype()
+        upload.seek(0)
+        return upload
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from . import caching
+
+GAME_CARD_TEMPLATE = "games/partials/game_card.html"
+
+
+def game_card_key(game, highlight_status=False):
+    # updated_at muda a cada save do jogo; RELEASE_ID cobre mudanças no template a cada deploy.
+    return f"game-card:{game.id}:{game.updated_at.timestamp():.6f}:{int(highlight_status)}:{getattr(settings, 'RELEASE_ID', '')}"
+
+
+def render_game_cards(sections):
+    """HTML dos cards de cada seção ({nome: (jogos, destaque)}), buscando todos num único get_many.
+
+    Só os jogos alterados desde o último render passam pelo template; os novos fragmentos voltam num set_many.
+    """
+    keys = {
+        name: [game_card_key(game, highlight_status) for game in games]
+        for name, (games, highlight_status) in sections.items()
+    }
+    cached = caching.fragments.get_many([key for section_keys in keys.values() for key in section_keys])
+    rendered = {}
+    cards = {}
+    for name, (games, highlight_status) in sections.items():
+        cards[name] = []
+        for game, key in zip(games, keys[name]):
+            html = cached.get(key) or rendered.get(key)
+            if html is None:
+                html = rendered[key] = render_to_string(
+                    GAME_CARD_TEMPLATE, {"game": game, "highlight_status": highlight_status}
+                )
+            cards[name].append(mark_safe(html))
+    if rendered:
+        caching.fragments.set_many(rendered)
+    return cards
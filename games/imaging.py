@@ -0,0 +1,131 @@
+import io
+import posixpath
+import warnings
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import TemporaryUploadedFile
+
+# Larguras do srcset; nunca ampliamos além do original.
+DERIVATIVE_WIDTHS = (480, 960, 1600)
+DERIVATIVE_FORMAT = "webp"
+
+
+def derivative_name(name: str, width: int) -> str:
+    # Nome completo do original (com extensão): capa.png e capa.jpg na mesma pasta não dividem variantes.
+    directory, filename = posixpath.split(name)
+    return posixpath.join(directory, "derivatives", f"{filename}-{width}w.{DERIVATIVE_FORMAT}")
+
+
+def build_derivatives(field_file) -> list[str]:
+    """Gera as variantes redimensionadas que ainda não existem no storage do campo."""
+    from PIL import Image
+
+    if not field_file:
+        return []
+    storage = field_file.storage
+    with storage.open(field_file.name, "rb") as handle:
+        source = Image.open(handle)
+        # Larguras acima do original nunca são geradas: decidido pelo cabeçalho, antes de decodificar.
+        pending = [
+            width
+            for width in DERIVATIVE_WIDTHS
+            if width <= source.width and not storage.exists(derivative_name(field_file.name, width))
+        ]
+        if not pending:
+            return []
+        # JPEG decodifica já na escala 1/2..1/8 mais próxima da maior variante, sem passar pelo tamanho cheio.
+        widest = max(pending)
+        source.draft("RGB", (widest, round(source.height * widest / source.width)))
+        source.load()
+    created = []
+    for width in pending:
+        height = round(source.height * width / source.width)
+        resized = source.convert("RGBA" if source.mode in ("RGBA", "LA", "P") else "RGB").resize(
+            (width, height), Image.Resampling.LANCZOS
+        )
+        buffer = io.BytesIO()
+        resized.save(buffer, format=DERIVATIVE_FORMAT.upper(), quality=82, method=4)
+        created.append(storage.save(derivative_name(field_file.name, width), ContentFile(buffer.getvalue())))
+    return created
+
+
+def delete_derivatives(storage, name: str) -> None:
+    """Remove as variantes de um original que foi trocado ou excluído."""
+    for width in DERIVATIVE_WIDTHS:
+        storage.delete(derivative_name(name, width))
+
+
+def derivative_srcset(field_file) -> list[tuple[str, int]]:
+    """(url, largura) das variantes já geradas para o arquivo."""
+    if not field_file:
+        return []
+    storage = field_file.storage
+    return [
+        (storage.url(derivative_name(field_file.name, width)), width)
+        for width in DERIVATIVE_WIDTHS
+        if storage.exists(derivative_name(field_file.name, width))
+    ]
+
+
+def _open_image(upload):
+    from PIL import Image, UnidentifiedImageError
+
+    upload.seek(0)
+    try:
+        with warnings.catch_warnings():
+            # O limite que vale é IMAGE_MAX_PIXELS, checado em open_upload; o aviso do Pillow só duplicaria a mensagem.
+            warnings.simplefilter("ignore", Image.DecompressionBombWarning)
+            return Image.open(upload)
+    except Image.DecompressionBombError:
+        raise ValueError("A imagem tem pixels demais para ser processada.")
+    except (UnidentifiedImageError, OSError, SyntaxError):
+        raise ValueError("Envie uma imagem válida.")
+
+
+def open_upload(upload):
+    """Abre a imagem sem decodificar pixels: formato, integridade (``verify``) e dimensões vêm antes de qualquer decodificação."""
+    image = _open_image(upload)
+    if image.format not in settings.IMAGE_UPLOAD_FORMATS:
+        raise ValueError(f"Formato {image.format} não aceito; use {', '.join(settings.IMAGE_UPLOAD_FORMATS)}.")
+    try:
+        # Percorre a estrutura do arquivo (ex.: blocos e CRCs do PNG) e pega arquivos cortados, como o ImageField padrão.
+        image.verify()
+    except Exception:
+        raise ValueError("Envie uma imagem válida.")
+    # Depois de verify() a imagem não serve para mais nada: reabre para as dimensões e o redimensionamento.
+    image = _open_image(upload)
+    width, height = image.size
+    if width * height > settings.IMAGE_MAX_PIXELS:
+        raise ValueError(
+            f"{width}×{height} passa do limite de {settings.IMAGE_MAX_PIXELS / 1_000_000:.0f} megapixels."
+        )
+    return image
+
+
+def downscale_upload(image, name, max_dimension):
+    """Regrava a imagem com o lado maior em ``max_dimension``, num arquivo temporário em disco.
+
+    Devolve ``None`` quando ela já cabe (ou é animada e perderia os quadros).
+    """
+    from PIL import Image, ImageOps
+
+    width, height = image.size
+    if max(width, height) <= max_dimension or getattr(image, "is_animated", False):
+        return None
+    scale = max_dimension / max(width, height)
+    target = (max(1, round(width * scale)), max(1, round(height * scale)))
+    image_format = image.format
+    image.draft("RGB", target)
+    if image.mode == "P":
+        image = image.convert("RGBA")
+    image.thumbnail(target, Image.Resampling.LANCZOS)
+    image = ImageOps.exif_transpose(image)
+    if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    options = {"PNG": {"optimize": True}, "GIF": {}}.get(image_format, {"quality": 88})
+    resized = TemporaryUploadedFile(name, Image.MIME.get(image_format), 0, None)
+    image.save(resized, format=image_format, **options)
+    resized.size = resized.tell()
+    resized.seek(0)
+    return resized
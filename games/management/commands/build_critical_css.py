@@ -0,0 +1,73 @@
+import gzip
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import get_template
+
+from SelvaCoreWeb.assets import extract_critical_css
+
+# Nome do arquivo em templates/critical/ -> template que ele atende ("base" cobre o cabeçalho comum).
+CRITICAL_CSS_TEMPLATES = {
+    "base": None,
+    "home": "games/home.html",
+    "community_portal": "games/community_portal.html",
+    "game_detail": "games/partials/game_detail_body.html",
+    "supporter_wall": "games/supporter_wall.html",
+    "account_login": "account/login.html",
+    "account_signup": "account/signup.html",
+    "account_verify_email": "account/verify_email.html",
+}
+CONTENT_BLOCK = "{% block content %}"
+# Camadas decorativas vazias (aria-hidden): sem CSS não ocupam espaço, então esperam pela folha completa.
+DECORATIVE_LAYERS_RE = re.compile(r'<div class="(?:page-backdrop|canopy-layers)"[^>]*>.*?</div>', re.DOTALL)
+# Bytes em gzip por página: junto com o HTML, o primeiro paint precisa caber na janela TCP inicial (~14 KB).
+CRITICAL_CSS_BUDGET = 5 * 1024
+
+
+def compressed_size(critical: str) -> int:
+    return len(gzip.compress(critical.encode("utf-8"), 9))
+
+
+def above_the_fold(base_source: str, template_source: str | None) -> str:
+    """Cabeçalho/loader do base.html mais o conteúdo do template até o fim da primeira <section>.
+
+    Parciais sem ``{% block content %}`` (ex.: corpo do detalhe de jogo, inserido já renderizado) contam inteiros.
+    """
+    markup = DECORATIVE_LAYERS_RE.sub("", base_source[base_source.index("<body"):base_source.index(CONTENT_BLOCK)])
+    if template_source:
+        content = template_source[template_source.index(CONTENT_BLOCK):] if CONTENT_BLOCK in template_source else template_source
+        end = content.find("</section>")
+        markup += content if end == -1 else content[:end]
+    return markup
+
+
+class Command(BaseCommand):
+    help = "Extrai o CSS crítico de cada template para templates/critical/, inlinado pelo base.html."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", default=str(Path(settings.BASE_DIR) / "templates" / "critical"))
+
+    def handle(self, *args, **options):
+        stylesheet = finders.find("css/main.css")
+        if not stylesheet:
+            raise CommandError("css/main.css não encontrado pelos staticfiles finders.")
+        css = Path(stylesheet).read_text(encoding="utf-8")
+        base_source = get_template("base.html").template.source
+        output = Path(options["output"])
+        output.mkdir(parents=True, exist_ok=True)
+
+        for name, template_name in CRITICAL_CSS_TEMPLATES.items():
+            template_source = get_template(template_name).template.source if template_name else None
+            critical = extract_critical_css(css, above_the_fold(base_source, template_source))
+            size, compressed = len(critical.encode("utf-8")), compressed_size(critical)
+            if compressed > CRITICAL_CSS_BUDGET:
+                raise CommandError(
+                    f"{name}.css tem {compressed} bytes em gzip ({size} sem compressão), "
+                    f"acima do orçamento de {CRITICAL_CSS_BUDGET}."
+                )
+            # Incluído como template: verbatim impede que "{#" ou "{{" do CSS minificado virem sintaxe.
+            (output / f"{name}.css").write_text(f"{{% verbatim %}}{critical}{{% endverbatim %}}\n", encoding="utf-8")
+            self.stdout.write(f"{name}.css: {size} bytes, {compressed} em gzip")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from games.rollups import build_rollups
+
+
+class Command(BaseCommand):
+    help = "Atualiza os consolidados diários de feedback e doações a partir da última marca d'água."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Reconstrói todo o histórico, ignorando a marca d'água.")
+
+    def handle(self, *args, **options):
+        for name, (days, rows) in build_rollups(full=options["full"]).items():
+            self.stdout.write(f"{name}: {days} dia(s) reconsolidado(s), {rows} linha(s) gravada(s)")
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from games.exports import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, iter_export
+from games.models import DonationPledge, Feedback
+
+EXPORT_SOURCES = {"feedback": Feedback, "donations": DonationPledge}
+
+
+class Command(BaseCommand):
+    help = "Exporta feedbacks ou promessas de doação (com e-mail do usuário) em CSV/JSONL, em fluxo e com memória constante."
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", choices=sorted(EXPORT_SOURCES))
+        parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="csv")
+        parser.add_argument("--output", help="Arquivo de destino; sem ele o export vai para a saída padrão.")
+        parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        queryset = EXPORT_SOURCES[options["source"]].objects.all()
+        lines = iter_export(queryset, options["format"], chunk_size=options["chunk_size"])
+        if not options["output"]:
+            for line in lines:
+                self.stdout.write(line, ending="")
+            return
+        with open(options["output"], "w", encoding="utf-8", newline="") as handle:
+            handle.writelines(lines)
+        self.stderr.write(self.style.SUCCESS(f"Export salvo em {options['output']}."))
@@ -0,0 +1,45 @@
+import csv
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from games.accounts import IMPORT_BATCH_SIZE, import_accounts, iter_account_rows
+from SelvaCoreWeb.prefork import default_workers
+
+
+class Command(BaseCommand):
+    help = "Cria em lote contas já verificadas a partir de uma planilha CSV (e-mail, senha e, opcionalmente, usuário e nome)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv", help="Planilha com as colunas email/e-mail e senha/password.")
+        parser.add_argument("--encoding", default="utf-8-sig")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument("--workers", type=int, default=default_workers(), help="Processos para calcular os hashes de senha.")
+        parser.add_argument("--dry-run", action="store_true", help="Só valida e aponta duplicadas, sem criar contas.")
+        parser.add_argument("--report", help="Grava as linhas duplicadas ou inválidas neste CSV.")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1 or options["workers"] < 1:
+            raise CommandError("--batch-size e --workers precisam ser pelo menos 1.")
+        try:
+            with Path(options["csv"]).open(encoding=options["encoding"], newline="") as handle:
+                report = import_accounts(
+                    iter_account_rows(handle),
+                    batch_size=options["batch_size"],
+                    workers=options["workers"],
+                    dry_run=options["dry_run"],
+                )
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        skipped = sorted(report.duplicates + report.invalid, key=lambda item: item[0].line)
+        for row, reason in skipped:
+            self.stdout.write(self.style.WARNING(f"linha {row.line}: {row.email or '(sem e-mail)'} ignorada ({reason})"))
+        if options["report"]:
+            with open(options["report"], "w", encoding="utf-8", newline="") as handle:
+                writer = csv.writer(handle)
+                writer.writerow(["linha", "email", "usuario", "motivo"])
+                for row, reason in skipped:
+                    writer.writerow([row.line, row.email, row.username, reason])
+        prefix = "[simulação] " if options["dry_run"] else ""
+        self.stdout.write(self.style.SUCCESS(prefix + report.summary()))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from games.models import Feedback
+from games.similarity import index_feedback
+
+
+class Command(BaseCommand):
+    help = "Recalcula assinaturas MinHash, baldes LSH e clusters de quase-duplicatas dos feedbacks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--missing", action="store_true", help="Só feedbacks ainda sem assinatura.")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        feedback = Feedback.objects.only("id", "title", "message").order_by("pk")
+        if options["missing"]:
+            feedback = feedback.filter(minhash__isnull=True)
+        indexed = 0
+        last_pk = 0
+        # Ordem de pk: cada item é ligado ao cluster do parecido mais antigo, já indexado antes dele.
+        while batch := list(feedback.filter(pk__gt=last_pk)[: options["batch_size"]]):
+            last_pk = batch[-1].pk
+            for item in batch:
+                index_feedback(item)
+            indexed += len(batch)
+        self.stdout.write(self.style.SUCCESS(f"{indexed} feedback(s) indexado(s)."))
@@ -0,0 +1,43 @@
+import csv
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from games.reconciliation import iter_statement, reconcile_statement
+
+
+class Command(BaseCommand):
+    help = "Concilia um extrato bancário (CSV ou OFX) com as promessas de doação Pix em aberto."
+
+    def add_arguments(self, parser):
+        parser.add_argument("statement", help="Arquivo do extrato exportado pelo banco.")
+        parser.add_argument("--format", choices=("csv", "ofx"), help="Padrão: deduzido da extensão do arquivo.")
+        parser.add_argument("--encoding", default="utf-8-sig")
+        parser.add_argument("--dry-run", action="store_true", help="Mostra o resultado sem confirmar as promessas.")
+        parser.add_argument("--report", help="Grava os lançamentos sem correspondência neste CSV.")
+
+    def handle(self, *args, **options):
+        path = Path(options["statement"])
+        fmt = options["format"] or ("ofx" if path.suffix.lower() in (".ofx", ".qfx") else "csv")
+        try:
+            with path.open(encoding=options["encoding"], newline="") as handle:
+                report = reconcile_statement(iter_statement(handle, fmt), dry_run=options["dry_run"])
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        for entry, pledge_id, reason in report.matched:
+            self.stdout.write(f"linha {entry.line}: {entry.amount} em {entry.posted_on} -> promessa #{pledge_id} ({reason})")
+        for entry, reason in report.unmatched:
+            if entry.problem:
+                self.stdout.write(self.style.WARNING(f"linha {entry.line}: não lida ({reason})"))
+            else:
+                self.stdout.write(self.style.WARNING(f"linha {entry.line}: {entry.amount} em {entry.posted_on} sem correspondência ({reason})"))
+        if options["report"]:
+            with open(options["report"], "w", encoding="utf-8", newline="") as handle:
+                writer = csv.writer(handle)
+                writer.writerow(["linha", "data", "valor", "referencia", "descricao", "motivo"])
+                for entry, reason in report.unmatched:
+                    amount = entry.raw_amount if entry.problem else entry.amount
+                    writer.writerow([entry.line, entry.posted_on or "", amount, entry.reference, entry.description, reason])
+        prefix = "[simulação] " if options["dry_run"] else ""
+        self.stdout.write(self.style.SUCCESS(prefix + report.summary()))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from games.models import DonationPledge
+from games.utils import pix_settings_fingerprint
+
+
+class Command(BaseCommand):
+    help = "Regrava payload e QR Pix das promessas geradas com outra configuração (PIX_KEY, recebedor, descrição)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Regera todas as promessas, não só as desatualizadas.")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        fields = list(DonationPledge.PIX_PAYLOAD_FIELDS)
+        pledges = DonationPledge.objects.only("id", "pix_txid", "amount", *fields).order_by("pk")
+        if not options["all"]:
+            # Índice em pix_payload_fingerprint: só as linhas de outra configuração são lidas.
+            pledges = pledges.exclude(pix_payload_fingerprint=pix_settings_fingerprint())
+        refreshed = 0
+        last_pk = 0
+        # Paginação por chave em vez de iterator(): o lote é gravado antes de a próxima página ser lida.
+        while batch := list(pledges.filter(pk__gt=last_pk)[: options["batch_size"]]):
+            last_pk = batch[-1].pk
+            changed = [pledge for pledge in batch if pledge.refresh_pix_payload(force=options["all"])]
+            DonationPledge.objects.bulk_update(changed, fields)
+            refreshed += len(changed)
+        self.stdout.write(self.style.SUCCESS(f"{refreshed} promessa(s) com payload Pix regravado."))
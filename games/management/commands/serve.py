@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+
+from games.warmup import run_warmup
+from SelvaCoreWeb.prefork import Arbiter, ServeConfig, default_workers
+
+
+def _bind(value):
+    host, _, port = value.rpartition(":")
+    if not host or not port.isdigit():
+        raise CommandError(f"--bind inválido: {value!r} (use host:porta).")
+    return host.strip("[]"), int(port)
+
+
+class Command(BaseCommand):
+    help = (
+        "Servidor de produção com pré-carga: a aplicação e os caches sobem no master e os workers "
+        "(um por núcleo) são criados via fork, reciclados por número de requisições ou crescimento de memória."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--bind", default="127.0.0.1:8000", help="host:porta (porta 0 escolhe uma livre).")
+        parser.add_argument("--workers", type=int, default=default_workers(), help="Padrão: núcleos disponíveis.")
+        parser.add_argument("--max-requests", type=int, default=1000, help="Recicla o worker após N requisições (0 desliga).")
+        parser.add_argument("--max-requests-jitter", type=int, default=100, help="Acréscimo aleatório para não reciclar todos juntos.")
+        parser.add_argument("--max-memory-growth-mb", type=int, default=256, help="Recicla quando o RSS cresce além disso (0 desliga).")
+        parser.add_argument("--graceful-timeout", type=float, default=30.0, help="Segundos para os workers terminarem antes do SIGKILL.")
+        parser.add_argument("--timeout", type=float, default=30.0, help="Segundos de inatividade antes de fechar uma conexão.")
+        parser.add_argument("--report-interval", type=float, default=60.0, help="Segundos entre relatórios de memória (0 desliga).")
+        parser.add_argument("--no-warmup", action="store_true", help="Não executa o warm-up antes do fork.")
+
+    def handle(self, *args, **options):
+        if options["workers"] < 1:
+            raise CommandError("--workers precisa ser pelo menos 1.")
+        host, port = _bind(options["bind"])
+        started = time.perf_counter()
+        application = get_wsgi_application()
+        self.stdout.write(f"preload: {(time.perf_counter() - started) * 1000:.1f} ms")
+        if not options["no_warmup"]:
+            for label, elapsed, _ in run_warmup():
+                self.stdout.write(f"warm-up {label}: {elapsed * 1000:.1f} ms")
+        self.stdout.flush()
+        config = ServeConfig(
+            host=host,
+            port=port,
+            workers=options["workers"],
+            max_requests=options["max_requests"],
+            max_requests_jitter=options["max_requests_jitter"],
+            max_memory_growth=options["max_memory_growth_mb"] * 1024 * 1024,
+            graceful_timeout=options["graceful_timeout"],
+            report_interval=options["report_interval"],
+            timeout=options["timeout"],
+        )
+        Arbiter(application, config, self.stdout).run(started)
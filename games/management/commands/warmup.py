@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from games.warmup import run_warmup
+
+
+class Command(BaseCommand):
+    help = "Pré-carrega módulos pesados, templates, URLs e caches de catálogo/FAQ, informando o tempo de cada etapa."
+
+    def handle(self, *args, **options):
+        total = 0.0
+        for label, elapsed, result in run_warmup():
+            total += elapsed
+            detail = f" ({result})" if result is not None else ""
+            self.stdout.write(f"{label}: {elapsed * 1000:.1f} ms{detail}")
+        self.stdout.write(self.style.SUCCESS(f"warm-up concluído em {total * 1000:.1f} ms"))
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.8 on 2026-10-19 00:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0005_page_validators'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='donationpledge',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='donationpledge',
+            name='pix_transaction_code',
+            field=models.CharField(blank=True, db_index=True, max_length=60),
+        ),
+        migrations.AlterField(
+            model_name='emailverification',
+            name='code',
+            field=models.CharField(db_index=True, max_length=6),
+        ),
+        migrations.AlterField(
+            model_name='emailverification',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='feedback',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='feedback',
+            name='title',
+            field=models.CharField(db_index=True, max_length=140),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.8 on 2026-10-19 00:48
+
+from django.db import migrations, models
+
+from games.utils import pix_payload_for, pix_settings_fingerprint, qr_code_svg
+
+
+def store_pix_payloads(apps, schema_editor):
+    from django.conf import settings
+
+    DonationPledge = apps.get_model('games', 'DonationPledge')
+    fields = ['pix_payload', 'pix_qr_svg', 'pix_payload_fingerprint']
+    fingerprint = pix_settings_fingerprint()
+    batch = []
+    for pledge in DonationPledge.objects.only('id', 'pix_txid', 'amount').iterator(chunk_size=500):
+        pledge.pix_payload = pix_payload_for(pledge)
+        pledge.pix_qr_svg = qr_code_svg(pledge.pix_payload) if pledge.pix_payload and settings.PIX_STORE_QR_SVG else ''
+        pledge.pix_payload_fingerprint = fingerprint
+        batch.append(pledge)
+        if len(batch) == 500:
+            DonationPledge.objects.bulk_update(batch, fields)
+            batch = []
+    DonationPledge.objects.bulk_update(batch, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0006_admin_changelist_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='donationpledge',
+            name='pix_payload',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='donationpledge',
+            name='pix_payload_fingerprint',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='donationpledge',
+            name='pix_qr_svg',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(store_pix_payloads, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.8 on 2026-10-19 00:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def build_supporter_totals(apps, schema_editor):
+    DonationPledge = apps.get_model('games', 'DonationPledge')
+    SupporterTotal = apps.get_model('games', 'SupporterTotal')
+    rows = (
+        DonationPledge.objects.filter(pix_status='confirmed', visibility='public')
+        .order_by()
+        .values('user_id', 'currency')
+        .annotate(
+            total=models.Sum('amount'),
+            pledges=models.Count('id'),
+            last=models.Max('pix_confirmed_at'),
+        )
+    )
+    SupporterTotal.objects.bulk_create(
+        [
+            SupporterTotal(
+                user_id=row['user_id'],
+                currency=row['currency'],
+                total_amount=row['total'],
+                pledge_count=row['pledges'],
+                last_confirmed_at=row['last'],
+            )
+            for row in rows
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0007_donationpledge_pix_payload'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SupporterTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('currency', models.CharField(default='BRL', max_length=3)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('pledge_count', models.PositiveIntegerField(default=0)),
+                ('last_confirmed_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='supporter_totals', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'total de apoiador',
+                'verbose_name_plural': 'totais de apoiadores',
+                'indexes': [models.Index(fields=['currency', '-total_amount'], name='supporter_total_rank_idx'), models.Index(fields=['currency', '-last_confirmed_at'], name='supporter_total_recent_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'currency'), name='supporter_total_user_currency')],
+            },
+        ),
+        migrations.RunPython(build_supporter_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.8 on 2026-10-19 00:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0008_supporter_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedback',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='games.feedback', verbose_name='semelhante a'),
+        ),
+        migrations.AddField(
+            model_name='feedback',
+            name='minhash',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='FeedbackBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField()),
+                ('bucket', models.BigIntegerField()),
+                ('feedback', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lsh_buckets', to='games.feedback')),
+            ],
+            options={
+                'verbose_name': 'balde LSH de feedback',
+                'verbose_name_plural': 'baldes LSH de feedback',
+                'indexes': [models.Index(fields=['band', 'bucket'], name='feedback_lsh_bucket_idx')],
+            },
+        ),
+    ]
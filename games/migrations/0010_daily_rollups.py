@@ -0,0 +1,57 @@
+# Generated by Django 5.2.8 on 2026-10-19 00:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0009_feedback_similarity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=40, unique=True)),
+                ('processed_until', models.DateTimeField(blank=True, null=True)),
+                ('built_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DonationDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('currency', models.CharField(max_length=3)),
+                ('pix_status', models.CharField(choices=[('pending', 'Aguardando Pix'), ('awaiting_confirmation', 'Comprovante enviado'), ('confirmed', 'Pix confirmado'), ('failed', 'Pagamento não localizado')], max_length=24)),
+                ('is_recurring', models.BooleanField()),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('amount_sum', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'verbose_name': 'consolidado diário de doações',
+                'verbose_name_plural': 'consolidados diários de doações',
+                'ordering': ['day', 'currency', 'pix_status', 'is_recurring'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'currency', 'pix_status', 'is_recurring'), name='donation_rollup_key')],
+            },
+        ),
+        migrations.CreateModel(
+            name='FeedbackDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('topic', models.CharField(choices=[('gameplay', 'Jogabilidade'), ('art_ui', 'Arte e interface'), ('technology', 'Tecnologia e performance'), ('community', 'Comunidade'), ('business', 'Parcerias e negócio'), ('other', 'Outro')], max_length=32)),
+                ('status', models.CharField(choices=[('new', 'Recebido'), ('in_review', 'Em análise'), ('acknowledged', 'Planejado'), ('published', 'Publicado')], max_length=24)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('impact_sum', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'consolidado diário de feedback',
+                'verbose_name_plural': 'consolidados diários de feedback',
+                'ordering': ['day', 'topic', 'status'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'topic', 'status'), name='feedback_rollup_key')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # A busca do admin e a importação de contas comparam LOWER(email); auth_user não tem índice nenhum em email.
+    # Fica aqui porque django.contrib.auth é dono da tabela e não aceita migrações de fora; games é o app
+    # cujas consultas precisam do índice. IF NOT EXISTS/IF EXISTS deixam aplicar e reverter sem conflito.
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('games', '0010_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS auth_user_email_lower_idx ON auth_user (LOWER(email));',
+            reverse_sql='DROP INDEX IF EXISTS auth_user_email_lower_idx;',
+        ),
+    ]
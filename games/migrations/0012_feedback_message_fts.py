@@ -0,0 +1,33 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # Busca por palavras da mensagem no admin: FTS5 com o conteúdo lido de games_feedback (sem cópia do texto),
+    # mantido pelos triggers abaixo. remove_diacritics faz "cafe" achar "café".
+
+    dependencies = [
+        ('games', '0011_auth_user_email_lower_index'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            [
+                "CREATE VIRTUAL TABLE games_feedback_fts USING fts5("
+                "message, content='games_feedback', content_rowid='id', tokenize='unicode61 remove_diacritics 2');",
+                'CREATE TRIGGER games_feedback_fts_insert AFTER INSERT ON games_feedback BEGIN '
+                'INSERT INTO games_feedback_fts(rowid, message) VALUES (new.id, new.message); END;',
+                'CREATE TRIGGER games_feedback_fts_delete AFTER DELETE ON games_feedback BEGIN '
+                "INSERT INTO games_feedback_fts(games_feedback_fts, rowid, message) VALUES ('delete', old.id, old.message); END;",
+                'CREATE TRIGGER games_feedback_fts_update AFTER UPDATE OF message ON games_feedback BEGIN '
+                "INSERT INTO games_feedback_fts(games_feedback_fts, rowid, message) VALUES ('delete', old.id, old.message); "
+                'INSERT INTO games_feedback_fts(rowid, message) VALUES (new.id, new.message); END;',
+                "INSERT INTO games_feedback_fts(games_feedback_fts) VALUES ('rebuild');",
+            ],
+            reverse_sql=[
+                'DROP TRIGGER IF EXISTS games_feedback_fts_update;',
+                'DROP TRIGGER IF EXISTS games_feedback_fts_delete;',
+                'DROP TRIGGER IF EXISTS games_feedback_fts_insert;',
+                'DROP TABLE IF EXISTS games_feedback_fts;',
+            ],
+        ),
+    ]
@@ -1,10 +1,13 @@
 import uuid
+from decimal import Decimal
 
 from django.conf import settings
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.utils import timezone
 
+from .utils import cached_qr_code_svg, pix_payload_for, pix_settings_fingerprint
+
 
 class GameStatus(models.TextChoices):
     PRE_PRODUCTION = "pre_production", "Pré-produção"
@@ -30,7 +33,7 @@ class Game(models.Model):
     trailer_url = models.URLField(blank=True)
     is_featured = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         ordering = ["-is_featured", "-release_date", "title"]
@@ -56,6 +59,10 @@ class Game(models.Model):
     def has_release_date(self):
         return bool(self.release_date)
 
+    @property
+    def platform_list(self):
+        return [platform.strip() for platform in self.platforms.split(",") if platform.strip()]
+
 
 class FAQCategory(models.Model):
     slug = models.SlugField(max_length=60, unique=True)
@@ -63,6 +70,7 @@ class FAQCategory(models.Model):
     description = models.TextField(blank=True)
     order = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["order", "title"]
@@ -87,6 +95,7 @@ class FAQEntry(models.Model):
     order = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
     is_featured = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["category", "order", "question"]
@@ -115,7 +124,7 @@ class FeedbackStatus(models.TextChoices):
 
 class Feedback(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="feedback_items")
-    title = models.CharField(max_length=140)
+    title = models.CharField(max_length=140, db_index=True)
     topic = models.CharField(max_length=32, choices=FeedbackTopic.choices, default=FeedbackTopic.OTHER)
     message = models.TextField()
     impact_rating = models.PositiveSmallIntegerField(
@@ -125,11 +134,22 @@ class Feedback(models.Model):
     )
     status = models.CharField(max_length=24, choices=FeedbackStatus.choices, default=FeedbackStatus.NEW)
     is_public = models.BooleanField(default=False)
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # Assinatura MinHash de título+mensagem e feedback mais antigo do mesmo cluster de quase-duplicatas.
+    minhash = models.BinaryField(null=True, blank=True, editable=False)
+    duplicate_of = models.ForeignKey(
+        "self",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="duplicates",
+        verbose_name="semelhante a",
+    )
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [models.Index(fields=["is_public", "updated_at"], name="feedback_public_updated_idx")]
         verbose_name = "feedback da comunidade"
         verbose_name_plural = "feedbacks da comunidade"
 
@@ -141,10 +161,23 @@ class Feedback(models.Model):
         return (self.message[:120] + "...") if len(self.message) > 123 else self.message
 
 
+class FeedbackBucket(models.Model):
+    """Índice LSH: um balde por banda da assinatura MinHash de cada feedback."""
+
+    feedback = models.ForeignKey(Feedback, on_delete=models.CASCADE, related_name="lsh_buckets")
+    band = models.PositiveSmallIntegerField()
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        indexes = [models.Index(fields=["band", "bucket"], name="feedback_lsh_bucket_idx")]
+        verbose_name = "balde LSH de feedback"
+        verbose_name_plural = "baldes LSH de feedback"
+
+
 class EmailVerification(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="email_verifications")
-    code = models.CharField(max_length=6)
-    created_at = models.DateTimeField(auto_now_add=True)
+    code = models.CharField(max_length=6, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     expires_at = models.DateTimeField()
     verified_at = models.DateTimeField(null=True, blank=True)
     attempts = models.PositiveSmallIntegerField(default=0)
@@ -191,12 +224,20 @@ class DonationPledge(models.Model):
     message = models.TextField(blank=True)
     is_recurring = models.BooleanField(default=False)
     visibility = models.CharField(max_length=16, choices=DonationVisibility.choices, default=DonationVisibility.TEAM_ONLY)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     pix_txid = models.CharField(max_length=25, unique=True, blank=True)
     pix_status = models.CharField(max_length=24, choices=DonationPaymentStatus.choices, default=DonationPaymentStatus.PENDING)
-    pix_transaction_code = models.CharField(max_length=60, blank=True)
+    pix_transaction_code = models.CharField(max_length=60, blank=True, db_index=True)
     pix_confirmed_at = models.DateTimeField(null=True, blank=True)
     pix_last_checked_at = models.DateTimeField(null=True, blank=True)
+    pix_payload = models.TextField(blank=True, editable=False)
+    pix_qr_svg = models.TextField(blank=True, editable=False)
+    pix_payload_fingerprint = models.CharField(max_length=32, blank=True, editable=False, db_index=True)
+
+    PIX_PAYLOAD_FIELDS = ("pix_payload", "pix_qr_svg", "pix_payload_fingerprint")
+    # Campos que decidem a contribuição ao mural; o valor carregado do banco é guardado para o save() comparar.
+    WALL_FIELDS = ("user_id", "currency", "amount", "pix_status", "visibility")
 
     class Meta:
         ordering = ["-created_at"]
@@ -206,11 +247,144 @@ class DonationPledge(models.Model):
     def __str__(self):
         return f"{self.user} - {self.amount} {self.currency}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if not set(cls.WALL_FIELDS) & instance.get_deferred_fields():
+            instance._stored_contribution = instance.wall_contribution()
+        if "pix_status" in instance.__dict__:
+            instance._loaded_pix_status = instance.pix_status
+        return instance
+
+    @staticmethod
+    def _contribution(user_id, currency, amount, pix_status, visibility):
+        if pix_status == DonationPaymentStatus.CONFIRMED and visibility == DonationVisibility.PUBLIC:
+            return (user_id, currency, Decimal(amount))
+        return None
+
+    def wall_contribution(self):
+        """(usuário, moeda, valor) que esta promessa soma ao mural de apoiadores, ou None."""
+        return self._contribution(self.user_id, self.currency, self.amount, self.pix_status, self.visibility)
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self.__dict__.pop("_stored_contribution", None)
+        if "pix_status" in self.__dict__:
+            self._loaded_pix_status = self.pix_status
+
+    def _contribution_in_db(self):
+        if hasattr(self, "_stored_contribution"):
+            return self._stored_contribution
+        if self._state.adding:
+            return None
+        # Carregada com only()/defer(): lê o estado gravado antes de sobrescrevê-lo.
+        stored = DonationPledge.objects.filter(pk=self.pk).values_list(*self.WALL_FIELDS).first()
+        return self._contribution(*stored) if stored else None
+
     def save(self, *args, **kwargs):
         if not self.pix_txid:
             self.pix_txid = uuid.uuid4().hex[:25].upper()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or {"amount", "pix_txid"} & set(update_fields):
+            if self.refresh_pix_payload() and update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, *self.PIX_PAYLOAD_FIELDS}
+        if update_fields is not None:
+            # auto_now só roda para campos listados: sem updated_at, rollups e ETags não veem a mudança.
+            kwargs["update_fields"] = {*kwargs["update_fields"], "updated_at"}
+        previous = self._contribution_in_db()
+        previous_status = "created" if self._state.adding else self.__dict__.get("_loaded_pix_status")
         super().save(*args, **kwargs)
+        writes_status = update_fields is None or "pix_status" in update_fields
+        if writes_status and previous_status is not None and previous_status != self.pix_status:
+            from .monitoring import record_pledge_transition
+
+            record_pledge_transition(previous_status, self.pix_status)
+            self._loaded_pix_status = self.pix_status
+        contribution = self.wall_contribution()
+        if contribution != previous:
+            from .supporters import apply_wall_changes
+
+            apply_wall_changes(removed=[previous] if previous else [], added=[contribution] if contribution else [])
+        self._stored_contribution = contribution
+
+    def refresh_pix_payload(self, force=False):
+        """Recalcula o payload Pix (e o QR só quando o payload muda); devolve True se algo mudou."""
+        payload = pix_payload_for(self)
+        fingerprint = pix_settings_fingerprint()
+        wants_qr = bool(payload) and getattr(settings, "PIX_STORE_QR_SVG", True)
+        unchanged = payload == self.pix_payload and bool(self.pix_qr_svg) == wants_qr
+        if unchanged and fingerprint == self.pix_payload_fingerprint and not force:
+            return False
+        if force or not unchanged:
+            self.pix_qr_svg = cached_qr_code_svg(payload) if wants_qr else ""
+        self.pix_payload = payload
+        self.pix_payload_fingerprint = fingerprint
+        return True
 
     @property
     def is_confirmed(self):
-        return self.pix_status == DonationPaymentStatus.CONFIRMED and self.pix_confirmed_at is not None
\ No newline at end of file
+        return self.pix_status == DonationPaymentStatus.CONFIRMED and self.pix_confirmed_at is not None
+
+
+class SupporterTotal(models.Model):
+    """Total corrente das promessas públicas confirmadas de cada apoiador, por moeda."""
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="supporter_totals")
+    currency = models.CharField(max_length=3, default="BRL")
+    total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    pledge_count = models.PositiveIntegerField(default=0)
+    last_confirmed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["user", "currency"], name="supporter_total_user_currency")]
+        indexes = [
+            models.Index(fields=["currency", "-total_amount"], name="supporter_total_rank_idx"),
+            models.Index(fields=["currency", "-last_confirmed_at"], name="supporter_total_recent_idx"),
+        ]
+        verbose_name = "total de apoiador"
+        verbose_name_plural = "totais de apoiadores"
+
+    def __str__(self):
+        return f"{self.user} - {self.total_amount} {self.currency}"
+
+
+class FeedbackDailyRollup(models.Model):
+    day = models.DateField()
+    topic = models.CharField(max_length=32, choices=FeedbackTopic.choices)
+    status = models.CharField(max_length=24, choices=FeedbackStatus.choices)
+    total = models.PositiveIntegerField(default=0)
+    impact_sum = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["day", "topic", "status"], name="feedback_rollup_key")]
+        ordering = ["day", "topic", "status"]
+        verbose_name = "consolidado diário de feedback"
+        verbose_name_plural = "consolidados diários de feedback"
+
+
+class DonationDailyRollup(models.Model):
+    day = models.DateField()
+    currency = models.CharField(max_length=3)
+    pix_status = models.CharField(max_length=24, choices=DonationPaymentStatus.choices)
+    is_recurring = models.BooleanField()
+    total = models.PositiveIntegerField(default=0)
+    amount_sum = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "currency", "pix_status", "is_recurring"], name="donation_rollup_key")
+        ]
+        ordering = ["day", "currency", "pix_status", "is_recurring"]
+        verbose_name = "consolidado diário de doações"
+        verbose_name_plural = "consolidados diários de doações"
+
+
+class RollupWatermark(models.Model):
+    """Maior updated_at já consolidado por cada rollup."""
+
+    name = models.CharField(max_length=40, unique=True)
+    processed_until = models.DateTimeField(null=True, blank=True)
+    built_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return self.name
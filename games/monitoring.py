@@ -0,0 +1,69 @@
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from SelvaCoreWeb import metrics
+
+from . import caching
+from .models import DonationPaymentStatus, DonationPledge, EmailVerification, Feedback, FeedbackStatus, RollupWatermark
+
+CACHE_RESULTS = {"local_hits": "local_hit", "shared_hits": "shared_hit", "misses": "miss"}
+
+metrics.HELP.update(
+    {
+        "selva_cache_early_recomputes_total": "Recálculos antecipados (XFetch) por namespace.",
+        "selva_cache_lookup_seconds_total": "Tempo gasto em buscas no cache por namespace.",
+    }
+)
+
+
+def record_pledge_transition(previous, current):
+    metrics.inc("selva_pledge_status_transitions_total", {"from": previous, "to": current})
+
+
+def cache_counters():
+    counters = {}
+    for name, stats in caching.stats().items():
+        for field, result in CACHE_RESULTS.items():
+            counters[("selva_cache_lookups_total", (("namespace", name), ("result", result)))] = stats[field]
+        counters[("selva_cache_early_recomputes_total", (("namespace", name),))] = stats["early_recomputes"]
+        counters[("selva_cache_lookup_seconds_total", (("namespace", name),))] = stats["lookup_seconds"]
+    return counters
+
+
+def cache_hit_ratios(samples):
+    lookups = {}
+    for (name, labels), value in samples.items():
+        if name == "selva_cache_lookups_total":
+            labels = dict(labels)
+            hits, total = lookups.get(labels["namespace"], (0, 0))
+            lookups[labels["namespace"]] = (hits + (value if labels["result"] != "miss" else 0), total + value)
+    return {
+        ("selva_cache_hit_ratio", (("namespace", namespace),)): hits / total if total else 0.0
+        for namespace, (hits, total) in lookups.items()
+    }
+
+
+def queue_depths(samples):
+    """Backlogs lidos na hora da coleta: não há fila/outbox dedicada, o trabalho pendente mora nas tabelas."""
+    now = timezone.now()
+    feedback = Feedback.objects.aggregate(
+        triage=Count("id", filter=Q(status=FeedbackStatus.NEW)),
+        similarity=Count("id", filter=Q(minhash__isnull=True)),
+    )
+    depths = {
+        "feedback_triage": feedback["triage"],
+        "similarity_index": feedback["similarity"],
+        "pix_pending": DonationPledge.objects.filter(
+            pix_status__in=[DonationPaymentStatus.PENDING, DonationPaymentStatus.AWAITING_CONFIRMATION]
+        ).count(),
+        "email_verification": EmailVerification.objects.filter(verified_at__isnull=True, expires_at__gt=now).count(),
+    }
+    gauges = {("selva_queue_depth", (("queue", queue),)): depth for queue, depth in depths.items()}
+    for name, built_at in RollupWatermark.objects.exclude(built_at__isnull=True).values_list("name", "built_at"):
+        gauges[("selva_rollup_lag_seconds", (("rollup", name),))] = (now - built_at).total_seconds()
+    return gauges
+
+
+metrics.register_snapshot(cache_counters)
+metrics.register_gauges(cache_hit_ratios)
+metrics.register_gauges(queue_depths)
@@ -0,0 +1,37 @@
+from django.core.paginator import Paginator
+from django.db import connections, router
+from django.utils.functional import cached_property
+
+# Abaixo disso o COUNT(*) exato é barato e mais honesto que a estimativa.
+ESTIMATED_COUNT_THRESHOLD = 10_000
+
+
+def estimated_row_count(model):
+    """Total aproximado de linhas da tabela sem varrê-la, ou None se o banco não oferece estimativa."""
+    connection = connections[router.db_for_read(model)]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)", [table])
+        elif connection.vendor == "sqlite":
+            # MAX(rowid) é lido da ponta da árvore; exclusões o deixam um pouco acima do real.
+            cursor.execute(f"SELECT MAX(rowid) FROM {connection.ops.quote_name(table)}")
+        else:
+            return None
+        row = cursor.fetchone()
+    if not row or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator que troca o COUNT(*) de listas sem filtro pela estimativa do banco em tabelas grandes."""
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, "query", None)
+        if query is not None and not query.where:
+            estimate = estimated_row_count(self.object_list.model)
+            if estimate is not None and estimate >= ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
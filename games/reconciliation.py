@@ -0,0 +1,287 @@
+import csv
+import hashlib
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import DonationPaymentStatus, DonationPledge, DonationVisibility
+from .monitoring import record_pledge_transition
+from .supporters import apply_wall_changes
+
+# FAILED também entra: o doador pode ter digitado o código errado num Pix que de fato caiu.
+RECONCILABLE_STATUSES = (
+    DonationPaymentStatus.PENDING,
+    DonationPaymentStatus.AWAITING_CONFIRMATION,
+    DonationPaymentStatus.FAILED,
+)
+# Dias após a criação da promessa em que um crédito de mesmo valor ainda é atribuído a ela.
+MATCH_WINDOW_DAYS = 3
+UPDATE_BATCH_SIZE = 500
+
+_TOKEN_RE = re.compile(r"[A-Za-z0-9]{6,35}")
+_OFX_TAG_RE = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<\r\n]*)")
+# (separador decimal, formato): sem milhar ou com grupos de três dígitos separados pelo outro sinal.
+_AMOUNT_FORMATS = (
+    (",", re.compile(r"^[+-]?(\d+|\d{1,3}(\.\d{3})+)(,\d+)?$")),
+    (".", re.compile(r"^[+-]?(\d+|\d{1,3}(,\d{3})+)(\.\d+)?$")),
+)
+
+CSV_COLUMNS = {
+    "date": ("data", "date", "data_lancamento", "dtposted"),
+    "amount": ("valor", "amount", "trnamt"),
+    "reference": ("id", "fitid", "end_to_end", "e2e", "codigo", "identificador"),
+}
+
+
+@dataclass(frozen=True)
+class StatementEntry:
+    line: int
+    posted_on: date | None
+    amount: Decimal | None
+    reference: str
+    description: str
+    # Linha com data ou valor ilegível: vai para o relatório em vez de interromper o extrato.
+    problem: str = ""
+    raw_amount: str = ""
+
+
+@dataclass
+class ReconciliationReport:
+    matched: list = field(default_factory=list)
+    unmatched: list = field(default_factory=list)
+    ignored: int = 0
+
+    def summary(self):
+        return f"{len(self.matched)} conciliado(s), {len(self.unmatched)} sem correspondência, {self.ignored} ignorado(s)"
+
+
+def parse_amount(raw, decimal_separator=None):
+    """Aceita 1.234,56 e 1,234.56; recusa valores que mudam conforme o formato, como 1.234 ou 1,234."""
+    value = raw.strip().replace("R$", "").replace(" ", "")
+    readings = set()
+    for decimal, pattern in _AMOUNT_FORMATS:
+        if decimal_separator in (None, decimal) and pattern.match(value):
+            grouping = "." if decimal == "," else ","
+            try:
+                readings.add(Decimal(value.replace(grouping, "").replace(decimal, ".")))
+            except InvalidOperation:
+                pass
+    if len(readings) > 1:
+        raise ValueError(f"Valor ambíguo: {raw!r} (separador de milhar ou decimal?)")
+    if not readings:
+        raise ValueError(f"Valor inválido: {raw!r}")
+    return readings.pop()
+
+
+def parse_date(raw):
+    value = raw.strip()
+    # OFX traz "20240105120000[-3:BRT]"; CSVs costumam trazer só a data ou data e hora.
+    for fmt, width in (("%d/%m/%Y", 10), ("%Y-%m-%d", 10), ("%Y%m%d", 8)):
+        try:
+            return datetime.strptime(value[:width], fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Data inválida: {raw!r}")
+
+
+def _csv_column(fieldnames, key):
+    normalized = {name.strip().lower(): name for name in fieldnames}
+    for alias in CSV_COLUMNS[key]:
+        if alias in normalized:
+            return normalized[alias]
+    return None
+
+
+def _statement_entry(line, raw_date, raw_amount, reference, description, decimal_separator=None):
+    try:
+        posted_on = parse_date(raw_date)
+        amount = parse_amount(raw_amount, decimal_separator)
+    except ValueError as exc:
+        return StatementEntry(line, None, None, reference, description, problem=str(exc), raw_amount=raw_amount.strip())
+    return StatementEntry(line, posted_on, amount, reference, description)
+
+
+def iter_csv_statement(handle):
+    """Lê o extrato CSV linha a linha (separador detectado; colunas em português ou inglês)."""
+    sample = handle.read(4096)
+    handle.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.DictReader(handle, dialect=dialect)
+    fieldnames = reader.fieldnames or []
+    date_column, amount_column, reference_column = (_csv_column(fieldnames, key) for key in CSV_COLUMNS)
+    if not date_column or not amount_column:
+        raise ValueError("O CSV precisa das colunas de data e valor.")
+    # Colunas restantes (descrição, nome do pagador, txid...) viram o texto onde o txid é procurado.
+    other_columns = [name for name in fieldnames if name not in (date_column, amount_column, reference_column)]
+    for row in reader:
+        yield _statement_entry(
+            reader.line_num,
+            row[date_column] or "",
+            row[amount_column] or "",
+            (row.get(reference_column) or "").strip() if reference_column else "",
+            " ".join((row.get(name) or "").strip() for name in other_columns).strip(),
+        )
+
+
+def iter_ofx_statement(handle):
+    """Lê transações <STMTTRN> de um OFX (SGML ou XML) sem carregar o arquivo inteiro."""
+    current = None
+    for number, line in enumerate(handle, start=1):
+        for closing, tag, value in _OFX_TAG_RE.findall(line):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if not closing:
+                    current = {"line": number}
+                elif current is not None:
+                    yield _statement_entry(
+                        current["line"],
+                        current.get("DTPOSTED", ""),
+                        current.get("TRNAMT", "0"),
+                        current.get("FITID", ""),
+                        " ".join(current.get(key, "") for key in ("NAME", "MEMO", "REFNUM")).strip(),
+                        decimal_separator=".",
+                    )
+                    current = None
+            elif current is not None and not closing:
+                current[tag] = value.strip()
+
+
+def iter_statement(handle, fmt):
+    return iter_ofx_statement(handle) if fmt == "ofx" else iter_csv_statement(handle)
+
+
+class PendingPledgeIndex:
+    """Promessas em aberto indexadas por txid e por (valor, dia de criação)."""
+
+    def __init__(self, queryset=None):
+        queryset = queryset if queryset is not None else DonationPledge.objects.all()
+        self.by_txid = {}
+        self.by_amount_date = {}
+        # Contribuição ao mural de cada promessa pública, somada quando ela for confirmada.
+        self.wall_contributions = {}
+        rows = (
+            queryset.filter(pix_status__in=RECONCILABLE_STATUSES)
+            .values_list("id", "pix_txid", "amount", "created_at", "user_id", "currency", "visibility")
+            .iterator(chunk_size=2000)
+        )
+        for pledge_id, txid, amount, created_at, user_id, currency, visibility in rows:
+            self.by_txid[txid.upper()] = pledge_id
+            key = (amount, timezone.localtime(created_at).date())
+            self.by_amount_date.setdefault(key, []).append(pledge_id)
+            if visibility == DonationVisibility.PUBLIC:
+                self.wall_contributions[pledge_id] = (user_id, currency, amount)
+        # Reimportar o mesmo extrato não pode atribuir um crédito já conciliado a outra promessa de mesmo valor.
+        self.settled_codes = set(
+            queryset.filter(pix_status=DonationPaymentStatus.CONFIRMED)
+            .exclude(pix_transaction_code="")
+            .values_list("pix_transaction_code", flat=True)
+            .iterator(chunk_size=2000)
+        )
+        self.claimed = set()
+
+    def match(self, entry):
+        """Devolve (id da promessa, motivo) para o lançamento; id None quando não há correspondência única."""
+        code = settlement_code(entry)
+        # Códigos gravados antes do resumo da descrição guardavam só a referência.
+        if code in self.settled_codes or (entry.reference and entry.reference[:60] in self.settled_codes):
+            return None, "já conciliado"
+        pledge_id, reason = self._find(entry)
+        if pledge_id is not None:
+            self.claimed.add(pledge_id)
+            self.settled_codes.add(code)
+        return pledge_id, reason
+
+    def _find(self, entry):
+        for token in _TOKEN_RE.findall(f"{entry.reference} {entry.description}"):
+            pledge_id = self.by_txid.get(token.upper())
+            if pledge_id is not None and pledge_id not in self.claimed:
+                return pledge_id, "txid"
+        candidates = []
+        for offset in range(MATCH_WINDOW_DAYS + 1):
+            key = (entry.amount, entry.posted_on - timedelta(days=offset))
+            candidates.extend(pid for pid in self.by_amount_date.get(key, ()) if pid not in self.claimed)
+        if len(candidates) == 1:
+            return candidates[0], "valor+data"
+        return None, "ambíguo" if candidates else "sem promessa correspondente"
+
+
+def settlement_code(entry):
+    """Código gravado na promessa: a referência mais um resumo da descrição, já que bancos repetem referências."""
+    if not entry.reference:
+        return entry.description[:60]
+    digest = hashlib.sha1(entry.description.encode()).hexdigest()[:8]
+    return f"{entry.reference[:51]}/{digest}"
+
+
+def reconcile_statement(entries, *, dry_run=False, queryset=None):
+    """Concilia os lançamentos com as promessas em aberto numa única passada e confirma as encontradas em lote."""
+    index = PendingPledgeIndex(queryset)
+    report = ReconciliationReport()
+    for entry in entries:
+        if entry.problem:
+            # Débito ilegível seria ignorado de qualquer forma; crédito ilegível precisa de conferência manual.
+            if entry.raw_amount.startswith("-"):
+                report.ignored += 1
+            else:
+                report.unmatched.append((entry, entry.problem))
+            continue
+        if entry.amount <= 0:
+            report.ignored += 1
+            continue
+        pledge_id, reason = index.match(entry)
+        if pledge_id is None:
+            report.unmatched.append((entry, reason))
+        else:
+            report.matched.append((entry, pledge_id, reason))
+    if not dry_run:
+        confirmed = confirm_matches(report.matched, index.wall_contributions)
+        for entry, pledge_id, reason in report.matched:
+            if pledge_id not in confirmed:
+                report.unmatched.append((entry, "promessa confirmada por outro caminho"))
+        report.matched = [match for match in report.matched if match[1] in confirmed]
+    return report
+
+
+def confirm_matches(matched, wall_contributions=None):
+    """Confirma as promessas ainda em aberto e devolve os ids confirmados de fato."""
+    now = timezone.now()
+    codes = {pledge_id: settlement_code(entry) for entry, pledge_id, _ in matched}
+    fields = ["pix_status", "pix_confirmed_at", "pix_last_checked_at", "pix_transaction_code", "updated_at"]
+    with transaction.atomic():
+        # Relê com lock: quem confirmou a promessa pelo portal desde a leitura do índice já creditou o mural.
+        statuses = {}
+        pledge_ids = list(codes)
+        for offset in range(0, len(pledge_ids), UPDATE_BATCH_SIZE):
+            chunk = pledge_ids[offset:offset + UPDATE_BATCH_SIZE]
+            statuses.update(
+                DonationPledge.objects.select_for_update()
+                .filter(pk__in=chunk, pix_status__in=RECONCILABLE_STATUSES)
+                .values_list("pk", "pix_status")
+            )
+        pledges = [
+            DonationPledge(
+                id=pledge_id,
+                pix_status=DonationPaymentStatus.CONFIRMED,
+                pix_confirmed_at=now,
+                pix_last_checked_at=now,
+                pix_transaction_code=codes[pledge_id],
+                updated_at=now,
+            )
+            for pledge_id in codes
+            if pledge_id in statuses
+        ]
+        DonationPledge.objects.bulk_update(pledges, fields, batch_size=UPDATE_BATCH_SIZE)
+        # bulk_update não passa pelo save(): os totais do mural são atualizados aqui, na mesma transação.
+        added = [wall_contributions[pledge.id] for pledge in pledges if pledge.id in (wall_contributions or {})]
+        if added:
+            apply_wall_changes(added=added)
+    for pledge in pledges:
+        record_pledge_transition(statuses[pledge.id], DonationPaymentStatus.CONFIRMED)
+    return set(statuses)
@@ -0,0 +1,216 @@
+import threading
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import (
+    DonationDailyRollup,
+    DonationPaymentStatus,
+    DonationPledge,
+    Feedback,
+    FeedbackDailyRollup,
+    FeedbackStatus,
+    FeedbackTopic,
+    RollupWatermark,
+)
+
+# Janela relida a cada execução: cobre transações que gravaram updated_at antigo mas commitaram depois.
+WATERMARK_OVERLAP = timedelta(minutes=5)
+DAYS_PER_QUERY = 100
+
+
+@dataclass(frozen=True)
+class RollupSpec:
+    name: str
+    source: type
+    target: type
+    keys: tuple
+    measures: dict
+
+
+ROLLUPS = (
+    RollupSpec(
+        "feedback",
+        Feedback,
+        FeedbackDailyRollup,
+        keys=("topic", "status"),
+        measures={"total": Count("id"), "impact_sum": Sum("impact_rating")},
+    ),
+    RollupSpec(
+        "donations",
+        DonationPledge,
+        DonationDailyRollup,
+        keys=("currency", "pix_status", "is_recurring"),
+        measures={"total": Count("id"), "amount_sum": Sum("amount")},
+    ),
+)
+
+
+def _day_bounds(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def _day_filter(days):
+    # Intervalos de created_at em vez de created_at__date: o índice de created_at continua utilizável.
+    condition = Q()
+    for day in days:
+        start, end = _day_bounds(day)
+        condition |= Q(created_at__gte=start, created_at__lt=end)
+    return condition
+
+
+def _aggregate(spec, queryset):
+    return (
+        queryset.order_by()
+        .annotate(day=TruncDate("created_at", tzinfo=timezone.get_current_timezone()))
+        .values("day", *spec.keys)
+        .annotate(**spec.measures)
+    )
+
+
+def _replace_days(spec, queryset, days=None):
+    rows = [spec.target(**row) for row in _aggregate(spec, queryset)]
+    with transaction.atomic():
+        stale = spec.target.objects.all() if days is None else spec.target.objects.filter(day__in=days)
+        stale.delete()
+        spec.target.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+
+def build_rollup(spec, full=False):
+    """Reconsolida os dias com linhas alteradas desde a última marca; devolve (dias, linhas gravadas)."""
+    watermark, _ = RollupWatermark.objects.get_or_create(name=spec.name)
+    changed = spec.source.objects.all()
+    if watermark.processed_until and not full:
+        changed = changed.filter(updated_at__gt=watermark.processed_until - WATERMARK_OVERLAP)
+    newest = changed.aggregate(newest=Max("updated_at"))["newest"]
+    if newest is None:
+        return 0, 0
+
+    if full or watermark.processed_until is None:
+        days = None
+        written = _replace_days(spec, spec.source.objects.all())
+        day_count = spec.target.objects.values("day").distinct().count()
+    else:
+        days = sorted(
+            changed.order_by()
+            .annotate(day=TruncDate("created_at", tzinfo=timezone.get_current_timezone()))
+            .values_list("day", flat=True)
+            .distinct()
+        )
+        written = 0
+        for offset in range(0, len(days), DAYS_PER_QUERY):
+            chunk = days[offset:offset + DAYS_PER_QUERY]
+            written += _replace_days(spec, spec.source.objects.filter(_day_filter(chunk)), chunk)
+        day_count = len(days)
+
+    RollupWatermark.objects.filter(pk=watermark.pk).update(
+        processed_until=max(newest, watermark.processed_until or newest),
+        built_at=timezone.now(),
+    )
+    return day_count, written
+
+
+def build_rollups(full=False):
+    return {spec.name: build_rollup(spec, full=full) for spec in ROLLUPS}
+
+
+# Dias a reconsolidar por rollup, acumulados até o commit: exclusão em lote ou em cascata vira um recálculo por dia.
+_deleted_days = threading.local()
+
+
+def _pending_days():
+    if not hasattr(_deleted_days, "by_spec"):
+        _deleted_days.by_spec = {}
+    return _deleted_days.by_spec
+
+
+def refresh_deleted(instance):
+    """Exclusões não deixam updated_at para trás: o dia da linha removida é reconsolidado no commit."""
+    spec = next(spec for spec in ROLLUPS if isinstance(instance, spec.source))
+    _pending_days().setdefault(spec.name, set()).add(timezone.localtime(instance.created_at).date())
+    # Um callback por exclusão, mas só o primeiro encontra dias pendentes; os demais não fazem nada.
+    transaction.on_commit(refresh_pending_days)
+
+
+def refresh_pending_days():
+    pending = _pending_days()
+    jobs = dict(pending)
+    pending.clear()
+    for spec in ROLLUPS:
+        days = sorted(jobs.get(spec.name, ()))
+        if not days or not RollupWatermark.objects.filter(name=spec.name, processed_until__isnull=False).exists():
+            continue
+        for offset in range(0, len(days), DAYS_PER_QUERY):
+            chunk = days[offset:offset + DAYS_PER_QUERY]
+            _replace_days(spec, spec.source.objects.filter(_day_filter(chunk)), chunk)
+
+
+def _bars(rows, label_for):
+    peak = max((value for _, value in rows), default=0) or 1
+    return [{"label": label_for(key), "value": value, "percent": round(100 * value / peak)} for key, value in rows]
+
+
+def dashboard_data(today=None, weeks=12, days=30, currency="BRL"):
+    """Séries do painel de tendências lidas só das tabelas de rollup."""
+    today = today or timezone.localdate()
+    first_week = today - timedelta(days=today.weekday(), weeks=weeks - 1)
+    week_starts = [first_week + timedelta(weeks=index) for index in range(weeks)]
+    weekly = {}
+    for day, topic, total in (
+        FeedbackDailyRollup.objects.filter(day__gte=first_week)
+        .values("day", "topic")
+        .annotate(count=Sum("total"))
+        .values_list("day", "topic", "count")
+    ):
+        week = day - timedelta(days=day.weekday())
+        weekly[(topic, week)] = weekly.get((topic, week), 0) + total
+    peak = max(weekly.values(), default=0) or 1
+    topic_rows = [
+        {
+            "label": label,
+            "cells": [
+                {"value": weekly.get((topic, week), 0), "percent": round(100 * weekly.get((topic, week), 0) / peak)}
+                for week in week_starts
+            ],
+        }
+        for topic, label in FeedbackTopic.choices
+    ]
+
+    first_day = today - timedelta(days=days - 1)
+    confirmed = dict(
+        DonationDailyRollup.objects.filter(day__gte=first_day, currency=currency, pix_status=DonationPaymentStatus.CONFIRMED)
+        .values("day")
+        .annotate(amount=Sum("amount_sum"))
+        .values_list("day", "amount")
+    )
+    daily = [(first_day + timedelta(days=index), confirmed.get(first_day + timedelta(days=index), 0)) for index in range(days)]
+
+    feedback_status = dict(FeedbackDailyRollup.objects.values("status").annotate(count=Sum("total")).values_list("status", "count"))
+    donation_status = (
+        DonationDailyRollup.objects.filter(currency=currency)
+        .values("pix_status", "is_recurring")
+        .annotate(count=Sum("total"), amount=Sum("amount_sum"))
+        .order_by("pix_status", "is_recurring")
+    )
+    status_labels = dict(DonationPaymentStatus.choices)
+    return {
+        "weeks": week_starts,
+        "topic_rows": topic_rows,
+        "daily_confirmed": _bars(daily, lambda day: day),
+        "feedback_status": _bars(
+            [(status, feedback_status.get(status, 0)) for status in FeedbackStatus.values],
+            lambda status: FeedbackStatus(status).label,
+        ),
+        "donation_status": [
+            {**row, "label": f"{status_labels.get(row['pix_status'], row['pix_status'])}{' · recorrente' if row['is_recurring'] else ''}"}
+            for row in donation_status
+        ],
+        "currency": currency,
+        "watermarks": RollupWatermark.objects.order_by("name"),
+    }
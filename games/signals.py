@@ -0,0 +1,89 @@
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import caching
+from .imaging import build_derivatives, delete_derivatives
+from .models import DonationPledge, FAQCategory, FAQEntry, Feedback, Game
+from .rollups import refresh_deleted
+from .similarity import index_feedback
+from .supporters import apply_wall_changes
+
+logger = logging.getLogger(__name__)
+
+GAME_MEDIA_FIELDS = ("cover_image_upload", "hero_image_upload")
+
+
+@receiver(pre_save, sender=Game)
+def remember_game_media(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        return
+    stored = Game.objects.filter(pk=instance.pk).values_list(*GAME_MEDIA_FIELDS).first() or ()
+    instance._replaced_media = [
+        (field, name) for field, name in zip(GAME_MEDIA_FIELDS, stored) if name and name != getattr(instance, field).name
+    ]
+
+
+@receiver(post_save, sender=Game)
+def refresh_game_media(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    for field, name in instance.__dict__.pop("_replaced_media", ()):
+        delete_derivatives(getattr(instance, field).storage, name)
+    for field in GAME_MEDIA_FIELDS:
+        try:
+            build_derivatives(getattr(instance, field))
+        except OSError:
+            # Arquivo que o Pillow não consegue decodificar (ex.: JPEG cortado): fica só o original, sem variantes.
+            logger.warning("Variantes de %s não geradas", getattr(instance, field).name, exc_info=True)
+    # Como FAQ e métricas: antes do commit, outra requisição gravaria as linhas antigas sob a versão nova.
+    transaction.on_commit(caching.catalog.bump)
+
+
+@receiver(post_delete, sender=Game)
+def drop_game_detail(sender, instance, **kwargs):
+    for field in GAME_MEDIA_FIELDS:
+        if getattr(instance, field):
+            delete_derivatives(getattr(instance, field).storage, getattr(instance, field).name)
+    transaction.on_commit(caching.catalog.bump)
+
+
+@receiver(post_save, sender=FAQCategory)
+@receiver(post_save, sender=FAQEntry)
+@receiver(post_delete, sender=FAQCategory)
+@receiver(post_delete, sender=FAQEntry)
+def invalidate_faq_cache(sender, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(caching.faq.bump)
+
+
+@receiver(post_save, sender=Feedback)
+@receiver(post_save, sender=DonationPledge)
+@receiver(post_delete, sender=Feedback)
+@receiver(post_delete, sender=DonationPledge)
+def invalidate_metrics_cache(sender, raw=False, **kwargs):
+    # Métricas do portal: a nova versão só vale depois do commit (o mural tem namespace próprio).
+    if not raw:
+        transaction.on_commit(caching.metrics.bump)
+
+
+@receiver(post_delete, sender=DonationPledge)
+def drop_wall_contribution(sender, instance, **kwargs):
+    contribution = instance.wall_contribution()
+    if contribution:
+        apply_wall_changes(removed=[contribution])
+
+
+@receiver(post_delete, sender=Feedback)
+@receiver(post_delete, sender=DonationPledge)
+def refresh_rollup_day(sender, instance, **kwargs):
+    refresh_deleted(instance)
+
+
+@receiver(post_save, sender=Feedback)
+def index_feedback_similarity(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not {"title", "message"} & set(update_fields)):
+        return
+    index_feedback(instance)
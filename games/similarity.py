@@ -0,0 +1,111 @@
+import hashlib
+import random
+import re
+import struct
+import unicodedata
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Feedback, FeedbackBucket
+
+# 16 bandas x 4 linhas: pares com Jaccard ~0,5 caem no mesmo balde em ~65% dos casos, com ~0,8 em ~99%.
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+SHINGLE_SIZE = 3
+SIMILARITY_THRESHOLD = 0.5
+MAX_CANDIDATES = 200
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 64) - 1
+_rng = random.Random(20240611)
+# Parâmetros fixos: mudar a semente invalida todas as assinaturas gravadas.
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(NUM_PERMUTATIONS)]
+_SIGNATURE_FORMAT = f"<{NUM_PERMUTATIONS}Q"
+_WORD_RE = re.compile(r"\w+")
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def shingles(text: str) -> set[str]:
+    """Trigramas de palavras do texto sem acentos e em minúsculas (palavras soltas em textos curtos)."""
+    normalized = unicodedata.normalize("NFKD", text.lower())
+    words = _WORD_RE.findall("".join(char for char in normalized if not unicodedata.combining(char)))
+    if len(words) < SHINGLE_SIZE:
+        return set(words)
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def minhash(items: set[str]) -> tuple[int, ...]:
+    hashes = [_hash64(item) for item in items]
+    if not hashes:
+        return (_MAX_HASH,) * NUM_PERMUTATIONS
+    return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def feedback_signature(title: str, message: str) -> tuple[int, ...]:
+    return minhash(shingles(f"{title} {message}"))
+
+
+def pack_signature(signature) -> bytes:
+    return struct.pack(_SIGNATURE_FORMAT, *signature)
+
+
+def unpack_signature(data) -> tuple[int, ...]:
+    return struct.unpack(_SIGNATURE_FORMAT, bytes(data))
+
+
+def band_buckets(signature) -> list[tuple[int, int]]:
+    """(banda, balde) de cada faixa da assinatura; balde é um hash de 63 bits (cabe em BigIntegerField)."""
+    buckets = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(struct.pack(f"<{ROWS_PER_BAND}Q", *rows), digest_size=8).digest()
+        buckets.append((band, int.from_bytes(digest, "little") >> 1))
+    return buckets
+
+
+def estimated_similarity(first, second) -> float:
+    return sum(1 for a, b in zip(first, second) if a == b) / NUM_PERMUTATIONS
+
+
+def similar_feedback(signature, exclude_id=None, threshold=SIMILARITY_THRESHOLD, limit=5):
+    """Feedbacks parecidos com a assinatura: ids dos baldes em comum (um lookup indexado por banda) e confirmação pela assinatura."""
+    lookup = Q()
+    for band, bucket in band_buckets(signature):
+        lookup |= Q(band=band, bucket=bucket)
+    candidates = FeedbackBucket.objects.filter(lookup)
+    if exclude_id is not None:
+        candidates = candidates.exclude(feedback_id=exclude_id)
+    candidate_ids = list(candidates.values_list("feedback_id", flat=True).distinct()[:MAX_CANDIDATES])
+    scored = []
+    for feedback_id, stored in Feedback.objects.filter(id__in=candidate_ids).values_list("id", "minhash"):
+        if stored:
+            score = estimated_similarity(signature, unpack_signature(stored))
+            if score >= threshold:
+                scored.append((score, feedback_id))
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    return scored[:limit]
+
+
+def index_feedback(feedback):
+    """Grava assinatura e baldes LSH do feedback e o liga ao cluster do parecido mais antigo."""
+    signature = feedback_signature(feedback.title, feedback.message)
+    matches = similar_feedback(signature, exclude_id=feedback.pk)
+    root_id = None
+    if matches:
+        earliest = min(feedback_id for _, feedback_id in matches)
+        if earliest < feedback.pk:
+            root_id = Feedback.objects.filter(pk=earliest).values_list("duplicate_of_id", flat=True).first() or earliest
+    with transaction.atomic():
+        Feedback.objects.filter(pk=feedback.pk).update(minhash=pack_signature(signature), duplicate_of_id=root_id)
+        FeedbackBucket.objects.filter(feedback_id=feedback.pk).delete()
+        FeedbackBucket.objects.bulk_create(
+            FeedbackBucket(feedback_id=feedback.pk, band=band, bucket=bucket) for band, bucket in band_buckets(signature)
+        )
+    feedback.minhash = pack_signature(signature)
+    feedback.duplicate_of_id = root_id
+    return matches
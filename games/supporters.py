@@ -0,0 +1,77 @@
+from collections import defaultdict
+from decimal import Decimal
+from functools import partial
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import caching
+from .models import SupporterTotal
+
+WALL_CURRENCY = "BRL"
+RANKING_SIZE = 10
+WALL_SIZE = 60
+# Sem nome cadastrado o mural não usa o username: contas importadas antigas têm o e-mail nele.
+ANONYMOUS_SUPPORTER = "Apoiador anônimo"
+
+
+def apply_wall_changes(*, removed=(), added=()):
+    """Soma/subtrai contribuições (usuário, moeda, valor) nos totais correntes e publica nova versão do mural."""
+    deltas = defaultdict(lambda: [Decimal("0"), 0])
+    for sign, contributions in ((-1, removed), (1, added)):
+        for user_id, currency, amount in contributions:
+            delta = deltas[(user_id, currency)]
+            delta[0] += sign * amount
+            delta[1] += sign
+    deltas = {key: delta for key, delta in deltas.items() if delta[0] or delta[1]}
+    if not deltas:
+        return
+    now = timezone.now()
+    with transaction.atomic():
+        for (user_id, currency), (amount, count) in deltas.items():
+            changes = {"total_amount": F("total_amount") + amount, "pledge_count": F("pledge_count") + count}
+            if count > 0:
+                changes["last_confirmed_at"] = now
+            totals = SupporterTotal.objects.filter(user_id=user_id, currency=currency)
+            if totals.update(**changes):
+                continue
+            try:
+                with transaction.atomic():
+                    SupporterTotal.objects.create(
+                        user_id=user_id,
+                        currency=currency,
+                        total_amount=amount,
+                        pledge_count=count,
+                        last_confirmed_at=now if count > 0 else None,
+                    )
+            except IntegrityError:
+                # Outro processo criou a linha entre o UPDATE e o INSERT.
+                totals.update(**changes)
+    # Só depois do commit: quem reconstruir o mural na nova versão já enxerga os totais novos.
+    transaction.on_commit(caching.wall.bump)
+
+
+def _display_name(first_name):
+    return first_name.strip() or ANONYMOUS_SUPPORTER
+
+
+def _supporters(queryset):
+    return [
+        {"name": _display_name(first_name), "total": total, "pledges": pledges}
+        for first_name, total, pledges in queryset.values_list("user__first_name", "total_amount", "pledge_count")
+    ]
+
+
+def build_supporter_wall(currency=WALL_CURRENCY):
+    """Ranking e apoiadores recentes: leituras top-N nos índices de SupporterTotal, sem varrer promessas."""
+    visible = SupporterTotal.objects.filter(currency=currency, total_amount__gt=0)
+    return {
+        "currency": currency,
+        "ranking": _supporters(visible.order_by("-total_amount", "user_id")[:RANKING_SIZE]),
+        "recent": _supporters(visible.order_by("-last_confirmed_at", "user_id")[:WALL_SIZE]),
+    }
+
+
+async def cached_supporter_wall(currency=WALL_CURRENCY):
+    return await caching.wall.aget_or_set(currency, partial(build_supporter_wall, currency))
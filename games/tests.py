@@ -1,13 +1,67 @@
+import asyncio
+import csv
+import io
+import json
+import os
+import queue
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connections
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.db.models.functions import Lower
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.http import urlencode
 
-from .models import DonationPledge, FAQCategory, FAQEntry, Feedback
+from SelvaCoreWeb.assets import minify_css
+from SelvaCoreWeb.prefork import memory_usage
+from SelvaCoreWeb.routers import ReadReplicaRouter, read_only_traffic
+
+from . import caching, reconciliation, rollups, similarity, views
+from .forms import BoundedImageField
+from .management.commands.build_critical_css import CRITICAL_CSS_BUDGET, CRITICAL_CSS_TEMPLATES, compressed_size
+from .models import (
+    DonationDailyRollup,
+    DonationPaymentStatus,
+    DonationPledge,
+    DonationVisibility,
+    EmailVerification,
+    FAQCategory,
+    FAQEntry,
+    Feedback,
+    FeedbackBucket,
+    FeedbackDailyRollup,
+    Game,
+    SupporterTotal,
+)
+from .rollups import build_rollups
+from .triage import bulk_triage
 
 
 class CommunityPortalTests(TestCase):
     def setUp(self):
+        caching.clear()
         self.category = FAQCategory.objects.create(slug="geral", title="Geral", description="Visão macro")
         FAQEntry.objects.create(
             category=self.category,
@@ -82,3 +136,1141 @@ class CommunityPortalTests(TestCase):
         pledge = DonationPledge.objects.first()
         self.assertEqual(pledge.user, self.user)
         self.assertTrue(pledge.is_recurring)
+
+    def test_donation_status_lists_pix_qr_code(self):
+        DonationPledge.objects.create(user=self.user, amount="20.00")
+        self.client.login(username="tester", password="segredo123")
+        response = self.client.get(reverse("donate"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["user_donations"]), 1)
+        self.assertContains(response, "<svg")
+
+
+class HomeViewTests(TestCase):
+    def setUp(self):
+        caching.clear()
+        Game.objects.create(title="Capivara Rafaela", slug="capivara-rafaela", is_featured=True)
+        Game.objects.create(title="Selva Antiga", slug="selva-antiga", release_date=date(2024, 5, 1))
+        Game.objects.create(title="Projeto Oculto", slug="projeto-oculto")
+
+    def test_views_are_async(self):
+        self.assertTrue(asyncio.iscoroutinefunction(views.home))
+        self.assertTrue(asyncio.iscoroutinefunction(views.community_portal))
+
+    def test_home_splits_catalog_around_featured_game(self):
+        response = self.client.get(reverse("home"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["featured_game"].slug, "capivara-rafaela")
+        self.assertEqual(response.context["total_games"], 3)
+        self.assertEqual([g.slug for g in response.context["released_games"]], ["selva-antiga"])
+        self.assertEqual([g.slug for g in response.context["unrevealed_games"]], ["projeto-oculto"])
+
+
+class SqliteProfileTests(SimpleTestCase):
+    def _open(self, path, alias):
+        # Mesmas opções do perfil de produção, que é o único a ligar o WAL.
+        options = connections.settings["default"]["OPTIONS"]
+        init_command = ";".join([settings.SQLITE_WAL_PRAGMA, *settings.SQLITE_PRAGMAS])
+        settings_dict = {**connections.settings["default"], "NAME": str(path), "OPTIONS": {**options, "init_command": init_command}}
+        return DatabaseWrapper(settings_dict, alias=alias)
+
+    @override_settings(DATABASE_READ_REPLICA="replica")
+    def test_router_sends_only_read_only_traffic_to_replica(self):
+        router = ReadReplicaRouter()
+        self.assertIsNone(router.db_for_read(Game))
+        with read_only_traffic():
+            self.assertEqual(router.db_for_read(Game), "replica")
+            self.assertEqual(router.db_for_write(Game), "default")
+
+    def test_concurrent_reads_and_writes_do_not_lock(self):
+        writers, readers, rows_per_writer = 4, 4, 40
+        errors = []
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "stress.sqlite3"
+            setup = self._open(path, "stress_setup")
+            with setup.cursor() as cursor:
+                cursor.execute("PRAGMA journal_mode")
+                self.assertEqual(cursor.fetchone()[0], "wal")
+                cursor.execute("CREATE TABLE item (id INTEGER PRIMARY KEY, value TEXT)")
+
+            def write(n):
+                conn = self._open(path, f"stress_writer_{n}")
+                try:
+                    for i in range(rows_per_writer):
+                        with conn.cursor() as cursor:
+                            cursor.execute("INSERT INTO item (value) VALUES (%s)", [f"{n}-{i}"])
+                except Exception as exc:
+                    errors.append(exc)
+                finally:
+                    conn.close()
+
+            def read(n):
+                conn = self._open(path, f"stress_reader_{n}")
+                try:
+                    for _ in range(rows_per_writer):
+                        with conn.cursor() as cursor:
+                            cursor.execute("SELECT COUNT(*) FROM item")
+                            cursor.fetchone()
+                except Exception as exc:
+                    errors.append(exc)
+                finally:
+                    conn.close()
+
+            threads = [threading.Thread(target=write, args=(n,)) for n in range(writers)]
+            threads += [threading.Thread(target=read, args=(n,)) for n in range(readers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            with setup.cursor() as cursor:
+                cursor.execute("SELECT COUNT(*) FROM item")
+                total = cursor.fetchone()[0]
+            setup.close()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(total, writers * rows_per_writer)
+
+
+class StaticPipelineTests(SimpleTestCase):
+    def test_minify_css_keeps_calc_expressions(self):
+        css = "/* topo */\n.card > a {\n  width: calc(100% - 12px);\n  color: red;\n}\n"
+        self.assertEqual(minify_css(css), ".card > a{width:calc(100% - 12px);color:red}")
+
+    def test_collectstatic_outputs_hashed_precompressed_assets(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            storages = {
+                "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+                "staticfiles": {"BACKEND": "SelvaCoreWeb.assets.PrecompressedManifestStaticFilesStorage"},
+            }
+            with override_settings(STATIC_ROOT=tmp, STORAGES=storages):
+                call_command("collectstatic", interactive=False, verbosity=0)
+                hashed_css = staticfiles_storage.stored_name("css/main.css")
+                source_size = (Path(__file__).resolve().parent.parent / "static/css/main.css").stat().st_size
+                self.assertRegex(hashed_css, r"^css/main\.[0-9a-f]{12}\.css$")
+                self.assertLess((Path(tmp) / hashed_css).stat().st_size, source_size)
+                self.assertTrue((Path(tmp) / f"{hashed_css}.gz").exists())
+                hashed_js = staticfiles_storage.stored_name("js/main.js")
+
+                # Segunda execução: STATIC_ROOT já tem as cópias minificadas, e nome/conteúdo não podem mudar.
+                call_command("collectstatic", interactive=False, verbosity=0)
+                self.assertEqual(staticfiles_storage.stored_name("css/main.css"), hashed_css)
+                self.assertEqual(staticfiles_storage.stored_name("js/main.js"), hashed_js)
+
+                response = self.client.get(f"/static/{hashed_css}", HTTP_ACCEPT_ENCODING="gzip, deflate")
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response["Content-Encoding"], "gzip")
+                self.assertEqual(response["Content-Type"], "text/css")
+                self.assertIn("immutable", response["Cache-Control"])
+                response.close()
+
+                plain = self.client.get("/static/css/main.css", HTTP_ACCEPT_ENCODING="identity")
+                self.assertNotIn("Content-Encoding", plain)
+                self.assertNotIn("immutable", plain["Cache-Control"])
+                plain.close()
+
+
+class CriticalCssTests(SimpleTestCase):
+    critical_dir = Path(__file__).resolve().parent.parent / "templates" / "critical"
+
+    def test_inlined_blocks_stay_under_budget(self):
+        for name in CRITICAL_CSS_TEMPLATES:
+            with self.subTest(name=name):
+                critical = (self.critical_dir / f"{name}.css").read_text(encoding="utf-8")
+                self.assertLessEqual(compressed_size(critical), CRITICAL_CSS_BUDGET)
+                self.assertNotIn("@keyframes", critical)
+                self.assertNotIn(":hover", critical)
+
+    def test_build_fails_when_a_page_exceeds_budget(self):
+        with tempfile.TemporaryDirectory() as tmp, mock.patch(
+            "games.management.commands.build_critical_css.CRITICAL_CSS_BUDGET", 1024
+        ):
+            with self.assertRaisesMessage(CommandError, "acima do orçamento"):
+                call_command("build_critical_css", output=tmp, stdout=io.StringIO())
+
+    def test_generated_blocks_match_stylesheet(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            call_command("build_critical_css", output=tmp, stdout=io.StringIO())
+            for name in CRITICAL_CSS_TEMPLATES:
+                with self.subTest(name=name):
+                    self.assertEqual(
+                        (Path(tmp) / f"{name}.css").read_text(encoding="utf-8"),
+                        (self.critical_dir / f"{name}.css").read_text(encoding="utf-8"),
+                        "Rode `manage.py build_critical_css` após alterar main.css ou os templates.",
+                    )
+
+
+class CriticalCssRenderTests(TestCase):
+    def test_login_inlines_critical_css_and_defers_stylesheet(self):
+        response = self.client.get(reverse("login"))
+        self.assertContains(response, "<style data-critical-css>:root{")
+        self.assertContains(response, ".auth-card{")
+        self.assertContains(response, 'rel="preload"')
+        self.assertNotContains(response, "{% verbatim %}")
+
+
+class ConditionalPageTests(TestCase):
+    def setUp(self):
+        self.game = Game.objects.create(title="Capivara Rafaela", slug="capivara-rafaela", is_featured=True)
+
+    def test_revalidation_returns_304_with_a_single_query(self):
+        first = self.client.get(reverse("home"))
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("Last-Modified", first)
+        with self.assertNumQueries(1):
+            revalidated = self.client.get(reverse("home"), HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_catalog_change_invalidates_etag(self):
+        etag = self.client.get(reverse("home"))["ETag"]
+        self.game.title = "Capivara Rafaela II"
+        self.game.save()
+        response = self.client.get(reverse("home"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_portal_etag_tracks_new_feedback(self):
+        etag = self.client.get(reverse("faq"))["ETag"]
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(reverse("faq"), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        user = get_user_model().objects.create_user(username="tester", email="tester@example.com", password="segredo123")
+        with self.captureOnCommitCallbacks(execute=True):
+            Feedback.objects.create(user=user, title="Sugestão nova", message="Mensagem privada que muda as métricas.")
+        self.assertEqual(self.client.get(reverse("faq"), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_authenticated_visitors_always_get_a_full_render(self):
+        get_user_model().objects.create_user(username="tester", email="tester@example.com", password="segredo123")
+        self.client.login(username="tester", password="segredo123")
+        response = self.client.get(reverse("faq"))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response)
+
+
+class MediaDeliveryTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.media_root = Path(tmp.name) / "media"
+        (self.media_root / "games" / "covers").mkdir(parents=True)
+        (self.media_root / "games" / "covers" / "capa.png").write_bytes(b"0123456789")
+        (Path(tmp.name) / "segredo.txt").write_text("fora do MEDIA_ROOT")
+        override = override_settings(MEDIA_ROOT=self.media_root, MEDIA_ACCEL="")
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_full_and_ranged_requests(self):
+        response = self.client.get("/media/games/covers/capa.png")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), b"0123456789")
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+
+        partial = self.client.get("/media/games/covers/capa.png", HTTP_RANGE="bytes=2-5")
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial["Content-Range"], "bytes 2-5/10")
+        self.assertEqual(b"".join(partial.streaming_content), b"2345")
+
+        suffix = self.client.get("/media/games/covers/capa.png", HTTP_RANGE="bytes=-3")
+        self.assertEqual(b"".join(suffix.streaming_content), b"789")
+
+        outside = self.client.get("/media/games/covers/capa.png", HTTP_RANGE="bytes=20-")
+        self.assertEqual(outside.status_code, 416)
+        self.assertEqual(outside["Content-Range"], "bytes */10")
+
+    def test_ranged_head_does_not_open_the_file(self):
+        path = str(self.media_root / "games" / "covers" / "capa.png")
+        open_handles = lambda: sum(1 for fd in Path("/proc/self/fd").iterdir() if os.path.realpath(fd) == path)
+        response = self.client.head("/media/games/covers/capa.png", HTTP_RANGE="bytes=2-5")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(open_handles(), 0)
+        response.close()
+
+    def test_conditional_request_and_traversal(self):
+        etag = self.client.get("/media/games/covers/capa.png")["ETag"]
+        self.assertEqual(self.client.get("/media/games/covers/capa.png", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get("/media/../segredo.txt").status_code, 404)
+        self.assertEqual(self.client.get("/media/games/%2E%2E/%2E%2E/segredo.txt").status_code, 404)
+
+    def test_nginx_offload_returns_only_headers(self):
+        with override_settings(MEDIA_ACCEL="nginx", MEDIA_ACCEL_PREFIX="/_protected-media/"):
+            response = self.client.get("/media/games/covers/capa.png")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Accel-Redirect"], "/_protected-media/games/covers/capa.png")
+        self.assertEqual(response.content, b"")
+
+
+class WarmupTests(TestCase):
+    def test_warmup_reports_every_step_and_fills_template_cache(self):
+        from django.template import engines
+
+        out = io.StringIO()
+        call_command("warmup", stdout=out)
+        output = out.getvalue()
+        for label in ("imports", "templates", "urls", "catalog", "faq"):
+            self.assertIn(f"{label}: ", output)
+        cached_loader = engines["django"].engine.template_loaders[0]
+        self.assertIn("games/home.html", {key.split("-")[0] for key in cached_loader.get_template_cache})
+
+
+class ImportTimeBudgetTests(SimpleTestCase):
+    heavy_modules = ("qrcode", "PIL")
+
+    def _importtime(self, *args):
+        env = {key: value for key, value in os.environ.items() if key != "SELVA_WARMUP"}
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", *args],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        modules = {}
+        total_us = 0
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            _, cumulative, name = line.split("|")
+            if not cumulative.strip().isdigit():
+                continue
+            modules[name.strip()] = int(cumulative)
+            if not name.startswith("  "):
+                total_us += int(cumulative)
+        return modules, total_us / 1000
+
+    def test_wsgi_import_skips_heavy_modules_and_fits_budget(self):
+        modules, total_ms = self._importtime("-c", "import SelvaCoreWeb.wsgi")
+        for heavy in self.heavy_modules:
+            self.assertNotIn(heavy, modules)
+        self.assertLessEqual(total_ms, settings.IMPORT_TIME_BUDGETS_MS["wsgi"])
+
+    def test_manage_check_skips_qrcode_and_fits_budget(self):
+        modules, total_ms = self._importtime("manage.py", "check")
+        self.assertNotIn("qrcode", modules)
+        self.assertLessEqual(total_ms, settings.IMPORT_TIME_BUDGETS_MS["check"])
+
+
+class GameDetailTests(TestCase):
+    def setUp(self):
+        caching.clear()
+        self.game = Game.objects.create(
+            title="Capivara Rafaela",
+            slug="capivara-rafaela",
+            platforms="PC, Switch",
+            long_description="Uma longa jornada pela selva.",
+        )
+
+    def test_detail_is_cached_per_version(self):
+        url = reverse("game_detail", args=[self.game.slug])
+        caching.clear()
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertContains(response, "Uma longa jornada pela selva.")
+        self.assertContains(response, "<span>Switch</span>", html=True)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+        self.game.tagline = "Nova temporada"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.game.save()
+        self.assertContains(self.client.get(url), "Nova temporada")
+
+    def test_unknown_slug_returns_404(self):
+        self.assertEqual(self.client.get(reverse("game_detail", args=["nao-existe"])).status_code, 404)
+
+    def _image(self, name, size, image_format):
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        Image.new("RGB", size, "green").save(buffer, format=image_format)
+        return SimpleUploadedFile(name, buffer.getvalue())
+
+    def test_upload_builds_derivatives_without_upscaling(self):
+        with tempfile.TemporaryDirectory() as tmp, override_settings(MEDIA_ROOT=tmp):
+            self.game.cover_image_upload = self._image("capa.png", (1200, 600), "PNG")
+            self.game.save()
+            derivatives = sorted(p.name for p in (Path(tmp) / "games" / "covers" / "derivatives").iterdir())
+            self.assertEqual(derivatives, ["capa.png-480w.webp", "capa.png-960w.webp"])
+            response = self.client.get(reverse("game_detail", args=[self.game.slug]))
+            self.assertContains(response, "capa.png-960w.webp 960w")
+
+    def test_replacing_upload_removes_old_derivatives(self):
+        from PIL import ImageFile
+
+        with tempfile.TemporaryDirectory() as tmp, override_settings(MEDIA_ROOT=tmp):
+            self.game.cover_image_upload = self._image("capa.png", (1200, 600), "PNG")
+            self.game.save()
+            self.game.cover_image_upload = self._image("capa.jpg", (600, 300), "JPEG")
+            self.game.save()
+            derivatives = sorted(p.name for p in (Path(tmp) / "games" / "covers" / "derivatives").iterdir())
+            self.assertEqual(derivatives, ["capa.jpg-480w.webp"])
+            # Sem largura que caiba no original, salvar de novo não decodifica a imagem.
+            self.game.cover_image_upload = self._image("pequena.png", (300, 150), "PNG")
+            self.game.save()
+            with mock.patch.object(ImageFile.ImageFile, "load", side_effect=AssertionError("decodificou")):
+                self.game.save()
+
+    def test_undecodable_upload_keeps_the_save(self):
+        data = self._image("capa.jpg", (1200, 600), "JPEG").read()
+        with tempfile.TemporaryDirectory() as tmp, override_settings(MEDIA_ROOT=tmp):
+            self.game.cover_image_upload = SimpleUploadedFile("capa.jpg", data[: len(data) // 3])
+            with self.assertLogs("games.signals", "WARNING"):
+                self.game.save()
+            self.assertFalse((Path(tmp) / "games" / "covers" / "derivatives").exists())
+
+
+class CatalogApiTests(TestCase):
+    def setUp(self):
+        Game.objects.create(title="Capivara Rafaela", slug="capivara-rafaela", platforms="PC, Switch", genre="Aventura")
+        Game.objects.create(title="Selva Antiga", slug="selva-antiga", platforms="PC", status="released")
+        Game.objects.create(title="Projeto Oculto", slug="projeto-oculto", platforms="Xbox")
+        category = FAQCategory.objects.create(slug="geral", title="Geral")
+        FAQEntry.objects.create(category=category, question="Pública?", answer="Sim.")
+        FAQEntry.objects.create(category=category, question="Interna?", answer="Não.", audience=FAQEntry.Audience.TEAM)
+
+    def test_sparse_fields_and_keyset_pages(self):
+        url = reverse("api_games")
+        with self.assertNumQueries(2):
+            first = self.client.get(url, {"fields": "slug,title", "limit": 2}).json()
+        self.assertEqual(first["results"][0], {"slug": "capivara-rafaela", "title": "Capivara Rafaela"})
+        self.assertEqual(len(first["results"]), 2)
+        second = self.client.get(first["next"]).json()
+        self.assertEqual([row["slug"] for row in second["results"]], ["projeto-oculto"])
+        self.assertIsNone(second["next"])
+        self.assertEqual(self.client.get(url, {"fields": "senha"}).status_code, 400)
+
+    def test_filters_and_faq_visibility(self):
+        slugs = lambda params: [row["slug"] for row in self.client.get(reverse("api_games"), params).json()["results"]]
+        self.assertEqual(slugs({"platforms": "pc"}), ["capivara-rafaela", "selva-antiga"])
+        self.assertEqual(slugs({"status": "released"}), ["selva-antiga"])
+        self.assertEqual(slugs({"genre": "aventura"}), ["capivara-rafaela"])
+        questions = [row["question"] for row in self.client.get(reverse("api_faq")).json()["results"]]
+        self.assertEqual(questions, ["Pública?"])
+
+    def test_etag_revalidates_until_a_game_changes(self):
+        url = reverse("api_games")
+        etag = self.client.get(url)["ETag"]
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        Game.objects.filter(slug="selva-antiga").first().save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_faq_etag_tracks_category_renames(self):
+        url = reverse("api_faq")
+        etag = self.client.get(url)["ETag"]
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        category = FAQCategory.objects.get(slug="geral")
+        category.title = "Perguntas gerais"
+        category.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.staff = get_user_model().objects.create_superuser("equipe", "equipe@selva.dev", "senha-segura-123")
+        self.user = get_user_model().objects.create_user("ana", "ana@selva.dev", "senha-segura-123")
+        self.feedback = Feedback.objects.create(user=self.user, title="Mapa", message="Linha 1\nLinha 2, com vírgula")
+        DonationPledge.objects.create(user=self.user, amount="25.50")
+
+    def test_admin_action_streams_csv_with_user_email(self):
+        self.client.force_login(self.staff)
+        response = self.client.post(
+            reverse("admin:games_feedback_changelist"),
+            {"action": "export_csv", "_selected_action": [self.feedback.pk]},
+        )
+        self.assertTrue(response.streaming)
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode("utf-8"))))
+        self.assertEqual(rows[0][:3], ["id", "user_username", "user_email"])
+        self.assertEqual(rows[1][2], "ana@selva.dev")
+        self.assertEqual(rows[1][8], "Linha 1\nLinha 2, com vírgula")
+
+    def test_asgi_requests_get_an_async_stream(self):
+        from django.test import AsyncRequestFactory
+
+        from .exports import streaming_export_response
+
+        response = streaming_export_response(Feedback.objects.all(), "csv", AsyncRequestFactory().get("/"))
+        self.assertTrue(response.is_async)
+
+        async def consume():
+            return b"".join([chunk async for chunk in response.streaming_content])
+
+        rows = list(csv.reader(io.StringIO(async_to_sync(consume)().decode("utf-8"))))
+        self.assertEqual(rows[1][2], "ana@selva.dev")
+
+    def test_command_writes_jsonl(self):
+        out = io.StringIO()
+        call_command("export_community_data", "donations", "--format", "jsonl", stdout=out)
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["user_email"], "ana@selva.dev")
+        self.assertEqual(records[0]["amount"], "25.50")
+
+
+class AdminChangelistTests(TestCase):
+    def setUp(self):
+        self.staff = get_user_model().objects.create_superuser("equipe", "equipe@selva.dev", "senha-segura-123")
+        self.client.force_login(self.staff)
+        self.user = get_user_model().objects.create_user("ana", "Ana@Selva.dev", "senha-segura-123")
+        self.pledge = DonationPledge.objects.create(user=self.user, amount="10.00")
+        for index in range(5):
+            other = get_user_model().objects.create_user(f"user{index}", f"user{index}@selva.dev", "senha-segura-123")
+            Feedback.objects.create(user=other, title=f"Sugestão {index}", message="...")
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        url = reverse("admin:games_feedback_changelist")
+        self.client.get(url)
+        with self.assertNumQueries(5):
+            self.client.get(url)
+        Feedback.objects.create(user=self.user, title="Mais uma", message="...")
+        with self.assertNumQueries(5):
+            response = self.client.get(url)
+        self.assertContains(response, "created_at__gte")
+
+    def test_search_uses_exact_and_prefix_lookups(self):
+        changelist = lambda name, term: self.client.get(reverse(f"admin:games_{name}_changelist"), {"q": term})
+        response = changelist("donationpledge", self.pledge.pix_txid)
+        self.assertEqual(response.context["cl"].result_count, 1)
+        self.assertEqual(changelist("donationpledge", "ana@selva.dev").context["cl"].result_count, 1)
+        self.assertEqual(changelist("feedback", "Sugestão").context["cl"].result_count, 5)
+        self.assertEqual(changelist("feedback", "gestão").context["cl"].result_count, 0)
+
+    def test_message_search_uses_full_text_index(self):
+        changelist = lambda term: self.client.get(reverse("admin:games_feedback_changelist"), {"q": term}).context["cl"]
+        feedback = Feedback.objects.create(user=self.user, title="Mapa", message="Faltam marcadores nas cavernas escondidas.")
+        self.assertEqual([row.pk for row in changelist("caverna escondida").result_list], [feedback.pk])
+        self.assertEqual(changelist('cavernas" OR "x').result_count, 0)
+        feedback.message = "Agora só falta o baú."
+        feedback.save()
+        self.assertEqual(changelist("caverna").result_count, 0)
+        self.assertEqual(changelist("bau").result_count, 1)
+
+    def test_email_search_uses_lower_email_index(self):
+        users = get_user_model().objects.annotate(email_lower=Lower("email")).filter(email_lower="ana@selva.dev")
+        self.assertIn("auth_user_email_lower_idx", users.explain())
+
+    def test_unfiltered_count_uses_table_estimate(self):
+        from .pagination import EstimatedCountPaginator
+
+        with mock.patch("games.pagination.ESTIMATED_COUNT_THRESHOLD", 1):
+            DonationPledge.objects.create(user=self.user, amount="5.00").delete()
+            DonationPledge.objects.create(user=self.user, amount="7.00")
+            # A estimativa (MAX(rowid)) ignora o buraco deixado pela exclusão.
+            with self.assertNumQueries(1):
+                self.assertEqual(EstimatedCountPaginator(DonationPledge.objects.all(), 20).count, 3)
+            self.assertEqual(EstimatedCountPaginator(DonationPledge.objects.filter(amount=5), 20).count, 0)
+
+
+class FeedbackTriageTests(TestCase):
+    def setUp(self):
+        self.staff = get_user_model().objects.create_superuser("equipe", "equipe@selva.dev", "senha-segura-123")
+        self.client.force_login(self.staff)
+        user = get_user_model().objects.create_user("ana", "ana@selva.dev", "senha-segura-123")
+        for index in range(3):
+            Feedback.objects.create(user=user, title=f"Sugestão {index}", message="...")
+        Feedback.objects.create(user=user, title="Já publicado", message="...", status="published")
+
+    def test_status_action_runs_one_update_and_moves_updated_at(self):
+        before = Feedback.objects.get(title="Já publicado").updated_at
+        with self.assertNumQueries(1):
+            updated = bulk_triage(Feedback.objects.all(), status="published")
+        self.assertEqual(updated, 3)
+        self.assertEqual(Feedback.objects.get(title="Já publicado").updated_at, before)
+        self.assertGreater(Feedback.objects.get(title="Sugestão 0").updated_at, before)
+
+    def test_admin_actions_apply_to_the_selection(self):
+        url = reverse("admin:games_feedback_changelist")
+        selected = list(Feedback.objects.filter(title__startswith="Sugestão").values_list("pk", flat=True))
+        self.client.post(url, {"action": "apply_topic", "topic": "gameplay", "_selected_action": selected})
+        self.client.post(url, {"action": "make_public", "select_across": "1", "_selected_action": selected[:1]})
+        self.assertEqual(Feedback.objects.filter(topic="gameplay").count(), 3)
+        self.assertEqual(Feedback.objects.filter(is_public=True).count(), 4)
+
+
+class PixReconciliationTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user("ana", "ana@selva.dev", "senha-segura-123")
+        self.by_txid = DonationPledge.objects.create(user=user, amount="50.00")
+        self.by_amount = DonationPledge.objects.create(user=user, amount="12.34")
+        self.today = timezone.localdate()
+
+    def _statement(self, tmp, name, content):
+        path = Path(tmp) / name
+        path.write_text(content, encoding="utf-8")
+        return str(path)
+
+    def test_csv_matches_by_txid_and_by_amount_and_date(self):
+        day = self.today.strftime("%d/%m/%Y")
+        content = (
+            "Data;Valor;Identificador;Descrição\n"
+            f"{day};50,00;E2E001;PIX RECEBIDO {self.by_txid.pix_txid}\n"
+            f"{day};12,34;E2E002;PIX RECEBIDO FULANO\n"
+            f"{day};99,90;E2E003;PIX RECEBIDO DESCONHECIDO\n"
+            f"{day};-5,00;E2E004;TARIFA\n"
+            f"{day};1.500;E2E005;PIX RECEBIDO VALOR AMBIGUO\n"
+            f"{day};-1.500;E2E006;TED ENVIADA\n"
+        )
+        out = io.StringIO()
+        with tempfile.TemporaryDirectory() as tmp:
+            report_path = Path(tmp) / "pendencias.csv"
+            call_command("reconcile_pix", self._statement(tmp, "extrato.csv", content), "--report", str(report_path), stdout=out)
+            unmatched = list(csv.reader(report_path.open(encoding="utf-8")))
+        self.assertIn("2 conciliado(s), 2 sem correspondência, 2 ignorado(s)", out.getvalue())
+        self.assertEqual([row[3] for row in unmatched[1:]], ["E2E003", "E2E005"])
+        self.assertEqual(unmatched[2][2], "1.500")
+        self.assertIn("ambíguo", unmatched[2][5])
+        self.by_txid.refresh_from_db()
+        self.by_amount.refresh_from_db()
+        self.assertTrue(self.by_txid.is_confirmed)
+        self.assertTrue(self.by_amount.pix_transaction_code.startswith("E2E002/"))
+
+    def test_ofx_reimport_does_not_confirm_twice(self):
+        day = self.today.strftime("%Y%m%d")
+        content = (
+            "OFXHEADER:100\n<OFX><BANKTRANLIST>\n"
+            f"<STMTTRN>\n<TRNTYPE>CREDIT\n<DTPOSTED>{day}120000[-3:BRT]\n<TRNAMT>12.34\n<FITID>E2E777\n<MEMO>PIX\n</STMTTRN>\n"
+            "</BANKTRANLIST></OFX>\n"
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            path = self._statement(tmp, "extrato.ofx", content)
+            call_command("reconcile_pix", path, stdout=io.StringIO())
+            DonationPledge.objects.create(user=self.by_amount.user, amount="12.34")
+            out = io.StringIO()
+            call_command("reconcile_pix", path, stdout=out)
+        self.assertIn("já conciliado", out.getvalue())
+        self.assertEqual(DonationPledge.objects.filter(pix_status="confirmed").count(), 1)
+
+    def test_repeated_reference_with_other_description_is_not_dropped(self):
+        day = self.today
+        other = DonationPledge.objects.create(user=self.by_amount.user, amount="50.00")
+        entries = [
+            reconciliation.StatementEntry(1, day, Decimal("50.00"), "LOTE1", f"PIX {self.by_txid.pix_txid}"),
+            reconciliation.StatementEntry(2, day, Decimal("50.00"), "LOTE1", f"PIX {other.pix_txid}"),
+            reconciliation.StatementEntry(3, day, Decimal("50.00"), "LOTE1", f"PIX {other.pix_txid}"),
+        ]
+        report = reconciliation.reconcile_statement(entries)
+        self.assertEqual([pledge_id for _, pledge_id, _ in report.matched], [self.by_txid.pk, other.pk])
+        self.assertEqual([reason for _, reason in report.unmatched], ["já conciliado"])
+
+    def test_pledge_confirmed_meanwhile_is_not_credited_twice(self):
+        self.by_txid.visibility = DonationVisibility.PUBLIC
+        self.by_txid.save()
+        index = reconciliation.PendingPledgeIndex()
+        entry = reconciliation.StatementEntry(1, self.today, Decimal("50.00"), "E2E9", f"PIX {self.by_txid.pix_txid}")
+        pledge_id, _ = index.match(entry)
+        # Confirmação pelo portal entre a leitura do índice e a gravação da conciliação.
+        self.by_txid.pix_status = DonationPaymentStatus.CONFIRMED
+        self.by_txid.save(update_fields=["pix_status"])
+        self.assertEqual(reconciliation.confirm_matches([(entry, pledge_id, "txid")], index.wall_contributions), set())
+        self.assertEqual(SupporterTotal.objects.get(user=self.by_txid.user).pledge_count, 1)
+
+    def test_ambiguous_amounts_are_rejected(self):
+        self.assertEqual(reconciliation.parse_amount("1.234,56"), Decimal("1234.56"))
+        self.assertEqual(reconciliation.parse_amount("R$ 1,234.56"), Decimal("1234.56"))
+        self.assertEqual(reconciliation.parse_amount("12,34"), Decimal("12.34"))
+        self.assertEqual(reconciliation.parse_amount("1.000", decimal_separator="."), Decimal("1.000"))
+        for ambiguous in ("1.234", "1,234"):
+            with self.assertRaisesMessage(ValueError, "ambíguo"):
+                reconciliation.parse_amount(ambiguous)
+        with self.assertRaisesMessage(ValueError, "inválido"):
+            reconciliation.parse_amount("1.23.4")
+
+
+class StoredPixPayloadTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("ana", "ana@selva.dev", "senha-segura-123")
+
+    @override_settings(PIX_STATIC_PAYLOAD="", PIX_KEY="chave@selva.dev")
+    def test_payload_is_built_on_save_and_only_read_by_the_view(self):
+        pledge = DonationPledge.objects.create(user=self.user, amount="20.00")
+        self.assertIn(pledge.pix_txid, pledge.pix_payload)
+        self.assertTrue(pledge.pix_qr_svg.startswith("<svg"))
+        pledge.amount = "25.00"
+        pledge.save()
+        self.assertIn("540525.00", pledge.pix_payload)
+
+        self.client.force_login(self.user)
+        with mock.patch("games.models.pix_payload_for") as build, mock.patch("games.models.cached_qr_code_svg") as draw:
+            response = self.client.get(reverse("donate"))
+        build.assert_not_called()
+        draw.assert_not_called()
+        self.assertContains(response, pledge.pix_payload)
+
+    def test_command_regenerates_only_stale_fingerprints(self):
+        pledge = DonationPledge.objects.create(user=self.user, amount="20.00")
+        DonationPledge.objects.create(user=self.user, amount="30.00")
+        out = io.StringIO()
+        call_command("refresh_pix_payloads", stdout=out)
+        self.assertIn("0 promessa(s)", out.getvalue())
+        with override_settings(PIX_STATIC_PAYLOAD="", PIX_KEY="nova-chave@selva.dev"):
+            call_command("refresh_pix_payloads", stdout=out)
+            pledge.refresh_from_db()
+            self.assertIn("nova-chave@selva.dev", pledge.pix_payload)
+        self.assertIn("2 promessa(s)", out.getvalue())
+
+
+class SupporterWallTests(TestCase):
+    def setUp(self):
+        caching.clear()
+        self.ana = get_user_model().objects.create_user("ana", "ana@selva.dev", "senha-segura-123", first_name="Ana")
+        self.bia = get_user_model().objects.create_user("bia", "bia@selva.dev", "senha-segura-123")
+
+    def _confirm(self, pledge):
+        pledge.pix_status = DonationPaymentStatus.CONFIRMED
+        pledge.pix_confirmed_at = timezone.now()
+        with self.captureOnCommitCallbacks(execute=True):
+            pledge.save(update_fields=["pix_status", "pix_confirmed_at"])
+
+    def test_totals_follow_public_confirmations(self):
+        public = DonationPledge.objects.create(user=self.ana, amount="30.00", visibility=DonationVisibility.PUBLIC)
+        private = DonationPledge.objects.create(user=self.ana, amount="99.00", visibility=DonationVisibility.PRIVATE)
+        self._confirm(public)
+        self._confirm(private)
+        self._confirm(DonationPledge.objects.get(pk=public.pk))
+        total = SupporterTotal.objects.get(user=self.ana)
+        self.assertEqual((total.total_amount, total.pledge_count), (Decimal("30.00"), 1))
+
+        public.visibility = DonationVisibility.TEAM_ONLY
+        public.save()
+        self.assertEqual(SupporterTotal.objects.get(user=self.ana).total_amount, 0)
+
+    def test_wall_ranks_from_totals_and_is_cached_by_version(self):
+        for user, amount in ((self.ana, "10.00"), (self.bia, "50.00")):
+            self._confirm(DonationPledge.objects.create(user=user, amount=amount, visibility=DonationVisibility.PUBLIC))
+        url = reverse("supporter_wall")
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual([row["name"] for row in response.context["wall"]["ranking"]], ["Apoiador anônimo", "Ana"])
+        self.assertNotContains(response, "bia")
+        with self.assertNumQueries(0):
+            self.client.get(url)
+        self._confirm(DonationPledge.objects.create(user=self.ana, amount="45.00", visibility=DonationVisibility.PUBLIC))
+        self.assertContains(self.client.get(url), "Ana · R$ 55,00")
+
+    def test_feedback_does_not_invalidate_the_wall(self):
+        self._confirm(DonationPledge.objects.create(user=self.bia, amount="20.00", visibility=DonationVisibility.PUBLIC))
+        url = reverse("supporter_wall")
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Feedback.objects.create(user=self.ana, title="Sugestão", message="Mais fases na floresta alagada, por favor.")
+            DonationPledge.objects.create(user=self.ana, amount="15.00", visibility=DonationVisibility.PUBLIC)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+    def test_reconciliation_feeds_the_wall(self):
+        pledge = DonationPledge.objects.create(user=self.bia, amount="20.00", visibility=DonationVisibility.PUBLIC)
+        entry = reconciliation.StatementEntry(1, timezone.localdate(), Decimal("20.00"), "E2E1", pledge.pix_txid)
+        with self.captureOnCommitCallbacks(execute=True):
+            reconciliation.reconcile_statement([entry])
+        self.assertEqual(SupporterTotal.objects.get(user=self.bia).total_amount, Decimal("20.00"))
+
+
+class FeedbackSimilarityTests(TestCase):
+    message = "O mapa da fase da floresta precisa de marcadores para as cavernas escondidas e os baús raros."
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("ana", "ana@selva.dev", "senha-segura-123")
+
+    def test_near_duplicates_share_a_cluster_and_unrelated_text_does_not(self):
+        original = Feedback.objects.create(user=self.user, title="Marcadores no mapa", message=self.message)
+        copy = Feedback.objects.create(user=self.user, title="Marcadores no mapa!", message=self.message + " Obrigado!")
+        other = Feedback.objects.create(user=self.user, title="Trilha sonora", message="A música do menu principal poderia ter mais percussão.")
+        self.assertEqual(FeedbackBucket.objects.filter(feedback=copy).count(), similarity.BANDS)
+        copy.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(copy.duplicate_of, original)
+        self.assertIsNone(other.duplicate_of)
+        with self.assertNumQueries(2):
+            matches = similarity.similar_feedback(similarity.unpack_signature(copy.minhash), exclude_id=copy.pk)
+        self.assertEqual([feedback_id for _, feedback_id in matches], [original.pk])
+
+        get_user_model().objects.create_superuser("equipe", "equipe@selva.dev", "senha-segura-123")
+        self.client.login(username="equipe", password="senha-segura-123")
+        response = self.client.get(reverse("admin:games_feedback_change", args=[original.pk]))
+        self.assertContains(response, f"#{copy.pk} Marcadores no mapa!")
+        changelist = self.client.get(reverse("admin:games_feedback_changelist"), {"cluster": original.pk})
+        self.assertEqual(changelist.context["cl"].result_count, 2)
+
+    def test_submission_points_to_public_similar_feedback(self):
+        Feedback.objects.create(user=self.user, title="Marcadores no mapa", message=self.message, is_public=True)
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse("faq"),
+            {"action": "feedback", "title": "Marcadores no mapa", "topic": "gameplay", "impact_rating": 4, "message": self.message},
+            follow=True,
+        )
+        self.assertContains(response, "Sugestões parecidas já compartilhadas: Marcadores no mapa.")
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        # Exclusões de outros testes nunca chegam ao commit e deixam dias pendentes.
+        rollups._pending_days().clear()
+        self.user = get_user_model().objects.create_user("ana", "ana@selva.dev", "senha-segura-123")
+        self.first = Feedback.objects.create(user=self.user, title="Mapa", message="...", topic="gameplay")
+        Feedback.objects.create(user=self.user, title="Trilha", message="...", topic="gameplay", impact_rating=5)
+        DonationPledge.objects.create(user=self.user, amount="10.00", pix_status=DonationPaymentStatus.CONFIRMED)
+
+    def test_incremental_build_only_touches_changed_days(self):
+        self.assertEqual(build_rollups()["feedback"], (1, 1))
+        row = FeedbackDailyRollup.objects.get()
+        self.assertEqual((row.topic, row.status, row.total, row.impact_sum), ("gameplay", "new", 2, 8))
+        self.assertEqual(DonationDailyRollup.objects.get().amount_sum, Decimal("10.00"))
+
+        # A janela de sobreposição relê o mesmo dia sem duplicar linhas.
+        self.assertEqual(build_rollups()["donations"], (1, 1))
+        self.assertEqual(DonationDailyRollup.objects.get().total, 1)
+        bulk_triage(Feedback.objects.filter(pk=self.first.pk), status="published")
+        self.assertEqual(build_rollups()["feedback"], (1, 2))
+        self.assertEqual(
+            dict(FeedbackDailyRollup.objects.values_list("status", "total")), {"new": 1, "published": 1}
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.first.delete()
+        self.assertEqual(dict(FeedbackDailyRollup.objects.values_list("status", "total")), {"new": 1})
+
+    def test_bulk_delete_recomputes_each_day_once(self):
+        build_rollups()
+        with mock.patch("games.rollups._replace_days", wraps=rollups._replace_days) as replace:
+            with self.captureOnCommitCallbacks(execute=True):
+                Feedback.objects.all().delete()
+        self.assertEqual(replace.call_count, 1)
+        self.assertFalse(FeedbackDailyRollup.objects.exists())
+
+    @override_settings(PIX_STATIC_TXID="")
+    def test_pledge_confirmed_in_portal_reaches_rollup(self):
+        old = DonationPledge.objects.create(user=self.user, amount="25.00")
+        three_days_ago = timezone.now() - timedelta(days=3)
+        DonationPledge.objects.filter(pk=old.pk).update(created_at=three_days_ago, updated_at=three_days_ago)
+        build_rollups()
+        self.client.login(username="ana", password="senha-segura-123")
+        self.client.post(
+            reverse("donate"), {"action": "verify_pix", "pledge_id": old.pk, "transaction_code": old.pix_txid}
+        )
+        self.assertEqual(DonationPledge.objects.get(pk=old.pk).pix_status, DonationPaymentStatus.CONFIRMED)
+        build_rollups()
+        day = timezone.localtime(three_days_ago).date()
+        self.assertEqual(
+            list(DonationDailyRollup.objects.filter(day=day).values_list("pix_status", flat=True)),
+            [DonationPaymentStatus.CONFIRMED],
+        )
+
+    def test_dashboard_reads_rollups_for_staff_only(self):
+        build_rollups()
+        url = reverse("trends_dashboard")
+        self.assertEqual(self.client.get(url).status_code, 302)
+        get_user_model().objects.create_superuser("equipe", "equipe@selva.dev", "senha-segura-123")
+        self.client.login(username="equipe", password="senha-segura-123")
+        response = self.client.get(url)
+        self.assertContains(response, "Feedback por tema")
+        self.assertContains(response, "Cache em camadas", count=1)
+        self.assertEqual(response.context["feedback_status"][0]["value"], 2)
+
+
+class TieredCacheTests(TestCase):
+    def setUp(self):
+        caching.clear()
+        self.namespace = caching.TieredCache("teste", ttl=60, local_ttl=60)
+        self.calls = []
+
+    def _compute(self):
+        self.calls.append(1)
+        return len(self.calls)
+
+    def test_levels_versions_and_counters(self):
+        self.assertEqual(self.namespace.get_or_set("chave", self._compute), 1)
+        self.assertEqual(self.namespace.get_or_set("chave", self._compute), 1)
+        caching._local.clear()
+        self.assertEqual(self.namespace.get_many(["chave", "outra"]), {"chave": 1})
+        self.assertEqual(
+            (self.namespace.stats.misses, self.namespace.stats.local_hits, self.namespace.stats.shared_hits), (2, 1, 1)
+        )
+        self.namespace.bump()
+        self.assertEqual(self.namespace.get_or_set("chave", self._compute), 2)
+
+    def test_expensive_entry_is_recomputed_before_expiring(self):
+        self.namespace.set("chave", "antigo", ttl=60, cost=600)
+        with mock.patch("games.caching.random.random", return_value=0.5):
+            self.assertEqual(self.namespace.get_or_set("chave", self._compute), 1)
+        self.assertEqual(self.namespace.stats.early_recomputes, 1)
+
+    def test_concurrent_misses_compute_once(self):
+        started = threading.Event()
+
+        def slow():
+            started.set()
+            time.sleep(0.05)
+            return self._compute()
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.namespace.get_or_set("chave", slow))) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual((results, len(self.calls)), ([1, 1, 1, 1], 1))
+
+    def test_portal_metrics_follow_committed_feedback(self):
+        user = get_user_model().objects.create_user("ana", "ana@selva.dev", "senha-segura-123")
+        self.assertEqual(self.client.get(reverse("faq")).context["feedback_metrics"]["total"], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            Feedback.objects.create(user=user, title="Mapa", message="Mensagem sobre o mapa.")
+        self.assertEqual(self.client.get(reverse("faq")).context["feedback_metrics"]["total"], 1)
+
+
+class GameCardFragmentTests(TestCase):
+    def setUp(self):
+        caching.clear()
+        Game.objects.create(title="Capivara Rafaela", slug="capivara-rafaela", is_featured=True)
+        self.released = Game.objects.create(title="Selva Antiga", slug="selva-antiga", release_date=date(2024, 5, 1))
+        Game.objects.create(title="Projeto Oculto", slug="projeto-oculto")
+
+    def test_only_changed_games_are_rendered_again(self):
+        from django.template.loader import render_to_string
+
+        with mock.patch("games.fragments.render_to_string", wraps=render_to_string) as render:
+            self.client.get(reverse("home"))
+            self.assertEqual(render.call_count, 2)
+            self.released.short_description = "Agora com modo cooperativo."
+            with self.captureOnCommitCallbacks(execute=True):
+                self.released.save()
+            response = self.client.get(reverse("home"))
+            self.assertEqual(render.call_count, 3)
+        self.assertContains(response, "Agora com modo cooperativo.")
+        self.assertContains(response, "game-status--amber")
+
+
+class ServerTimingTests(TestCase):
+    def setUp(self):
+        caching.clear()
+        Game.objects.create(title="Capivara Rafaela", slug="capivara-rafaela", is_featured=True)
+
+    def test_header_is_only_sent_to_staff(self):
+        self.assertNotIn("Server-Timing", self.client.get(reverse("home")))
+        get_user_model().objects.create_user("ana", "ana@selva.dev", "senha-segura-123")
+        self.client.login(username="ana", password="senha-segura-123")
+        self.assertNotIn("Server-Timing", self.client.get(reverse("home")))
+
+        get_user_model().objects.create_superuser("equipe", "equipe@selva.dev", "senha-segura-123")
+        self.client.login(username="equipe", password="senha-segura-123")
+        header = self.client.get(reverse("home"))["Server-Timing"]
+        for segment in ("db;dur=", "tpl;dur=", "cache;dur=", "total;dur="):
+            self.assertIn(segment, header)
+
+    @override_settings(SERVER_TIMING_INTERNAL_NETWORKS=["127.0.0.0/8"], PIX_STATIC_PAYLOAD="", PIX_KEY="chave@selva.dev")
+    def test_internal_network_sees_pix_and_qr_segments(self):
+        user = get_user_model().objects.create_user("ana", "ana@selva.dev", "senha-segura-123")
+        self.client.force_login(user)
+        response = self.client.post(reverse("donate"), {"action": "donation", "amount": "35", "visibility": "public"})
+        self.assertIn("pix;dur=", response["Server-Timing"])
+        self.assertIn("qr;dur=", response["Server-Timing"])
+
+
+class MetricsEndpointTests(TestCase):
+    def setUp(self):
+        caching.clear()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        overrides = override_settings(METRICS_DIR=Path(self.tmp.name), METRICS_TOKEN="segredo-do-coletor")
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def test_forked_worker_does_not_inherit_warmup_counters(self):
+        from SelvaCoreWeb import metrics
+
+        caching.catalog.get_or_set("aquecido", lambda: 1)
+        metrics.inc("selva_http_requests_total", {"view": "home", "status": "2xx"})
+        read, write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read)
+            inherited = sum(caching.stats()["catalog"][field] for field in ("local_hits", "shared_hits", "misses"))
+            requests = [value for key, value in metrics.process_values().items() if key.startswith("selva_http_requests_total")]
+            os.write(write, json.dumps([inherited, requests]).encode())
+            os._exit(0)
+        os.close(write)
+        with os.fdopen(read) as result:
+            child = json.loads(result.read())
+        os.waitpid(pid, 0)
+        self.assertEqual(child, [0, []])
+        self.assertGreater(caching.stats()["catalog"]["misses"], 0)
+
+    def test_metrics_aggregate_worker_files_and_pledge_transitions(self):
+        user = get_user_model().objects.create_user("ana", "ana@selva.dev", "senha-segura-123")
+        pledge = DonationPledge.objects.create(user=user, amount="10.00")
+        pledge.pix_status = DonationPaymentStatus.CONFIRMED
+        pledge.save(update_fields=["pix_status"])
+        self.client.get(reverse("home"))
+        worker = {'selva_http_requests_total|[["status", "2xx"], ["view", "outro_worker"]]': 5}
+        (Path(self.tmp.name) / "99999.json").write_text(json.dumps(worker))
+
+        body = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer segredo-do-coletor").content.decode()
+        self.assertIn('selva_http_requests_total{status="2xx",view="outro_worker"} 5', body)
+        self.assertIn('selva_http_request_duration_seconds_bucket{view="home",le="+Inf"}', body)
+        self.assertIn("# TYPE selva_db_queries_per_request histogram", body)
+        self.assertIn('selva_pledge_status_transitions_total{from="pending",to="confirmed"}', body)
+        self.assertIn('selva_queue_depth{queue="pix_pending"} 0', body)
+        self.assertIn('selva_cache_hit_ratio{namespace="catalog"}', body)
+
+    def test_loopback_is_not_trusted_by_default(self):
+        # Atrás do proxy todo visitante chega como 127.0.0.1.
+        self.assertEqual(self.client.get(reverse("metrics"), REMOTE_ADDR="127.0.0.1").status_code, 403)
+        self.assertEqual(self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer errado").status_code, 403)
+        with override_settings(METRICS_ALLOWED_NETWORKS=["10.0.0.0/8"]):
+            self.assertEqual(self.client.get(reverse("metrics"), REMOTE_ADDR="10.1.2.3").status_code, 200)
+
+    def test_outside_networks_need_staff(self):
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+        get_user_model().objects.create_superuser("equipe", "equipe@selva.dev", "senha-segura-123")
+        self.client.login(username="equipe", password="senha-segura-123")
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 200)
+
+
+class PreforkServeTests(SimpleTestCase):
+    def _expect(self, lines, fragment, timeout=15):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            line = lines.get(timeout=max(deadline - time.monotonic(), 0.01))
+            if fragment in line:
+                return line
+        self.fail(f"saída sem {fragment!r}")
+
+    def _get(self, url):
+        try:
+            urllib.request.urlopen(url, timeout=5)
+        except urllib.error.HTTPError as error:
+            return error.code
+        return 200
+
+    def _serve(self, *args):
+        metrics_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(metrics_dir.cleanup)
+        env = {**os.environ, "SELVA_METRICS_DIR": metrics_dir.name}
+        process = subprocess.Popen(
+            [sys.executable, "manage.py", "serve", "--bind", "127.0.0.1:0", "--no-warmup", "--report-interval", "0", *args],
+            cwd=settings.BASE_DIR,
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+        )
+        self.addCleanup(process.kill)
+        lines = queue.Queue()
+        threading.Thread(target=lambda: [lines.put(line) for line in process.stdout], daemon=True).start()
+        address = self._expect(lines, "escutando em").split()[2].rstrip(";")
+        return process, lines, address, Path(metrics_dir.name)
+
+    def test_workers_recycle_and_shutdown_gracefully(self):
+        process, lines, address, metrics_dir = self._serve(
+            "--workers", "2", "--max-requests", "2", "--max-requests-jitter", "0"
+        )
+        for _ in range(3):
+            self.assertEqual(self._get(f"{address}/static/nada.css"), 404)
+        self.assertIn("2 requisições", self._expect(lines, "encerrado"))
+        process.send_signal(signal.SIGTERM)
+        self.assertEqual(process.wait(timeout=15), 0)
+        self.assertTrue((metrics_dir / "archive.json").exists())
+
+    def test_idle_client_times_out_and_zero_max_requests_disables_recycling(self):
+        process, lines, address, _ = self._serve("--workers", "1", "--max-requests", "0", "--timeout", "0.5")
+        host, port = address.removeprefix("http://").split(":")
+        idle = socket.create_connection((host, int(port)))
+        self.addCleanup(idle.close)
+        for _ in range(3):
+            self.assertEqual(self._get(f"{address}/static/nada.css"), 404)
+        process.send_signal(signal.SIGTERM)
+        # Com um só worker, a primeira linha "encerrado" mostra por que ele saiu.
+        self.assertIn("(sinal,", self._expect(lines, "encerrado"))
+        self.assertEqual(process.wait(timeout=15), 0)
+
+    def test_memory_usage_reports_resident_size(self):
+        rss, _ = memory_usage()
+        self.assertGreater(rss, 0)
+
+
+class AccountImportTests(TestCase):
+    def test_imports_verified_accounts_and_reports_duplicates(self):
+        get_user_model().objects.create_user("ana", "Ana@Selva.dev", "senha-segura-123")
+        content = (
+            "email;senha;nome\n"
+            "bia@selva.dev;jam-2024-bia;Bia\n"
+            "Bia@selva.dev;repetida;Bia\n"
+            "ANA@selva.dev;outra-senha;Ana\n"
+            "caio@selva.dev;jam-2024-caio;Caio\n"
+            "sem-arroba;qualquer;X\n"
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "jam.csv"
+            path.write_text(content, encoding="utf-8")
+            report_path = Path(tmp) / "ignoradas.csv"
+            out = io.StringIO()
+            call_command(
+                "import_accounts", str(path), "--workers", "2", "--batch-size", "2", "--report", str(report_path), stdout=out
+            )
+            reasons = [row["motivo"] for row in csv.DictReader(report_path.open(encoding="utf-8"))]
+
+        self.assertIn("2 conta(s) criada(s), 2 duplicada(s), 1 inválida(s)", out.getvalue())
+        self.assertEqual(reasons, ["e-mail repetido na planilha", "e-mail já cadastrado", "e-mail inválido"])
+        bia = get_user_model().objects.get(email="bia@selva.dev")
+        self.assertRegex(bia.username, r"^apoiador-[0-9a-f]{12}$")
+        self.assertTrue(bia.check_password("jam-2024-bia"))
+        self.assertTrue(bia.email_verifications.get().is_verified)
+        self.assertEqual(EmailVerification.objects.filter(verified_at__isnull=False).count(), 2)
+
+
+class BoundedImageUploadTests(SimpleTestCase):
+    def _upload(self, size, image_format="PNG", name="capa.png"):
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        Image.new("RGB", size, "green").save(buffer, format=image_format)
+        return SimpleUploadedFile(name, buffer.getvalue())
+
+    @override_settings(IMAGE_MAX_PIXELS=10_000)
+    def test_rejects_decompression_bomb_from_header(self):
+        with self.assertRaisesMessage(ValidationError, "200×100"):
+            BoundedImageField().clean(self._upload((200, 100)))
+
+    def test_rejects_truncated_png(self):
+        data = self._upload((300, 200)).read()
+        with self.assertRaisesMessage(ValidationError, "imagem válida"):
+            BoundedImageField().clean(SimpleUploadedFile("capa.png", data[: len(data) // 3]))
+
+    @override_settings(IMAGE_MAX_DIMENSION=64)
+    def test_downscales_large_images_keeping_format(self):
+        from PIL import Image
+
+        cleaned = BoundedImageField().clean(self._upload((256, 128), "JPEG", "capa.jpg"))
+        with Image.open(cleaned) as image:
+            self.assertEqual((image.format, image.size), ("JPEG", (64, 32)))
+        self.assertEqual(cleaned.name, "capa.jpg")
+        self.assertEqual(cleaned.content_type, "image/jpeg")
+
+    def _post_cover(self, size):
+        request = RequestFactory().post(
+            "/admin/games/game/add/",
+            {"title": "Capivara Rafaela", "cover_image_upload": SimpleUploadedFile("capa.png", b"x" * size), "slug": "capivara"},
+        )
+        files, post = request.FILES, request.POST
+        return files, post, len(request.META["wsgi.input"].read())
+
+    @override_settings(MAX_UPLOAD_SIZE=1024, FILE_UPLOAD_MAX_MEMORY_SIZE=0)
+    def test_handler_stops_reading_the_body_past_the_cap(self):
+        for slack in (1024 * 1024, 1024):
+            with self.subTest(slack=slack), self.settings(DATA_UPLOAD_MAX_MEMORY_SIZE=slack):
+                files, post, unread = self._post_cover(512 * 1024)
+                upload = files["cover_image_upload"]
+                self.assertTrue(upload.truncated)
+                self.assertGreater(upload.size, 1024)
+                self.assertGreater(unread, 256 * 1024)
+                self.assertEqual(post["title"], "Capivara Rafaela")
+                with self.assertRaisesMessage(ValidationError, "limite"):
+                    BoundedImageField().clean(upload)
+
+    @override_settings(MAX_UPLOAD_SIZE=1024, FILE_UPLOAD_MAX_MEMORY_SIZE=0)
+    def test_uploads_within_the_cap_are_untouched(self):
+        files, post, unread = self._post_cover(1000)
+        self.addCleanup(files["cover_image_upload"].close)
+        self.assertEqual(files["cover_image_upload"].size, 1000)
+        self.assertFalse(getattr(files["cover_image_upload"], "truncated", False))
+        self.assertEqual((post["slug"], unread), ("capivara", 0))
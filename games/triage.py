@@ -0,0 +1,26 @@
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import caching
+
+TRIAGE_FIELDS = ("status", "topic", "is_public")
+
+
+def bulk_triage(queryset, **changes):
+    """Aplica ``changes`` aos feedbacks do queryset com um único UPDATE e devolve quantos mudaram."""
+    unknown = set(changes) - set(TRIAGE_FIELDS)
+    if unknown:
+        raise ValueError(f"Campos de triagem inválidos: {', '.join(sorted(unknown))}.")
+    if not changes:
+        return 0
+    # Só reescreve linhas que mudam de fato. update() ignora auto_now: updated_at é gravado aqui para
+    # que ETags de home/portal e demais leitores por updated_at enxerguem a triagem.
+    changing = Q()
+    for field, value in changes.items():
+        changing |= ~Q(**{field: value})
+    updated = queryset.filter(changing).update(**changes, updated_at=timezone.now())
+    if updated:
+        # update() não dispara post_save: as métricas do portal são invalidadas aqui.
+        transaction.on_commit(caching.metrics.bump)
+    return updated
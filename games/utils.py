@@ -1,18 +1,22 @@
-import base64
-import io
+import hashlib
 from decimal import Decimal
+from functools import partial
 
-import qrcode
 from django.conf import settings
 from django.core.mail import send_mail
 from django.utils.crypto import get_random_string
 
+from SelvaCoreWeb.timing import timed
+
+from . import caching
+
 
 def generate_verification_code(length: int = 6) -> str:
     allowed = "0123456789"
     return get_random_string(length=length, allowed_chars=allowed)
 
 
+@timed("email")
 def send_verification_email(user, code: str) -> None:
     subject = "Seu código de verificação SelvaCore"
     message = (
@@ -81,12 +85,52 @@ def build_pix_payload(*, key: str, txid: str, amount: Decimal, merchant_name: st
     return payload_to_crc + crc
 
 
-def qr_code_base64(data: str) -> str:
+PIX_SETTINGS = ("PIX_KEY", "PIX_STATIC_PAYLOAD", "PIX_MERCHANT_NAME", "PIX_MERCHANT_CITY", "PIX_DESCRIPTION")
+
+
+def pix_settings_fingerprint() -> str:
+    """Identifica a configuração Pix usada num payload salvo; muda quando chave ou dados do recebedor mudam."""
+    values = [str(getattr(settings, name, "")).strip() for name in PIX_SETTINGS]
+    values.append(str(getattr(settings, "PIX_STORE_QR_SVG", True)))
+    return hashlib.md5("|".join(values).encode("utf-8"), usedforsecurity=False).hexdigest()
+
+
+@timed("pix")
+def pix_payload_for(pledge) -> str:
+    pix_key = getattr(settings, "PIX_KEY", "")
+    static_payload = getattr(settings, "PIX_STATIC_PAYLOAD", "").strip()
+    try:
+        if static_payload:
+            return static_payload
+        if pix_key:
+            return build_pix_payload(
+                key=pix_key,
+                txid=pledge.pix_txid,
+                amount=pledge.amount,
+                merchant_name=getattr(settings, "PIX_MERCHANT_NAME", "SelvaCore Studios"),
+                merchant_city=getattr(settings, "PIX_MERCHANT_CITY", "SAO PAULO"),
+                description=getattr(settings, "PIX_DESCRIPTION", "SelvaCore Community"),
+            )
+    except Exception:
+        pass
+    return ""
+
+
+@timed("qr")
+def qr_code_svg(data: str) -> str:
+    # qrcode puxa o PIL: importado só quando um QR é de fato gerado.
+    import qrcode
+    import qrcode.image.svg
+
     qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_M)
     qr.add_data(data)
     qr.make(fit=True)
-    img = qr.make_image(fill_color="black", back_color="white")
-    buffer = io.BytesIO()
-    img.save(buffer, format="PNG")
-    return base64.b64encode(buffer.getvalue()).decode("ascii")
+    img = qr.make_image(image_factory=qrcode.image.svg.SvgPathImage)
+    return img.to_string(encoding="unicode")
+
+
+def cached_qr_code_svg(data: str) -> str:
+    # Promessas com o mesmo payload (TXID estático, mesmo valor) reaproveitam o SVG pelo namespace "qr".
+    digest = hashlib.sha256(data.encode("utf-8")).hexdigest()
+    return caching.qr.get_or_set(digest, partial(qr_code_svg, data))
     #End of File
\ No newline at end of file
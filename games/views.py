@@ -1,17 +1,23 @@
 from datetime import timedelta
+from functools import partial
 from urllib.parse import parse_qsl, urlsplit, urlunsplit, urlencode as urllib_urlencode
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.contrib import messages
+from django.contrib import admin, messages
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth import get_user_model, login
 from django.contrib.auth.views import LoginView, LogoutView
 from django.db.models import Avg, Count, Prefetch, Q, Sum
 from django.http import HttpResponseRedirect
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.http import urlencode, url_has_allowed_host_and_scheme
 
+from . import caching
+from .conditional import conditional_page, home_sources, portal_sources
 from .forms import (
     DonationForm,
     DonationVerificationForm,
@@ -21,6 +27,7 @@ from .forms import (
     ResendVerificationForm,
     SignupForm,
 )
+from .fragments import render_game_cards
 from .models import (
     DonationPaymentStatus,
     DonationPledge,
@@ -31,36 +38,97 @@ from .models import (
     FeedbackStatus,
     Game,
 )
-from .utils import build_pix_payload, generate_verification_code, qr_code_base64, send_verification_email
+from .imaging import derivative_srcset
+from .rollups import dashboard_data
+from .similarity import similar_feedback, unpack_signature
+from .supporters import cached_supporter_wall
+from .utils import generate_verification_code, send_verification_email
 
 User = get_user_model()
 KNOWN_EMAIL_COOKIE = "selvacore_known_email"
 KNOWN_EMAIL_MAX_AGE = 60 * 60 * 24 * 180  # 180 dias
 
 
-def home(request):
-    games = Game.objects.all()
-    has_games = games.exists()
-    total_games = games.count()
-    today = timezone.localdate()
-
+def _featured_game(games):
     featured_game = games.filter(is_featured=True).first()
     if not featured_game:
-        featured_game = games.filter(release_date__isnull=False).order_by("release_date").last() or games.first()
+        featured_game = games.filter(release_date__isnull=False).order_by("release_date").last()
+    if not featured_game:
+        featured_game = games.first()
+    return featured_game
+
 
+def _banner_images(games):
+    banner_images = []
+    for game in games.order_by("-is_featured", "-updated_at"):
+        img_url = game.hero_image_url or game.cover_image_url
+        if img_url:
+            banner_images.append(img_url)
+        if len(banner_images) >= 6:
+            break
+    return banner_images
+
+
+def _home_catalog(today):
+    """Vitrine de jogos da home; vale até o próximo save de Game (namespace "catalog")."""
+    games = Game.objects.all()
+    featured_game = _featured_game(games)
     featured_game_id = featured_game.id if featured_game else None
+    return {
+        "featured_game": featured_game,
+        "total_games": games.count(),
+        "banner_images": _banner_images(games),
+        "released_games": list(
+            games.filter(release_date__isnull=False, release_date__lte=today)
+            .exclude(id=featured_game_id)
+            .order_by("-release_date")
+        ),
+        "upcoming_games": list(
+            games.filter(release_date__isnull=False, release_date__gt=today)
+            .exclude(id=featured_game_id)
+            .order_by("release_date")
+        ),
+        "unrevealed_games": list(games.filter(release_date__isnull=True).exclude(id=featured_game_id)),
+    }
 
-    released_games = (
-        games.filter(release_date__isnull=False, release_date__lte=today)
-        .exclude(id=featured_game_id)
-        .order_by("-release_date")
+
+def _home_faq():
+    return {
+        "faq_highlights": list(
+            FAQEntry.objects.filter(is_active=True, is_featured=True)
+            .select_related("category")
+            .order_by("category__order", "order")[:6]
+        ),
+        "context_related_categories": list(FAQCategory.objects.filter(is_active=True).order_by("order")[:4]),
+    }
+
+
+def _home_reads(today):
+    """Catálogo e FAQ vêm do cache em camadas; só as contribuições recentes vão sempre ao banco.
+
+    Tudo numa única ida à thread do Django: o ORM roda com ``thread_sensitive=True``, então
+    um ``asyncio.gather`` dessas leituras só as enfileiraria na mesma thread, sem paralelismo.
+    """
+    return (
+        caching.catalog.get_or_set(f"home:{today.isoformat()}", partial(_home_catalog, today)),
+        caching.faq.get_or_set("home", _home_faq),
+        list(Feedback.objects.filter(is_public=True).order_by("-created_at")[:4]),
     )
-    upcoming_games = (
-        games.filter(release_date__isnull=False, release_date__gt=today)
-        .exclude(id=featured_game_id)
-        .order_by("release_date")
+
+
+@conditional_page(home_sources)
+async def home(request):
+    today = timezone.localdate()
+    catalog, faq, community_updates = await sync_to_async(_home_reads)(today)
+    featured_game = catalog["featured_game"]
+    banner_images = catalog["banner_images"]
+    cards = await sync_to_async(render_game_cards)(
+        {
+            "upcoming": (catalog["upcoming_games"], False),
+            "released": (catalog["released_games"], True),
+            "unrevealed": (catalog["unrevealed_games"], False),
+        }
     )
-    unrevealed_games = games.filter(release_date__isnull=True).exclude(id=featured_game_id)
 
     studio_principles = [
         {
@@ -77,36 +145,20 @@ def home(request):
         },
     ]
 
-    faq_highlights = (
-        FAQEntry.objects.filter(is_active=True, is_featured=True)
-        .select_related("category")
-        .order_by("category__order", "order")[:6]
-    )
-    community_updates = Feedback.objects.filter(is_public=True).order_by("-created_at")[:4]
-    context_related_categories = FAQCategory.objects.filter(is_active=True).order_by("order")[:4]
-
     context = {
         "featured_game": featured_game,
-        "released_games": released_games,
-        "upcoming_games": upcoming_games,
-        "unrevealed_games": unrevealed_games,
+        "released_games": catalog["released_games"],
+        "upcoming_games": catalog["upcoming_games"],
+        "unrevealed_games": catalog["unrevealed_games"],
+        "game_cards": cards,
         "studio_principles": studio_principles,
         "today": today,
-        "has_games": has_games,
-        "total_games": total_games,
-        "faq_highlights": faq_highlights,
+        "has_games": catalog["total_games"] > 0,
+        "total_games": catalog["total_games"],
         "community_updates": community_updates,
-        "context_related_categories": context_related_categories,
+        **faq,
     }
 
-    banner_images = []
-    for game in games.order_by("-is_featured", "-updated_at"):
-        img_url = game.hero_image_url or game.cover_image_url
-        if img_url:
-            banner_images.append(img_url)
-        if len(banner_images) >= 6:
-            break
-
     banner_mode = "default"
     if len(banner_images) >= 2:
         banner_images = [banner_images[1]]
@@ -124,7 +176,37 @@ def home(request):
 
     context["featured_images"] = featured_images
 
-    return render(request, "games/home.html", context)
+    # Sessão, usuário e mensagens são lidos pelo template de forma síncrona.
+    return await sync_to_async(render)(request, "games/home.html", context)
+
+
+def _game_gallery(game):
+    gallery = []
+    for field_file in (game.hero_image_upload, game.cover_image_upload):
+        if field_file:
+            srcset = ", ".join(f"{url} {width}w" for url, width in derivative_srcset(field_file))
+            gallery.append({"src": field_file.url, "srcset": srcset})
+    if game.cover_image and not game.cover_image_upload:
+        gallery.append({"src": game.cover_image, "srcset": ""})
+    return gallery
+
+
+def _render_game_detail(game):
+    body = render_to_string(
+        "games/partials/game_detail_body.html",
+        {"game": game, "gallery": _game_gallery(game)},
+    )
+    return {"title": game.title, "body": body}
+
+
+def _load_game_detail(slug):
+    # Checa derivados no storage (I/O de arquivo): roda fora do event loop junto com a consulta.
+    return _render_game_detail(get_object_or_404(Game, slug=slug))
+
+
+async def game_detail(request, slug):
+    detail = await caching.catalog.aget_or_set(f"detail:{slug}", partial(_load_game_detail, slug))
+    return await sync_to_async(render)(request, "games/game_detail.html", {"detail": detail})
 
 
 def _safe_next_url(request, candidate, fallback):
@@ -133,158 +215,192 @@ def _safe_next_url(request, candidate, fallback):
     return fallback
 
 
-def community_portal(request, focus=None):
-    categories = (
-        FAQCategory.objects.filter(is_active=True)
-        .prefetch_related(
-            Prefetch("faqs", queryset=FAQEntry.objects.filter(is_active=True).order_by("order", "question"))
-        )
-        .order_by("order", "title")
+def _handle_portal_post(request, state):
+    """Processa as ações do portal; devolve um redirect ou None para renderizar os erros."""
+    action = request.POST.get("action")
+    if action == "feedback":
+        state["active_focus"] = "feedback"
+        if not request.user.is_authenticated:
+            login_target = f"{reverse('faq')}?focus=feedback"
+            messages.error(request, "É necessário entrar com sua conta para enviar contribuições.")
+            query_string = urlencode({"next": login_target})
+            return redirect(f"{reverse('login')}?{query_string}")
+        feedback_form = FeedbackForm(request.POST)
+        state["feedback_form"] = feedback_form
+        if feedback_form.is_valid():
+            feedback = feedback_form.save(commit=False)
+            feedback.user = request.user
+            feedback.save()
+            messages.success(request, "Obrigado! Sua sugestão foi recebida e entra na fila de análise.")
+            _report_similar_feedback(request, feedback)
+            return HttpResponseRedirect(f"{reverse('faq')}?focus=feedback#feedback")
+    elif action == "donation":
+        state["active_focus"] = "donation"
+        if not request.user.is_authenticated:
+            login_target = reverse('donate')
+            messages.error(request, "Crie uma conta ou entre para registrar sua intenção de apoio.")
+            query_string = urlencode({"next": login_target})
+            return redirect(f"{reverse('login')}?{query_string}")
+        donation_form = DonationForm(request.POST)
+        state["donation_form"] = donation_form
+        if donation_form.is_valid():
+            pledge = donation_form.save(commit=False)
+            pledge.user = request.user
+            pledge.save()
+            messages.success(request, "Recebemos sua contribuição! Vamos entrar em contato com instruções de pagamento.")
+            return HttpResponseRedirect(f"{reverse('donate')}?focus=donation#donation")
+    elif action == "verify_pix":
+        state["active_focus"] = "donation"
+        if not request.user.is_authenticated:
+            messages.error(request, "É necessário estar autenticado para validar o Pix.")
+            return redirect(f"{reverse('login')}?{urlencode({'next': reverse('donate')})}")
+        verification_form = DonationVerificationForm(request.POST)
+        state["verification_form"] = verification_form
+        if verification_form.is_valid():
+            pledge = get_object_or_404(DonationPledge, id=request.POST.get("pledge_id"), user=request.user)
+            code = verification_form.cleaned_data["transaction_code"]
+            pledge.pix_transaction_code = code
+            pledge.pix_last_checked_at = timezone.now()
+            expected_txid = getattr(settings, "PIX_STATIC_TXID", "").strip() or pledge.pix_txid
+            matches_txid = expected_txid and expected_txid.lower() in code.lower()
+            if matches_txid:
+                pledge.pix_status = DonationPaymentStatus.CONFIRMED
+                pledge.pix_confirmed_at = timezone.now()
+                pledge.save(update_fields=[
+                    "pix_transaction_code",
+                    "pix_status",
+                    "pix_confirmed_at",
+                    "pix_last_checked_at",
+                ])
+                messages.success(request, "Pix confirmado! Obrigado por alimentar a selva criativa.")
+            else:
+                pledge.pix_status = DonationPaymentStatus.FAILED
+                pledge.save(update_fields=[
+                    "pix_transaction_code",
+                    "pix_status",
+                    "pix_last_checked_at",
+                ])
+                messages.warning(request, "Não conseguimos localizar o pagamento com este código. Revise o TXID no comprovante.")
+            return HttpResponseRedirect(f"{reverse('donate')}?focus=donation#donation")
+    return None
+
+
+def _report_similar_feedback(request, feedback):
+    matches = similar_feedback(unpack_signature(feedback.minhash), exclude_id=feedback.pk) if feedback.minhash else []
+    if not matches:
+        return
+    # Títulos só de sugestões públicas: as demais são privadas de quem as enviou.
+    public_titles = list(
+        Feedback.objects.filter(id__in=[feedback_id for _, feedback_id in matches], is_public=True).values_list("title", flat=True)
     )
+    if public_titles:
+        messages.info(request, "Sugestões parecidas já compartilhadas: " + "; ".join(public_titles) + ".")
+    else:
+        messages.info(request, "Outras pessoas já sugeriram algo parecido: isso ajuda a equipe a priorizar o tema.")
+
 
-    active_focus = focus or request.GET.get("focus") or "faq"
+def _user_donations(user):
+    if not user.is_authenticated:
+        return []
+    static_txid = getattr(settings, "PIX_STATIC_TXID", "").strip()
+    # Payload e QR já vêm prontos da promessa (gerados no save): a página só lê colunas.
+    pledges = DonationPledge.objects.filter(user=user).order_by("-created_at")[:5]
+    return [
+        {
+            "pledge": pledge,
+            "payload": pledge.pix_payload,
+            "qr_svg": pledge.pix_qr_svg,
+            "txid_display": static_txid or pledge.pix_txid,
+        }
+        for pledge in pledges
+    ]
 
-    feedback_queryset = Feedback.objects.all()
-    public_feedback = (
-        feedback_queryset.filter(is_public=True)
-        .select_related("user")
-        .order_by("-created_at")[:6]
+
+def _portal_categories():
+    return list(
+        FAQCategory.objects.filter(is_active=True)
+        .prefetch_related(Prefetch("faqs", queryset=FAQEntry.objects.filter(is_active=True).order_by("order", "question")))
+        .order_by("order", "title")
     )
 
-    feedback_metrics = feedback_queryset.aggregate(
+
+def _portal_metrics():
+    feedback_metrics = Feedback.objects.aggregate(
         total=Count("id"),
         pending=Count("id", filter=Q(status=FeedbackStatus.NEW)),
         reviewing=Count("id", filter=Q(status=FeedbackStatus.IN_REVIEW)),
         published=Count("id", filter=Q(status=FeedbackStatus.PUBLISHED)),
         avg_impact=Avg("impact_rating"),
     )
-
-    donation_queryset = DonationPledge.objects.all()
-    donation_metrics = donation_queryset.aggregate(
+    donation_metrics = DonationPledge.objects.aggregate(
         supporters=Count("user", distinct=True),
         total=Sum("amount"),
         recurring=Count("id", filter=Q(is_recurring=True)),
     )
+    return feedback_metrics, donation_metrics
+
 
-    feedback_form = FeedbackForm()
-    donation_form = DonationForm()
-    verification_form = DonationVerificationForm()
+def _portal_reads(user):
+    """Leituras do portal numa só chamada síncrona (mesmo motivo de ``_home_reads``)."""
+    return (
+        caching.faq.get_or_set("portal-categories", _portal_categories),
+        list(Feedback.objects.filter(is_public=True).select_related("user").order_by("-created_at")[:6]),
+        caching.metrics.get_or_set("portal", _portal_metrics),
+        _user_donations(user),
+    )
+
+
+@conditional_page(portal_sources)
+async def community_portal(request, focus=None):
+    state = {
+        "active_focus": focus or request.GET.get("focus") or "faq",
+        "feedback_form": FeedbackForm(),
+        "donation_form": DonationForm(),
+        "verification_form": DonationVerificationForm(),
+    }
 
     if request.method == "POST":
-        action = request.POST.get("action")
-        if action == "feedback":
-            active_focus = "feedback"
-            if not request.user.is_authenticated:
-                login_target = f"{reverse('faq')}?focus=feedback"
-                messages.error(request, "É necessário entrar com sua conta para enviar contribuições.")
-                query_string = urlencode({"next": login_target})
-                return redirect(f"{reverse('login')}?{query_string}")
-            feedback_form = FeedbackForm(request.POST)
-            if feedback_form.is_valid():
-                feedback = feedback_form.save(commit=False)
-                feedback.user = request.user
-                feedback.save()
-                messages.success(request, "Obrigado! Sua sugestão foi recebida e entra na fila de análise.")
-                return HttpResponseRedirect(f"{reverse('faq')}?focus=feedback#feedback")
-        elif action == "donation":
-            active_focus = "donation"
-            if not request.user.is_authenticated:
-                login_target = reverse('donate')
-                messages.error(request, "Crie uma conta ou entre para registrar sua intenção de apoio.")
-                query_string = urlencode({"next": login_target})
-                return redirect(f"{reverse('login')}?{query_string}")
-            donation_form = DonationForm(request.POST)
-            if donation_form.is_valid():
-                pledge = donation_form.save(commit=False)
-                pledge.user = request.user
-                pledge.save()
-                messages.success(request, "Recebemos sua contribuição! Vamos entrar em contato com instruções de pagamento.")
-                return HttpResponseRedirect(f"{reverse('donate')}?focus=donation#donation")
-        elif action == "verify_pix":
-            active_focus = "donation"
-            if not request.user.is_authenticated:
-                messages.error(request, "É necessário estar autenticado para validar o Pix.")
-                return redirect(f"{reverse('login')}?{urlencode({'next': reverse('donate')})}")
-            verification_form = DonationVerificationForm(request.POST)
-            if verification_form.is_valid():
-                pledge = get_object_or_404(DonationPledge, id=request.POST.get("pledge_id"), user=request.user)
-                code = verification_form.cleaned_data["transaction_code"]
-                pledge.pix_transaction_code = code
-                pledge.pix_last_checked_at = timezone.now()
-                expected_txid = getattr(settings, "PIX_STATIC_TXID", "").strip() or pledge.pix_txid
-                matches_txid = expected_txid and expected_txid.lower() in code.lower()
-                if matches_txid:
-                    pledge.pix_status = DonationPaymentStatus.CONFIRMED
-                    pledge.pix_confirmed_at = timezone.now()
-                    pledge.save(update_fields=[
-                        "pix_transaction_code",
-                        "pix_status",
-                        "pix_confirmed_at",
-                        "pix_last_checked_at",
-                    ])
-                    messages.success(request, "Pix confirmado! Obrigado por alimentar a selva criativa.")
-                else:
-                    pledge.pix_status = DonationPaymentStatus.FAILED
-                    pledge.save(update_fields=[
-                        "pix_transaction_code",
-                        "pix_status",
-                        "pix_last_checked_at",
-                    ])
-                    messages.warning(request, "Não conseguimos localizar o pagamento com este código. Revise o TXID no comprovante.")
-                return HttpResponseRedirect(f"{reverse('donate')}?focus=donation#donation")
-
-    user_donations = []
-    if request.user.is_authenticated:
-        pix_key = getattr(settings, "PIX_KEY", "")
-        merchant_name = getattr(settings, "PIX_MERCHANT_NAME", "SelvaCore Studios")
-        merchant_city = getattr(settings, "PIX_MERCHANT_CITY", "SAO PAULO")
-        description = getattr(settings, "PIX_DESCRIPTION", "SelvaCore Community")
-        static_payload = getattr(settings, "PIX_STATIC_PAYLOAD", "").strip()
-        static_txid = getattr(settings, "PIX_STATIC_TXID", "").strip()
-        for pledge in request.user.donation_pledges.order_by("-created_at")[:5]:
-            try:
-                if static_payload:
-                    payload = static_payload
-                elif pix_key:
-                    payload = build_pix_payload(
-                        key=pix_key,
-                        txid=pledge.pix_txid,
-                        amount=pledge.amount,
-                        merchant_name=merchant_name,
-                        merchant_city=merchant_city,
-                        description=description,
-                    )
-                else:
-                    payload = ""
-            except Exception:
-                payload = ""
-            qr_image = qr_code_base64(payload) if payload else ""
-            user_donations.append(
-                {
-                    "pledge": pledge,
-                    "payload": payload,
-                    "qr_image": qr_image,
-                    "txid_display": static_txid or pledge.pix_txid,
-                }
-            )
+        response = await sync_to_async(_handle_portal_post)(request, state)
+        if response is not None:
+            return response
+
+    user = await request.auser()
+
+    categories, public_feedback, (feedback_metrics, donation_metrics), user_donations = await sync_to_async(
+        _portal_reads
+    )(user)
 
     context = {
         "categories": categories,
         "public_feedback": public_feedback,
         "feedback_metrics": feedback_metrics,
         "donation_metrics": donation_metrics,
-        "feedback_form": feedback_form,
-        "donation_form": donation_form,
-        "verification_form": verification_form,
-        "active_focus": active_focus,
         "user_donations": user_donations,
         "donation_status": DonationPaymentStatus,
+        **state,
+    }
+    return await sync_to_async(render)(request, "games/community_portal.html", context)
+
+
+async def donate(request):
+    return await community_portal(request, focus="donation")
+
+
+@staff_member_required
+def trends_dashboard(request):
+    """Painel da equipe: gráficos lidos só dos consolidados diários (manage.py build_rollups)."""
+    context = {
+        **admin.site.each_context(request),
+        "title": "Tendências da comunidade",
+        "cache_stats": caching.stats(),
+        **dashboard_data(),
     }
-    return render(request, "games/community_portal.html", context)
+    return render(request, "admin/games/trends_dashboard.html", context)
 
 
-def donate(request):
-    return community_portal(request, focus="donation")
+async def supporter_wall(request):
+    wall = await cached_supporter_wall()
+    return await sync_to_async(render)(request, "games/supporter_wall.html", {"wall": wall})
 
 
 def _remember_known_email(response, email: str):
@@ -0,0 +1,93 @@
+import importlib
+import logging
+import time
+from functools import partial
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.urls import NoReverseMatch, get_resolver, reverse
+
+logger = logging.getLogger(__name__)
+
+HEAVY_MODULES = ("qrcode", "qrcode.image.svg", "PIL.Image", "games.views", "games.admin")
+
+
+def import_heavy_modules():
+    for module in HEAVY_MODULES:
+        importlib.import_module(module)
+    from .utils import qr_code_svg
+
+    # Inicializa as tabelas do qrcode com um QR mínimo.
+    qr_code_svg("warmup")
+
+
+def compile_templates():
+    """Carrega no cached loader todos os templates do projeto (admin/auth do Django ficam de fora)."""
+    base_dir = Path(settings.BASE_DIR).resolve()
+    compiled = 0
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        for directory in engine.template_dirs:
+            directory = Path(directory).resolve()
+            if not directory.is_relative_to(base_dir) or not directory.is_dir():
+                continue
+            for path in sorted(directory.rglob("*")):
+                if path.is_file():
+                    engine.get_template(path.relative_to(directory).as_posix())
+                    compiled += 1
+    return compiled
+
+
+def resolve_urls():
+    resolver = get_resolver()
+    for name in [key for key in resolver.reverse_dict if isinstance(key, str)]:
+        try:
+            reverse(name)
+        except NoReverseMatch:
+            # Rotas com parâmetros obrigatórios já ficam indexadas pelo reverse_dict.
+            pass
+
+
+def prime_catalog():
+    """Vitrine da home no cache em camadas: workers criados por fork herdam o LRU já preenchido."""
+    from django.utils import timezone
+
+    from . import caching, views
+
+    today = timezone.localdate()
+    catalog = caching.catalog.get_or_set(f"home:{today.isoformat()}", partial(views._home_catalog, today))
+    return len(catalog["released_games"]) + len(catalog["upcoming_games"]) + len(catalog["unrevealed_games"])
+
+
+def prime_faq():
+    from . import caching, views
+
+    caching.faq.get_or_set("home", views._home_faq)
+    return len(caching.faq.get_or_set("portal-categories", views._portal_categories))
+
+
+WARMUP_STEPS = (
+    ("imports", import_heavy_modules),
+    ("templates", compile_templates),
+    ("urls", resolve_urls),
+    ("catalog", prime_catalog),
+    ("faq", prime_faq),
+)
+
+
+def run_warmup(steps=WARMUP_STEPS):
+    """Executa cada etapa e devolve [(nome, segundos, resultado)]."""
+    timings = []
+    for label, step in steps:
+        started = time.perf_counter()
+        result = step()
+        elapsed = time.perf_counter() - started
+        logger.info("warm-up %s: %.1f ms", label, elapsed * 1000)
+        timings.append((label, elapsed, result))
+    # Não deixa conexão aberta para ser herdada por workers criados via fork.
+    connections.close_all()
+    return timings
@@ -0,0 +1,74 @@
+(function(){
+  const MIN_LOADER_TIME = 5000;
+  let loaderStart = performance.now();
+
+  function hideLoader(){
+    const loader = document.getElementById('jungle-loader');
+    if(!loader) return;
+    loader.classList.add('is-leaving');
+    const removeLoader = function(){
+      if(loader && loader.parentNode){ loader.remove(); }
+    };
+    loader.addEventListener('animationend', removeLoader, { once: true });
+    setTimeout(removeLoader, 2000);
+  }
+
+  function initCarouselGeneric(root, options){
+    const track = root.querySelector(options.trackSelector);
+    const slides = Array.from(root.querySelectorAll(options.slideSelector));
+    const prev = root.querySelector(options.prevSelector);
+    const next = root.querySelector(options.nextSelector);
+    let index = 0;
+    const total = slides.length;
+    let interval = parseInt(root.dataset.interval || 4000, 10);
+    let autoplay = root.dataset.autoplay === 'true';
+    let timer = null;
+
+    function go(i){
+      index = (i + total) % total;
+      if(track) track.style.transform = `translateX(${ -index * 100 }%)`;
+    }
+
+    function start(){ if(autoplay && total>1){ timer = setInterval(()=> go(index+1), interval); } }
+    function stop(){ if(timer){ clearInterval(timer); timer = null; } }
+
+    if(prev) prev.addEventListener('click', ()=> { stop(); go(index-1); start(); });
+    if(next) next.addEventListener('click', ()=> { stop(); go(index+1); start(); });
+
+    root.addEventListener('mouseenter', stop);
+    root.addEventListener('mouseleave', start);
+
+    // init
+    go(0);
+    start();
+  }
+
+  document.addEventListener('DOMContentLoaded', function(){
+    loaderStart = performance.now();
+    document.body.classList.add('page-is-loading');
+    document.querySelectorAll('.carousel').forEach(function(el){
+      initCarouselGeneric(el, { trackSelector: '.carousel-track', slideSelector: '.carousel-slide', prevSelector: '.carousel-prev', nextSelector: '.carousel-next' });
+    });
+    document.querySelectorAll('.simple-carousel').forEach(function(el){
+      initCarouselGeneric(el, { trackSelector: '.simple-carousel-track', slideSelector: '.simple-carousel-slide', prevSelector: null, nextSelector: null });
+    });
+  });
+
+  window.addEventListener('load', function(){
+    const elapsed = performance.now() - loaderStart;
+    const delay = Math.max(0, MIN_LOADER_TIME - elapsed);
+    setTimeout(function(){
+      document.body.classList.add('page-loaded');
+      document.body.classList.remove('page-is-loading');
+      hideLoader();
+    }, delay);
+  });
+
+  window.addEventListener('pageshow', function(evt){
+    if(evt.persisted){
+      const loader = document.getElementById('jungle-loader');
+      if(loader){ loader.remove(); }
+      document.body.classList.remove('page-is-loading');
+    }
+  });
+})();